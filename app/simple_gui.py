@@ -11,12 +11,25 @@ logging.basicConfig(level=logging.DEBUG,
                    format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# How often the Tk loop checks for state updates: about one frame
+STATE_FRAME_MS = 16
+
 # Add parent directory to path so we can import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.nlp import NLPModule
+from core.intent_classifier import load_default_model
 from core.action_mapper import ActionMapper
 from core.max_controller import MaxController
+from core.pipelined_executor import PipelinedExecutor
+from core.circuit_breaker import GuardedController
+from core.clip_writer import ClipWritingController
+from core.automation import RampingController
+from core.pacer import PacedController
+from core.speech_feedback import create_feedback
+from core.macros import MacroLibrary, default_macro_path
+from core.grammar import GrammarWatcher
+from core.state_feed import StateFeed, apply_changes
 
 class AbletonMLApp:
     def __init__(self, root):
@@ -34,19 +47,40 @@ class AbletonMLApp:
         
         # Initialize our modules
         logger.debug("Initializing NLP module")
-        self.nlp = NLPModule()
+        self.nlp = NLPModule(classifier=load_default_model())
         logger.debug("Initializing Action Mapper")
         self.mapper = ActionMapper()
         logger.debug("Initializing Ableton Controller")
-        self.controller = MaxController()
+        # Deadlines and a circuit breaker keep the UI responsive when Live is closed,
+        # sends are paced to what Live can absorb, and fades and ramps run on the
+        # ramp scheduler's thread
+        self.controller = RampingController(PacedController(ClipWritingController(GuardedController(MaxController()))))
+        # Keeps several actions in flight instead of one round trip each
+        self.executor = PipelinedExecutor(self.controller)
+        # Macros defined through the API server run here too, without parsing
+        self.macros = MacroLibrary(default_macro_path())
+        # Grammar edits (new effects, synonyms) take effect without restarting
+        self.grammar_watcher = GrammarWatcher()
+        self.grammar_watcher.subscribe(self.nlp.use_grammar)
+        self.grammar_watcher.subscribe(self.mapper.use_grammar)
+        self.grammar_watcher.subscribe(self.macros.use_grammar)
+        self.grammar_watcher.start()
+        # Spoken confirmations for eyes-free use; common phrases render in the background
+        self.feedback = create_feedback() if os.environ.get('ABLETONML_SPEECH') else None
+        if self.feedback:
+            self.feedback.prerender()
         
         # Create the UI
         logger.debug("Creating UI widgets")
         self.create_widgets()
         
-        # Update project state with a longer delay to ensure controller is ready
-        logger.debug("Scheduling initial project state update")
-        self.root.after(1000, self.update_project_state)
+        # Project state arrives as deltas pushed by the controller (or found by
+        # a background poll when it can't push); the Tk loop only drains them
+        logger.debug("Subscribing to project state changes")
+        self.state = None
+        self.state_feed = StateFeed(self.controller, interval=float(os.environ.get('ABLETONML_STATE_POLL', 1.0)))
+        self.state_feed.start()
+        self.root.after(STATE_FRAME_MS, self.drain_state_updates)
         
     def create_widgets(self):
         # Create main frame to hold everything
@@ -242,44 +276,82 @@ class AbletonMLApp:
         
     def execute_command(self, command_text):
         try:
-            # Parse the command
-            parsed_command = self.nlp.parse_command(command_text)
-            
-            if not parsed_command["intent"]:
-                self.add_to_output("Could not understand command\n")
-                return
+            invocation = self.macros.match(command_text)
+            if invocation:
+                # One pre-built batch; no parsing or mapping
+                macro, values = invocation
+                actions = [macro.bind(values)]
+            else:
+                # Parse the command
+                parsed_command = self.nlp.parse_command(command_text)
                 
-            # Map to actions
-            actions = self.mapper.map_to_actions(parsed_command)
+                if not parsed_command["intent"]:
+                    self.add_to_output("Could not understand command\n")
+                    self.speak("not_understood")
+                    return
+                    
+                # Map to actions
+                actions = self.mapper.map_to_actions(parsed_command)
             
             if not actions:
                 self.add_to_output("Could not map command to actions\n")
+                self.speak("not_understood")
                 return
                 
             # Execute actions
-            success = True
-            for action in actions:
-                if not self.controller.execute_action(action):
-                    success = False
-                    break
+            reports = self.executor.run(actions)
+            success = all(report["success"] for report in reports)
+            for report in reports:
+                if not report["success"]:
+                    reason = report.get("error", "failed")
+                    self.add_to_output(f"  {report['action']['action']}: {reason}\n")
                     
             if success:
                 self.add_to_output("Command executed successfully\n")
-                # Update project state
-                self.root.after(100, self.update_project_state)
+                if self.feedback:
+                    self.feedback.confirm(actions)
+                # Controllers that push have already queued the change
+                self.state_feed.refresh()
             else:
                 self.add_to_output("Command failed\n")
+                unavailable = any("Live unavailable" in str(report.get("error", "")) or
+                                  "did not answer" in str(report.get("error", "")) for report in reports)
+                self.speak("unavailable" if unavailable else "failed")
                 
         except Exception as e:
             self.add_to_output(f"Error: {str(e)}\n")
+            self.speak("failed")
+    
+    def speak(self, key, **slots):
+        """Speak a feedback phrase if spoken feedback is enabled"""
+        if self.feedback:
+            self.feedback.say(key, **slots)
     
-    def update_project_state(self):
+    def drain_state_updates(self):
+        """Apply queued state deltas and redraw what they touched, then check again next frame"""
+        try:
+            updates = self.state_feed.drain()
+            if updates:
+                redraw_tracks = False
+                for update in updates:
+                    if update["changes"] is None or self.state is None:
+                        self.state = update["state"]
+                        redraw_tracks = True
+                    else:
+                        apply_changes(self.state, update["changes"])
+                        redraw_tracks = redraw_tracks or any(change["op"] not in ("set_tempo", "set_param")
+                                                             for change in update["changes"])
+                if redraw_tracks:
+                    self.update_project_state(self.state)
+                else:
+                    self.tempo_value.config(text=f"{self.state['tempo']} BPM")
+        except Exception as e:
+            logger.exception(f"Error applying project state updates: {e}")
+        self.root.after(STATE_FRAME_MS, self.drain_state_updates)
+    
+    def update_project_state(self, state):
         """Update the project state display"""
         try:
-            # Get current project state
-            logger.debug("Fetching project state from controller")
-            state = self.controller.get_project_state()
-            
             if state:
                 logger.debug(f"Received project state: {json.dumps(state, indent=2)}")
                 
@@ -307,6 +379,11 @@ class AbletonMLApp:
                         logger.debug(f"Adding {len(track['devices'])} devices for track {track['name']}")
                         for device in track['devices']:
                             self.tracks_display.insert(tk.END, f"    - {device['name']}\n", "device")
+                    
+                    # Add clips written by patterns and MIDI imports
+                    for clip in track.get('clips', []):
+                        label = clip.get('pattern') or clip.get('file') or 'clip'
+                        self.tracks_display.insert(tk.END, f"    ♪ {label} ({clip.get('notes', 0)} notes)\n", "device")
                 
                 # Configure tags
                 self.tracks_display.tag_configure("selected", background="#4D4D4D")
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 import sys
 import os
+import re
 import json
+import time
 import logging
-from flask import Flask, request, jsonify
+import functools
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 
@@ -16,21 +19,187 @@ logger = logging.getLogger(__name__)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.nlp import NLPModule
+from core.intent_classifier import load_default_model
 from core.action_mapper import ActionMapper
 from core.max_controller import MaxController
+from core.session_recorder import SessionRecorder
+from core.browser_catalog import BrowserCatalog
+from core.track_index import TrackNameIndex
+from core.batch_runner import BatchRunner
+from core.controller_pool import ControllerPool, default_controller_factory, parse_endpoints, parse_groups
+from core.circuit_breaker import GuardedController
+from core.clip_writer import ClipWritingController
+from core.automation import RampScheduler, RampingController
+from core.pacer import AdaptivePacer, PacedController
+from core.macros import MacroLibrary, default_macro_path
+from core.transcript_stream import stream_plans
+from core.snapshot import Snapshot, diff, restore_actions
+from core.beat_sync import BeatScheduler, OscBeatListener, ScheduledController, SongClock
+from core.grammar import GrammarWatcher, default_cache_dir
+from core.link_probe import LinkProber, parse_thresholds, probe_for
+from backend.worker_pool import PreforkNLPPool
+from backend.state_fanout import EncodedJSON, PacketJSON, StateFanout
+from backend.profiler import AdminGate, SamplingProfiler, profile_call
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", json=PacketJSON)
 
 # Initialize our modules
+catalog = None
+if os.environ.get('ABLETONML_CATALOG'):
+    # Index directory built with `python core/browser_catalog.py build`
+    catalog = BrowserCatalog(os.environ['ABLETONML_CATALOG'])
+    logger.debug(f"Loaded browser catalog with {len(catalog)} items")
 logger.debug("Initializing NLP module")
-nlp = NLPModule()
+# Polite phrasings the verb lookup misses fall back on the intent classifier,
+# trained and cached on first start (ABLETONML_INTENT_MODEL)
+nlp = NLPModule(catalog=catalog, classifier=load_default_model())
 logger.debug("Initializing Action Mapper")
-mapper = ActionMapper()
+# Track names are resolved from the last project state we saw
+track_index = TrackNameIndex()
+mapper = ActionMapper(catalog=catalog, track_index=track_index)
+# Optional pre-forked parser workers sharing the warm model copy-on-write;
+# forked here, after the model is loaded and before the server starts
+nlp_pool = None
+if os.environ.get('ABLETONML_WORKERS'):
+    # Dead or stuck workers are replaced; a parse that takes longer than this runs in process instead
+    nlp_pool = PreforkNLPPool(nlp, workers=int(os.environ['ABLETONML_WORKERS']),
+                              timeout=float(os.environ.get('ABLETONML_PARSE_TIMEOUT', 2.0)))
+
 logger.debug("Initializing Max Controller")
-controller = MaxController()
+# One thread runs every parameter ramp ("fade reverb wet to 80 over 4 bars") of every rig
+ramps = RampScheduler(max_rate=float(os.environ.get('ABLETONML_RAMP_MAX_RATE', 200)))
+# Outbound pacing per rig, adapting to Live's acknowledgement latency and losses
+pacers = {}
+
+def paced(name, live_controller):
+    pacers[name] = AdaptivePacer()
+    return PacedController(live_controller, pacers[name])
+
+# Deadlines and a circuit breaker so a closed Live can't stall every handler;
+# generated clip notes and MIDI imports go straight to AbletonOSC, not through
+# the Max bridge, and outside the call deadline
+controller = RampingController(
+    paced('default', ClipWritingController(GuardedController(
+        MaxController(), call_timeout=float(os.environ.get('ABLETONML_CALL_TIMEOUT', 2.0))))),
+    ramps)
+
+# Beat-aligned launches ("launch scene 3 on the next bar") on the default rig,
+# timed from AbletonOSC's beat listener; ABLETONML_BEAT_SYNC is the port Live's
+# replies come back on
+beat_scheduler = None
+beat_listener = None
+if os.environ.get('ABLETONML_BEAT_SYNC'):
+    song_clock = SongClock()
+    beat_listener = OscBeatListener(song_clock, listen_port=int(os.environ['ABLETONML_BEAT_SYNC'])).start()
+    beat_scheduler = BeatScheduler(song_clock, controller.execute_action)
+    controller = ScheduledController(controller, beat_scheduler)
+
+# Every Live rig this backend drives; sessions bind to one rig or a group of
+# rigs, and unbound sessions use "default" (the controller above). A group
+# command waits at most RIG_TIMEOUT seconds for its rigs; slower ones are
+# reported as None and left to finish on their own threads
+RIG_TIMEOUT = float(os.environ.get('ABLETONML_RIG_TIMEOUT', 5.0))
+controllers = ControllerPool(
+    controller_factory=lambda host, port: RampingController(
+        paced(f"{host}:{port}", default_controller_factory(host, port)), ramps))
+controllers.add_endpoint('default', controller=controller, track_index=track_index)
+for name, host, port in parse_endpoints(os.environ.get('ABLETONML_ENDPOINTS', '')):
+    controllers.add_endpoint(name, host, port)
+for name, members in parse_groups(os.environ.get('ABLETONML_GROUPS', '')).items():
+    controllers.add_group(name, members)
+
+# Round-trip time, jitter and loss of every rig, probed in the background;
+# a link going over its alert thresholds is pushed to every client
+def link_alert(name, degraded, alerts):
+    socketio.emit('link_alert', {"endpoint": name, "degraded": degraded, "alerts": alerts})
+
+link_prober = LinkProber(interval=float(os.environ.get('ABLETONML_PROBE_INTERVAL', 2.0)),
+                         thresholds=parse_thresholds(os.environ.get('ABLETONML_LINK_ALERTS', '')),
+                         on_alert=link_alert)
+for endpoint in controllers.endpoints.values():
+    link_prober.add(endpoint.name, probe_for(endpoint.controller))
+link_prober.start()
+
+mappers = {'default': mapper}
+
+def mapper_for(target):
+    """Return an action mapper resolving track names against the target's (first) rig"""
+    endpoint = controllers.members(target)[0]
+    if endpoint.name not in mappers:
+        mappers[endpoint.name] = ActionMapper(catalog=catalog, track_index=endpoint.track_index)
+    return mappers[endpoint.name]
+
+def first_state(states):
+    """Pick the state of the first rig that answered"""
+    return next((state for state in states.values() if state), None)
+
+def encode_state(rig, state, version):
+    """Encode a project_state once; PacketJSON copies it into every observer's packet"""
+    return EncodedJSON(json.dumps(state, default=str, separators=(',', ':'))), {'target': rig, 'version': version}
+
+# Observers (UI, screen reader, dashboards) subscribed to each rig's state
+observers = StateFanout(serialize=encode_state,
+                        min_interval=float(os.environ.get('ABLETONML_STATE_INTERVAL', 0.05)),
+                        ack_timeout=float(os.environ.get('ABLETONML_STATE_ACK_TIMEOUT', 5.0)))
+
+def observer_sender(sid):
+    return lambda encoded: socketio.emit('project_state', *encoded, to=sid)
+
+def publish_states(states):
+    """Push fresh rig states to their observers"""
+    for rig, state in states.items():
+        if state:
+            observers.publish(rig, state)
+
+# User-defined macros, stored compiled so loading them never runs the parser
+macros = MacroLibrary(default_macro_path())
+
+# Edits to the grammar file are compiled in the background and swapped into
+# the parser, mappers, macros and parser workers without a restart
+grammar_watcher = GrammarWatcher(interval=float(os.environ.get('ABLETONML_GRAMMAR_POLL', 1.0)))
+
+@grammar_watcher.subscribe
+def swap_grammar(grammar):
+    nlp.use_grammar(grammar)
+    for target_mapper in list(mappers.values()):
+        target_mapper.use_grammar(grammar)
+    macros.use_grammar(grammar)
+    if nlp_pool:
+        nlp_pool.update_grammar(grammar)
+
+grammar_watcher.start()
+
+# On-demand sampling profiler; idle (and free) until an admin starts a run.
+# The server listens on every interface, so the profiling routes and event are
+# off unless ABLETONML_PROFILING is set, and then need ABLETONML_ADMIN_TOKEN
+profiler = SamplingProfiler(max_duration=float(os.environ.get('ABLETONML_PROFILE_MAX_SECONDS', 60)))
+profile_gate = AdminGate.from_environment('ABLETONML_PROFILING')
+
+def request_admin_token():
+    """The admin token an HTTP request carries: "Authorization: Bearer <token>" or X-Admin-Token"""
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):]
+    return request.headers.get('X-Admin-Token')
+
+def profiling_route(view):
+    """Refuse a profiling route unless profiling is enabled and the admin token is given"""
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        denied = profile_gate.check(request_admin_token())
+        if denied:
+            message, status = denied
+            return jsonify({"success": False, "error": message}), status
+        return view(*args, **kwargs)
+    return guarded
+
+# Optional session recording for later replay (see core/session_recorder.py)
+recorder = None
+if os.environ.get('ABLETONML_SESSION_LOG'):
+    recorder = SessionRecorder(os.environ['ABLETONML_SESSION_LOG'])
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
@@ -40,9 +209,233 @@ def get_status():
 @app.route('/api/project_state', methods=['GET'])
 def get_project_state():
     """API endpoint to get current project state"""
-    state = controller.get_project_state()
+    target = request.args.get('target') or controllers.default
+    state = first_state(controllers.get_project_state(target, timeout=RIG_TIMEOUT))
     return jsonify(state)
 
+@app.route('/api/commands', methods=['POST'])
+def run_commands():
+    """
+    API endpoint to run a batch of utterances and/or actions, streaming one
+    NDJSON line per item and a final project state line
+    """
+    body = request.get_json(silent=True)
+    if isinstance(body, list):
+        body = {"items": body}
+    if not isinstance(body, dict) or not isinstance(body.get("items"), list):
+        return jsonify({"success": False, "message": "Expected a JSON list of items or {\"items\": [...]}"}), 400
+    
+    target = body.get("target") or controllers.default
+    if target not in controllers.endpoints:
+        return jsonify({"success": False, "message": f"Batch target must be a single Live endpoint: {target}"}), 400
+    endpoint = controllers.endpoints[target]
+    
+    runner = BatchRunner(nlp, mapper_for(target), endpoint.controller, nlp_pool=nlp_pool)
+    session_id = body.get("session") or f"batch-{id(body)}"
+    
+    def generate():
+        for line in runner.run(body["items"], session_id=session_id,
+                               stop_on_error=bool(body.get("stop_on_error"))):
+            if line["type"] == "state" and line["state"]:
+                endpoint.track_index.update_from_state(line["state"])
+                observers.publish(target, line["state"])
+            yield json.dumps(line, default=str) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/grammar/reload', methods=['POST'])
+def reload_grammar():
+    """API endpoint to reload the grammar file now instead of on the next poll"""
+    changed = grammar_watcher.reload()
+    status = grammar_watcher.status()
+    return jsonify({"success": status["last_error"] is None, "changed": changed, "grammar": status})
+
+@app.route('/api/transcript', methods=['POST'])
+def run_transcript():
+    """
+    API endpoint to run a dictation transcript (plain text body, may be
+    streamed) command by command, executing each as soon as it is parsed and
+    streaming one NDJSON line per command candidate
+    """
+    target = request.args.get('target') or controllers.default
+    try:
+        controllers.members(target)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    target_mapper = mapper_for(target)
+    
+    def generate():
+        for plan in stream_plans(request.stream, nlp, target_mapper):
+            line = {"type": "result", "index": plan["index"], "text": plan["text"], "actions": plan["actions"]}
+            if plan["actions"]:
+                results = controllers.execute(target, plan["actions"], timeout=RIG_TIMEOUT)
+                line["results"] = results
+                line["success"] = all(rig is not None and all(rig) for rig in results.values())
+            else:
+                line["success"] = False
+                line["message"] = f"Could not understand command: {plan['text']}"
+            yield json.dumps(line, default=str) + "\n"
+        states = controllers.get_project_state(target, timeout=RIG_TIMEOUT)
+        publish_states(states)
+        yield json.dumps({"type": "state", "state": first_state(states)}, default=str) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Link latency histograms, jitter and loss per rig, in Prometheus text format"""
+    return Response(link_prober.metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/workers', methods=['GET'])
+def get_worker_stats():
+    """API endpoint to report per-worker memory and throughput"""
+    if not nlp_pool:
+        return jsonify({"workers": [], "message": "Pre-forked workers are disabled (set ABLETONML_WORKERS)"})
+    return jsonify(nlp_pool.stats())
+
+@app.route('/api/profile', methods=['POST'])
+@profiling_route
+def start_profile():
+    """
+    API endpoint to sample the server's threads for a bounded time
+    Body: {"duration": seconds, "interval": seconds, "threads": "name prefix"}
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        status = profiler.start(data.get('duration', 10), data.get('interval'), data.get('threads'))
+    except RuntimeError as e:
+        return jsonify({"success": False, "error": str(e), "profile": profiler.status()}), 409
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "duration and interval must be numbers"}), 400
+    return jsonify({"success": True, "profile": status})
+
+@app.route('/api/profile', methods=['GET'])
+@profiling_route
+def get_profile():
+    """
+    API endpoint for the latest profile; ?format=collapsed returns the
+    collapsed stacks as text for flamegraph.pl / speedscope
+    """
+    if request.args.get('format') == 'collapsed':
+        return Response(profiler.collapsed(), mimetype='text/plain')
+    return jsonify(profiler.result())
+
+@app.route('/api/profile/stop', methods=['POST'])
+@profiling_route
+def stop_profile():
+    """API endpoint to end a profile early and return it"""
+    return jsonify(profiler.stop())
+
+@app.route('/api/macros', methods=['GET'])
+def list_macros():
+    """API endpoint to list the defined macros"""
+    return jsonify({"macros": [macro.to_dict() for macro in macros.macros.values()]})
+
+@app.route('/api/macros/<name>', methods=['PUT'])
+def define_macro(name):
+    """
+    API endpoint to define a macro from steps (commands or actions) with
+    parameter defaults, e.g. {"steps": ["set reverb wet to {wet}"], "parameters": {"wet": 30}}
+    """
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body.get("steps"), list) or not body["steps"]:
+        return jsonify({"success": False, "message": "Expected {\"steps\": [...], \"parameters\": {...}}"}), 400
+    try:
+        macro = macros.define(name, body["steps"], body.get("parameters") or {}, nlp, mapper)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, "macro": macro.to_dict()})
+
+@app.route('/api/macros/<name>', methods=['DELETE'])
+def delete_macro(name):
+    """API endpoint to remove a macro"""
+    if not macros.remove(name):
+        return jsonify({"success": False, "message": f"No macro named {name}"}), 404
+    return jsonify({"success": True})
+
+@app.route('/api/macros/<name>/run', methods=['POST'])
+def run_macro(name):
+    """API endpoint to run a macro with parameter values, as one batch"""
+    body = request.get_json(silent=True) or {}
+    target = body.get("target") or controllers.default
+    macro = macros.get(name)
+    if macro is None:
+        return jsonify({"success": False, "message": f"No macro named {name}"}), 404
+    try:
+        batch = macro.bind(body.get("values") or {})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    results = controllers.execute(target, [batch], timeout=RIG_TIMEOUT)
+    publish_states(controllers.get_project_state(target, timeout=RIG_TIMEOUT))
+    success = all(rig_results is not None and all(rig_results) for rig_results in results.values())
+    return jsonify({"success": success, "results": results})
+
+# Known-good project states saved with POST /api/snapshots/<name>
+SNAPSHOT_DIR = os.environ.get('ABLETONML_SNAPSHOT_DIR') or os.path.join(default_cache_dir(), 'snapshots')
+
+def snapshot_path(name):
+    """Map a snapshot name to its file; names are restricted so they can't escape the directory"""
+    if not re.fullmatch(r'[A-Za-z0-9_.-]{1,64}', name) or name.startswith('.'):
+        raise ValueError(f"Invalid snapshot name: {name}")
+    return os.path.join(SNAPSHOT_DIR, f"{name}.amls")
+
+def snapshot_changes(name, target):
+    """Diff the target's current state against a saved snapshot"""
+    saved = Snapshot.load(snapshot_path(name))
+    state = first_state(controllers.get_project_state(target, timeout=RIG_TIMEOUT))
+    if not state:
+        raise ConnectionError(f"No project state from {target}")
+    return diff(Snapshot.from_state(state), saved)
+
+@app.route('/api/snapshots/<name>', methods=['POST'])
+def save_snapshot(name):
+    """API endpoint to save the target's current state as a named snapshot"""
+    target = request.args.get('target') or controllers.default
+    try:
+        path = snapshot_path(name)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    state = first_state(controllers.get_project_state(target, timeout=RIG_TIMEOUT))
+    if not state:
+        return jsonify({"success": False, "message": f"No project state from {target}"}), 503
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    snapshot = Snapshot.from_state(state)
+    snapshot.save(path)
+    return jsonify({"success": True, "name": name, "tracks": len(snapshot), "bytes": os.path.getsize(path)})
+
+@app.route('/api/snapshots/<name>/diff', methods=['GET'])
+def diff_snapshot(name):
+    """API endpoint to list what changed since a snapshot and how to restore it"""
+    target = request.args.get('target') or controllers.default
+    try:
+        changes = snapshot_changes(name, target)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({"success": False, "message": f"No snapshot named {name}"}), 404
+    except ConnectionError as e:
+        return jsonify({"success": False, "message": str(e)}), 503
+    actions, unsupported = restore_actions(changes)
+    return jsonify({"success": True, "changes": changes, "actions": actions, "unsupported": unsupported})
+
+@app.route('/api/snapshots/<name>/restore', methods=['POST'])
+def restore_snapshot(name):
+    """API endpoint to bring the target back to a saved snapshot"""
+    target = request.args.get('target') or controllers.default
+    try:
+        changes = snapshot_changes(name, target)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({"success": False, "message": f"No snapshot named {name}"}), 404
+    except ConnectionError as e:
+        return jsonify({"success": False, "message": str(e)}), 503
+    actions, unsupported = restore_actions(changes)
+    results = controllers.execute(target, actions, timeout=RIG_TIMEOUT) if actions else {}
+    publish_states(controllers.get_project_state(target, timeout=RIG_TIMEOUT))
+    success = all(rig_results is not None and all(rig_results) for rig_results in results.values())
+    return jsonify({"success": success, "actions": actions, "results": results, "unsupported": unsupported})
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
@@ -53,49 +446,167 @@ def handle_connect():
 def handle_disconnect():
     """Handle client disconnection"""
     logger.debug("Client disconnected")
+    controllers.unbind(request.sid)
+    observers.unsubscribe(request.sid)
+
+@socketio.on('subscribe_state')
+def handle_subscribe_state(data):
+    """
+    Receive project_state pushes for a Live endpoint (or every rig of a
+    group) whenever anyone changes it. Intermediate states are coalesced:
+    with {"ack": true} until the client answers a push with state_ack (or
+    the ack times out), otherwise for a minimum interval between pushes.
+    """
+    data = data or {}
+    target = data.get('target') or controllers.target_for(request.sid)
+    try:
+        rigs = [endpoint.name for endpoint in controllers.members(target)]
+    except ValueError as e:
+        emit('response', {'success': False, 'message': str(e)})
+        return
+    for rig in rigs:
+        observers.subscribe(rig, request.sid, observer_sender(request.sid), acks=bool(data.get('ack')))
+    emit('response', {'success': True, 'message': f"Subscribed to project state of: {', '.join(rigs)}"})
+
+@socketio.on('unsubscribe_state')
+def handle_unsubscribe_state(data=None):
+    """Stop project_state pushes for a target, or for every target"""
+    target = (data or {}).get('target')
+    rigs = [endpoint.name for endpoint in controllers.members(target)] if target else [None]
+    for rig in rigs:
+        observers.unsubscribe(request.sid, rig)
+
+@socketio.on('state_ack')
+def handle_state_ack(data):
+    """Client finished with a pushed state; send it the newest one if it missed any"""
+    observers.ack(data.get('target'), request.sid, int(data.get('version', 0)))
+
+@socketio.on('bind_target')
+def handle_bind_target(data):
+    """Route this client's commands to a Live endpoint or group"""
+    target = data.get('target', controllers.default)
+    try:
+        controllers.bind(request.sid, target)
+        emit('response', {'success': True, 'message': f"Bound to Live target: {target}"})
+    except ValueError as e:
+        emit('response', {'success': False, 'message': str(e)})
 
 @socketio.on('command')
 def handle_command(data):
     """Handle command from client"""
+    t0 = time.perf_counter()
     command = data.get('command', '')
     logger.debug(f"Received command: {command}")
+    parsed_command = actions = None
+    recorded = False
     
     try:
-        # Process the command with NLP
-        parsed_command = nlp.parse_command(command)
-        logger.debug(f"Parsed command: {parsed_command}")
-        
-        # Map to actions
-        actions = mapper.map_to_actions(parsed_command)
+        target = controllers.target_for(request.sid)
+        invocation = macros.match(command)
+        if invocation:
+            # Macros skip parsing and mapping: one pre-built batch
+            macro, values = invocation
+            parsed_command = {"intent": "macro", "macro": macro.name, "values": values}
+            t1 = time.perf_counter()
+            actions = [macro.bind(values)]
+        else:
+            # Process the command with NLP
+            if nlp_pool:
+                # Parse in the session's worker process, bounded by ABLETONML_PARSE_TIMEOUT
+                parsed_command = nlp_pool.parse(request.sid, command)
+            else:
+                parsed_command = nlp.parse_command(command)
+            logger.debug(f"Parsed command: {parsed_command}")
+            
+            # Map to actions
+            t1 = time.perf_counter()
+            actions = mapper_for(target).map_to_actions(parsed_command)
         logger.debug(f"Actions: {actions}")
+        t2 = time.perf_counter()
         
         if not actions:
+            if recorder:
+                recorder.record(command, parsed_command, actions, session_id=request.sid, received_at=t0,
+                                timings={"parse_ms": (t1 - t0) * 1000, "map_ms": (t2 - t1) * 1000})
             emit('response', {'success': False, 'message': f"Could not understand command: {command}"})
             return
         
-        # Execute actions
-        results = []
-        for action in actions:
-            result = controller.execute_action(action)
-            results.append(result)
+        # Fail fast while the target's circuit breakers are open
+        if not any(endpoint.available for endpoint in controllers.members(target)):
+            if recorder:
+                recorder.record(command, parsed_command, actions, session_id=request.sid, received_at=t0,
+                                timings={"parse_ms": (t1 - t0) * 1000, "map_ms": (t2 - t1) * 1000},
+                                error="Live unavailable")
+            emit('response', {'success': False, 'message': "Live unavailable: check that Ableton Live is running with AbletonOSC loaded"})
+            return
+        
+        # Execute actions on every rig of the target concurrently
+        results = controllers.execute(target, actions, timeout=RIG_TIMEOUT)
+        t3 = time.perf_counter()
+        
+        if recorder:
+            recorder.record(command, parsed_command, actions, results, session_id=request.sid, received_at=t0,
+                            timings={"parse_ms": (t1 - t0) * 1000, "map_ms": (t2 - t1) * 1000,
+                                     "execute_ms": (t3 - t2) * 1000, "total_ms": (t3 - t0) * 1000})
+            recorded = True
         
         # Get updated project state
-        state = controller.get_project_state()
+        states = controllers.get_project_state(target, timeout=RIG_TIMEOUT)
+        publish_states(states)
         
-        # Send response and updated state
-        emit('response', {'success': True, 'message': f"Executed command: {command}"})
-        emit('project_state', state)
+        # Send response and updated state; rigs that didn't answer in time are named
+        timed_out = [rig for rig, rig_results in results.items() if rig_results is None]
+        if not timed_out:
+            emit('response', {'success': True, 'message': f"Executed command: {command}"})
+        elif len(timed_out) < len(results):
+            message = f"Executed command: {command} (no answer from {', '.join(timed_out)} within {RIG_TIMEOUT}s)"
+            emit('response', {'success': True, 'message': message, 'timed_out': timed_out})
+        else:
+            message = f"No Live rig answered within {RIG_TIMEOUT}s: {command}"
+            emit('response', {'success': False, 'message': message, 'timed_out': timed_out})
+        emit('project_state', first_state(states))
+        if target in controllers.groups:
+            emit('project_states', states)
         
     except Exception as e:
         logger.exception(f"Error processing command: {e}")
+        if recorder and not recorded:
+            recorder.record(command, parsed_command, actions, session_id=request.sid, received_at=t0,
+                            error=str(e))
         emit('response', {'success': False, 'message': f"Error: {str(e)}"})
 
+@socketio.on('profile_command')
+def handle_profile_command(data):
+    """
+    Run one command like handle_command, under cProfile, and report where its
+    time went; needs the admin token in "token"
+    """
+    denied = profile_gate.check(data.get('token'))
+    if denied:
+        emit('profile', {'command': data.get('command', ''), 'error': denied[0]})
+        return
+    # Keep the token out of the command handler (and any session recording)
+    data = {key: value for key, value in data.items() if key != 'token'}
+    sort = data.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        sort = 'cumulative'
+    limit = data.get('limit', 30)
+    if not isinstance(limit, int) or limit < 1:
+        limit = 30
+    try:
+        _, report = profile_call(handle_command, (data,), sort=sort, limit=limit)
+    except RuntimeError as e:
+        # Another profile_command is still running
+        emit('profile', {'command': data.get('command', ''), 'error': str(e)})
+        return
+    emit('profile', {'command': data.get('command', ''), 'report': report})
+
 @socketio.on('get_project_state')
 def handle_get_project_state():
     """Handle request for project state"""
     logger.debug("Client requested project state")
-    state = controller.get_project_state()
-    emit('project_state', state)
+    states = controllers.get_project_state(controllers.target_for(request.sid), timeout=RIG_TIMEOUT)
+    emit('project_state', first_state(states))
 
 @socketio.on('get_max_status')
 def handle_get_max_status():
@@ -107,7 +618,17 @@ def handle_get_max_status():
         emit('max_status', {
             "connected": controller.connected,
             "host": controller.host,
-            "port": controller.port
+            "port": controller.port,
+            "circuit": controller.status(),
+            "ramps": ramps.status(),
+            "pacing": {name: pacer.status() for name, pacer in pacers.items()},
+            "observers": observers.status(),
+            "grammar": grammar_watcher.status(),
+            "profile": profiler.status(),
+            "beat_sync": beat_scheduler.status() if beat_scheduler else None,
+            "links": link_prober.status(),
+            "target": controllers.target_for(request.sid),
+            "endpoints": controllers.status()
         })
     except Exception as e:
         logger.exception(f"Error getting Max for Live status: {e}")
@@ -122,5 +643,15 @@ if __name__ == '__main__':
     socketio.run(app, host='0.0.0.0', port=3000, debug=True)
     
     # Clean up when the server is stopped
-    if hasattr(controller, 'close'):
-        controller.close() 
\ No newline at end of file
+    controllers.close()
+    ramps.close()
+    observers.close()
+    grammar_watcher.close()
+    profiler.close()
+    link_prober.close()
+    if beat_listener:
+        beat_listener.close()
+    if recorder:
+        recorder.close()
+    if nlp_pool:
+        nlp_pool.close() 
\ No newline at end of file
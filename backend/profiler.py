@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+import io
+import os
+import sys
+import hmac
+import time
+import pstats
+import cProfile
+import logging
+import argparse
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+def frame_label(code):
+    """Flame graph frame name: file:function (semicolons separate frames, so none inside)"""
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ",")
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for a running server, started on demand.
+
+    While a run is active a background thread wakes every `interval` seconds,
+    takes a snapshot of every other thread's Python stack through
+    sys._current_frames() and counts identical stacks. Nothing is hooked
+    into the profiled code, so the overhead is one stack walk per thread per
+    sample and nothing at all between runs. Runs stop by themselves after
+    their duration (capped at `max_duration`); the result is a set of
+    collapsed stacks ("thread;outer;...;inner count") that flamegraph.pl,
+    speedscope or inferno read as is.
+    """
+
+    def __init__(self, interval=0.01, max_duration=60.0):
+        self.interval = interval
+        self.max_duration = max_duration
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self.duration = None
+        self.threads = None
+        self.sampling_time = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=10.0, interval=None, threads=None):
+        """
+        Start sampling for `duration` seconds; `threads` optionally limits
+        sampling to threads whose name starts with that prefix
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profile is already running")
+            self.duration = min(max(float(duration), 0.0), self.max_duration)
+            if interval is not None:
+                self.interval = max(float(interval), 0.001)
+            self.threads = threads
+            self.stacks = Counter()
+            self.samples = 0
+            self.sampling_time = 0.0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+            self._thread.start()
+        logger.info(f"Sampling profiler started for {self.duration:.1f}s every {self.interval * 1000:.1f} ms")
+        return self.status()
+
+    def _run(self):
+        deadline = time.monotonic() + self.duration
+        own = threading.get_ident()
+        while True:
+            begin = time.perf_counter()
+            self._sample(own)
+            self.sampling_time += time.perf_counter() - begin
+            if time.monotonic() >= deadline or self._stop.wait(self.interval):
+                break
+        self.stopped_at = time.time()
+        logger.info(f"Sampling profiler stopped after {self.samples} samples")
+
+    def _sample(self, own):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            name = names.get(ident, f"thread-{ident}")
+            if self.threads and not name.startswith(self.threads):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(name.replace(";", ","))
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def wait(self, timeout=None):
+        """Block until the current run ends; returns True if it has"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self.running
+
+    def stop(self):
+        """End the current run early; the result stays available"""
+        self._stop.set()
+        self.wait()
+        return self.result()
+
+    def collapsed(self):
+        """Collapsed stacks, heaviest first, one "frame;frame;... count" line each"""
+        stacks = sorted(self.stacks.items(), key=lambda item: -item[1])
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks)
+
+    def result(self):
+        return dict(self.status(), collapsed=self.collapsed())
+
+    def status(self):
+        end = self.stopped_at or time.time()
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "interval_ms": self.interval * 1000,
+            "duration": self.duration,
+            "elapsed": end - self.started_at if self.started_at else None,
+            "threads": self.threads,
+            # Time the sampler itself spent walking stacks
+            "overhead_ms": self.sampling_time * 1000
+        }
+
+    def close(self):
+        self._stop.set()
+
+
+# cProfile allows one active profiler per process (Python 3.12 raises ValueError for a second)
+_profile_call_lock = threading.Lock()
+
+
+def profile_call(func, args=(), kwargs=None, sort="cumulative", limit=30):
+    """
+    Run func(*args, **kwargs) under cProfile; returns (result, report) where
+    report is the pstats table of the `limit` heaviest functions. The
+    exception, if any, is raised after profiling stops. Raises RuntimeError
+    without calling func while another call is being profiled.
+    """
+    if not _profile_call_lock.acquire(blocking=False):
+        raise RuntimeError("Another call is already being profiled")
+    try:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Some other tool holds the profiling hook
+            raise RuntimeError(f"Can't start cProfile: {e}")
+        try:
+            result = func(*args, **(kwargs or {}))
+        finally:
+            profile.disable()
+            output = io.StringIO()
+            stats = pstats.Stats(profile, stream=output)
+            stats.sort_stats(sort).print_stats(limit)
+            report = output.getvalue()
+    finally:
+        _profile_call_lock.release()
+    return result, report
+
+
+class AdminGate:
+    """
+    Access check for admin-only endpoints such as profiling: refused
+    outright unless enabled, and then only with the admin token
+    """
+
+    def __init__(self, enabled, token):
+        self.enabled = bool(enabled and token)
+        self.token = token or ""
+
+    @classmethod
+    def from_environment(cls, flag):
+        return cls(os.environ.get(flag, "").lower() in ("1", "true", "yes", "on"),
+                   os.environ.get("ABLETONML_ADMIN_TOKEN"))
+
+    def check(self, presented):
+        """None when presented is the admin token, else (message, HTTP status)"""
+        if not self.enabled:
+            return "Not enabled on this server", 404
+        if not isinstance(presented, str) or not hmac.compare_digest(presented.encode(), self.token.encode()):
+            return "Admin token required", 403
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the sampling profiler's overhead on a CPU-bound workload")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--output", help="write collapsed stacks here")
+    args = parser.parse_args()
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.simple_nlp import SimpleNLPModule
+    from core.action_mapper import ActionMapper
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+    commands = ["create a midi track with piano", "add reverb to track 2", "set tempo to 128",
+                "set reverb wet to 40", "fade reverb wet to 10 over 4 bars"]
+
+    def workload(stop, counts, index):
+        while not stop.is_set():
+            for command in commands:
+                mapper.map_to_actions(nlp.parse_command(command))
+            counts[index] += len(commands)
+
+    def run(profiler=None):
+        stop = threading.Event()
+        counts = [0] * args.threads
+        workers = [threading.Thread(target=workload, args=(stop, counts, i), name=f"worker-{i}")
+                   for i in range(args.threads)]
+        for worker in workers:
+            worker.start()
+        if profiler:
+            profiler.start(args.seconds, interval=args.interval, threads="worker-")
+        time.sleep(args.seconds)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        if profiler:
+            profiler.stop()
+        return sum(counts) / args.seconds
+
+    logging.disable(logging.INFO)
+    baseline = run()
+    profiler = SamplingProfiler()
+    sampled = run(profiler)
+    status = profiler.status()
+    print(f"Without profiler: {baseline:8.0f} commands/s")
+    print(f"With profiler:    {sampled:8.0f} commands/s (throughput change {(sampled / baseline - 1) * 100:+.1f}%), "
+          f"{status['samples']} samples, {status['stacks']} distinct stacks, "
+          f"{status['overhead_ms']:.1f} ms spent sampling")
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(profiler.collapsed())
+        print(f"Collapsed stacks written to {args.output}")
+
+    _, report = profile_call(mapper.map_to_actions, (nlp.parse_command("add reverb to track 2"),), limit=5)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+import json
+import time
+import heapq
+import logging
+import argparse
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class EncodedJSON(str):
+    """JSON text that PacketJSON splices into a packet as-is instead of encoding it again"""
+
+
+class PacketJSON:
+    """
+    json module for the Socket.IO server (SocketIO(json=PacketJSON)): event
+    arguments that are already EncodedJSON are copied into the packet, so a
+    state serialized once can be emitted to every observer without being
+    encoded per client.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if isinstance(obj, list) and any(isinstance(item, EncodedJSON) for item in obj):
+            return "[" + ",".join(item if isinstance(item, EncodedJSON) else json.dumps(item, **kwargs)
+                                  for item in obj) + "]"
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return json.loads(s, **kwargs)
+
+
+class Subscriber:
+    """
+    One observer of a room. Holds at most one unsent update: a newer update
+    replaces it (coalescing), so a slow consumer only ever gets the latest
+    state instead of an ever-growing queue of old ones.
+
+    After each send the next one waits until the client acks it (acks=True)
+    or the send's hold expires: the minimum interval for clients that don't
+    ack, the ack timeout for those that do.
+    """
+
+    def __init__(self, sid, send, acks=False):
+        self.sid = sid
+        self.send = send
+        self.acks = acks
+        self.pending = None
+        self.busy = False
+        self.awaiting = None
+        self.last_version = None
+        self.sent = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.lock = threading.Lock()
+
+    def offer(self, version, payload):
+        """Store an update; returns True when the caller must start a drain"""
+        with self.lock:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = (version, payload)
+            if self.busy:
+                return False
+            self.busy = True
+            return True
+
+    def take(self):
+        """Next update to send, or None (and no longer busy) when there is none"""
+        with self.lock:
+            item = self.pending
+            self.pending = None
+            if item is None:
+                self.busy = False
+            return item
+
+    def ack(self, version):
+        """Client confirmed an update; returns True when a drain must restart"""
+        with self.lock:
+            if self.awaiting is None or version < self.awaiting:
+                return False
+            self.awaiting = None
+            if self.pending is None:
+                self.busy = False
+                return False
+            return True
+
+    def expire(self, version):
+        """The hold on a sent update ran out; returns True when a drain must restart"""
+        with self.lock:
+            if self.awaiting != version:
+                return False
+            self.awaiting = None
+            if self.acks:
+                self.timeouts += 1
+            if self.pending is None:
+                self.busy = False
+                return False
+            return True
+
+    def status(self):
+        return {
+            "sid": self.sid,
+            "version": self.last_version,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "awaiting_ack": self.awaiting if self.acks else None
+        }
+
+
+class StateFanout:
+    """
+    Subscription rooms per Live target for project state observers (the main
+    UI, a screen-reader companion, a dashboard, ...).
+
+    Each published state is serialized exactly once, by `serialize(target,
+    state, version)`, and the same payload goes to every subscriber of the
+    room, so publishing costs one encode plus O(1) per observer. Sends run on
+    a small thread pool, one drain at a time per subscriber, so a slow
+    observer never holds up the publisher or the others.
+
+    A transport can't tell when a client has actually received a push, so
+    observers that don't ack get at most one update per `min_interval`
+    seconds, the newest at the time. Ack observers resume with the newest
+    state after `ack_timeout` seconds without an ack instead of stalling.
+    """
+
+    def __init__(self, serialize=None, workers=4, min_interval=0.05, ack_timeout=5.0):
+        self.serialize = serialize or (lambda target, state, version: json.dumps(
+            {"target": target, "version": version, "state": state}, default=str))
+        self.rooms = {}
+        self.versions = {}
+        self.latest = {}
+        self.serializations = 0
+        self.min_interval = min_interval
+        self.ack_timeout = ack_timeout
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="state-fanout")
+        # (deadline, sequence, target, subscriber, version) for every held send
+        self._holds = []
+        self._sequence = itertools.count()
+        self._holds_condition = threading.Condition()
+        self._closed = False
+        self._expiry_thread = threading.Thread(target=self._expire_holds, name="state-fanout-holds", daemon=True)
+        self._expiry_thread.start()
+
+    def subscribe(self, target, sid, send, acks=False):
+        """Join target's room; the latest state (if any) is sent right away"""
+        subscriber = Subscriber(sid, send, acks=acks)
+        with self._lock:
+            self.rooms.setdefault(target, {})[sid] = subscriber
+            latest = self.latest.get(target)
+        if latest and subscriber.offer(*latest):
+            self._executor.submit(self._drain, target, subscriber)
+        return subscriber
+
+    def unsubscribe(self, sid, target=None):
+        """Leave one room, or every room when target is None"""
+        with self._lock:
+            for name in ([target] if target is not None else list(self.rooms)):
+                room = self.rooms.get(name, {})
+                room.pop(sid, None)
+                if not room:
+                    self.rooms.pop(name, None)
+
+    def subscribers(self, target):
+        with self._lock:
+            return list(self.rooms.get(target, {}).values())
+
+    def publish(self, target, state):
+        """Serialize state once and hand it to every subscriber of target; returns its version"""
+        with self._lock:
+            version = self.versions.get(target, 0) + 1
+            self.versions[target] = version
+            room = list(self.rooms.get(target, {}).values())
+        payload = self.serialize(target, state, version)
+        with self._lock:
+            self.serializations += 1
+            # Publishers may race; keep the newest as the state for late joiners
+            if self.latest.get(target, (0, None))[0] < version:
+                self.latest[target] = (version, payload)
+        for subscriber in room:
+            if subscriber.offer(version, payload):
+                self._executor.submit(self._drain, target, subscriber)
+        return version
+
+    def ack(self, target, sid, version):
+        """Record a client's acknowledgement of an update sent with acks=True"""
+        with self._lock:
+            subscriber = self.rooms.get(target, {}).get(sid)
+        if subscriber and subscriber.ack(version):
+            self._executor.submit(self._drain, target, subscriber)
+
+    def _drain(self, target, subscriber):
+        while True:
+            item = subscriber.take()
+            if item is None:
+                return
+            version, payload = item
+            if subscriber.last_version is not None and version < subscriber.last_version:
+                # An older publish lost the race with a newer one; don't go backwards
+                continue
+            hold = self.ack_timeout if subscriber.acks else self.min_interval
+            if hold > 0:
+                with subscriber.lock:
+                    subscriber.awaiting = version
+            try:
+                subscriber.send(payload)
+            except Exception as e:
+                subscriber.errors += 1
+                logger.warning(f"Dropping state observer {subscriber.sid} of {target}: {e}")
+                self.unsubscribe(subscriber.sid, target)
+                return
+            subscriber.sent += 1
+            subscriber.last_version = version
+            if hold > 0:
+                # busy stays set until ack() or the hold's expiry restarts the drain
+                self._hold(hold, target, subscriber, version)
+                return
+
+    def _hold(self, delay, target, subscriber, version):
+        with self._holds_condition:
+            heapq.heappush(self._holds, (time.monotonic() + delay, next(self._sequence), target, subscriber, version))
+            self._holds_condition.notify()
+
+    def _expire_holds(self):
+        while True:
+            with self._holds_condition:
+                while not self._closed and (not self._holds or self._holds[0][0] > time.monotonic()):
+                    self._holds_condition.wait(self._holds[0][0] - time.monotonic() if self._holds else None)
+                if self._closed:
+                    return
+                _, _, target, subscriber, version = heapq.heappop(self._holds)
+            if subscriber.acks and subscriber.awaiting == version:
+                logger.info(f"State observer {subscriber.sid} of {target} didn't ack version {version} "
+                            f"within {self.ack_timeout}s; sending the newest state")
+            if subscriber.expire(version):
+                with self._lock:
+                    subscribed = self.rooms.get(target, {}).get(subscriber.sid) is subscriber
+                if subscribed:
+                    self._executor.submit(self._drain, target, subscriber)
+
+    def status(self):
+        with self._lock:
+            rooms = {target: list(room.values()) for target, room in self.rooms.items()}
+            versions = dict(self.versions)
+            serializations = self.serializations
+        return {
+            "serializations": serializations,
+            "rooms": {target: {"version": versions.get(target), "subscribers": [s.status() for s in room]}
+                      for target, room in rooms.items()}
+        }
+
+    def close(self):
+        with self._holds_condition:
+            self._closed = True
+            self._holds_condition.notify()
+        self._executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark state fan-out to many observers")
+    parser.add_argument("--observers", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--tracks", type=int, default=64)
+    args = parser.parse_args()
+
+    state = {"tempo": 120, "tracks": [{"name": f"Track {i}", "type": "midi",
+                                        "devices": [{"name": "reverb", "parameters": {"wet": 30, "decay": 2.5}}]}
+                                       for i in range(args.tracks)]}
+
+    for observers in args.observers:
+        # Per-client encoding, as emitting to each sid separately would do
+        received = [0]
+        start = time.perf_counter()
+        for version in range(args.updates):
+            for _ in range(observers):
+                received[0] += len(json.dumps({"target": "default", "version": version, "state": state}))
+        per_client = (time.perf_counter() - start) / args.updates
+
+        fanout = StateFanout()
+        counts = [0]
+        counts_lock = threading.Lock()
+
+        def send(payload):
+            with counts_lock:
+                counts[0] += 1
+
+        for sid in range(observers):
+            fanout.subscribe("default", sid, send)
+        start = time.perf_counter()
+        for _ in range(args.updates):
+            fanout.publish("default", state)
+        publish = (time.perf_counter() - start) / args.updates
+        while not all(s.last_version == args.updates for s in fanout.subscribers("default")):
+            time.sleep(0.001)
+        fanout.close()
+        print(f"{observers:5d} observers: per-client encode {per_client * 1000:7.2f} ms/update, "
+              f"fan-out publish {publish * 1000:6.3f} ms/update, {counts[0]} sends "
+              f"({observers * args.updates - counts[0]} coalesced)")
+
+
+if __name__ == "__main__":
+    main()
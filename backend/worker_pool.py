@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+import sys
+import os
+import gc
+import time
+import zlib
+import logging
+import argparse
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(worker_id, nlp, requests, results):
+    """Parse commands until told to stop"""
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, command = item
+        if request_id is None:
+            # A reloaded grammar, sent to every worker by update_grammar()
+            nlp.use_grammar(command)
+            continue
+        try:
+            results.send((request_id, worker_id, nlp.parse_command(command), None))
+        except Exception as e:
+            results.send((request_id, worker_id, None, str(e)))
+
+
+def read_memory(pid):
+    """
+    Return RSS, PSS and private memory of a process in kB from
+    /proc/<pid>/smaps_rollup, or None where that is unavailable
+    """
+    fields = {"Rss": "rss_kb", "Pss": "pss_kb", "Private_Clean": "private_kb", "Private_Dirty": "private_kb"}
+    memory = {"rss_kb": None, "pss_kb": None, "private_kb": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    name = fields[key]
+                    memory[name] = (memory[name] or 0) + int(value.split()[0])
+    except OSError:
+        pass
+    return memory
+
+
+class PreforkNLPPool:
+    """
+    Fork N parser workers after the NLP model is loaded in this process.
+
+    The workers inherit the warm spaCy model copy-on-write instead of each
+    calling spacy.load, so memory stays near one model's worth while parsing
+    runs on N cores. Commands from one session always go to the same worker,
+    which handles them in order. Mapping stays in the parent, where the
+    track index and catalog are kept current.
+
+    Each worker answers on its own pipe, so one that dies mid-answer can't
+    leave a shared lock held. A watchdog checks the workers every
+    `check_interval` seconds: when one has died, the commands queued to it
+    fail and a fresh worker is forked in its place. parse() waits at most
+    `timeout` seconds and parses in this process when the worker died, hung
+    or failed; a worker that hung is killed and replaced the same way.
+    """
+
+    def __init__(self, nlp, workers=None, timeout=5.0, check_interval=0.5):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("PreforkNLPPool needs a platform with fork()")
+
+        self.nlp = nlp
+        self.size = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.restarts = 0
+        self.fallbacks = 0
+        self._context = multiprocessing.get_context("fork")
+
+        self._requests = [None] * self.size
+        self._results = [None] * self.size
+        self._processes = [None] * self.size
+        self._generations = [0] * self.size
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._next_id = 0
+        self._completed = [0] * self.size
+        self._started = time.perf_counter()
+        self._closed = threading.Event()
+
+        # Move everything loaded so far out of the GC's reach so collections in
+        # the children don't touch (and copy) the pages holding the model
+        gc.collect()
+        gc.freeze()
+
+        for worker_id in range(self.size):
+            self._spawn(worker_id)
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        self._watchdog = threading.Thread(target=self._watch, daemon=True, name="nlp-pool-watchdog")
+        self._watchdog.start()
+        logger.debug(f"Started {self.size} NLP workers: {[p.pid for p in self._processes]}")
+
+    def _spawn(self, worker_id):
+        """Fork a worker with its own request queue and result pipe"""
+        requests = self._context.SimpleQueue()
+        results, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self.nlp, requests, sender),
+            daemon=True
+        )
+        process.start()
+        # Only the worker writes to its pipe, so the pipe reads EOF once it exits
+        sender.close()
+        self._requests[worker_id] = requests
+        self._results[worker_id] = results
+        self._processes[worker_id] = process
+
+    def worker_for(self, session_id):
+        """Pick the worker for a session so its commands stay in order"""
+        return zlib.crc32(str(session_id).encode("utf-8")) % self.size
+
+    def submit(self, session_id, command):
+        """
+        Queue a command and return a Future resolving to the parsed command
+        """
+        future = Future()
+        worker_id = self.worker_for(session_id)
+        with self._pending_lock:
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = (future, worker_id, self._generations[worker_id])
+            requests = self._requests[worker_id]
+        requests.put((request_id, command))
+        return future
+
+    def update_grammar(self, grammar):
+        """
+        Send a reloaded grammar to every worker; each swaps it in between
+        two commands, so commands already queued before it keep the old one
+        """
+        for requests in self._requests:
+            requests.put((None, grammar))
+
+    def parse(self, session_id, command, timeout=None):
+        return self.result(self.submit(session_id, command), command, timeout)
+
+    def result(self, future, command, timeout=None):
+        """
+        Wait for a submitted command's parse. If its worker died, didn't answer
+        within the timeout or failed, the command is parsed in this process.
+        """
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            self.fallbacks += 1
+            self._kill_stuck(future)
+            logger.warning(f"NLP worker didn't parse {command!r} in time; parsing in process")
+            return self.nlp.parse_command(command)
+        except Exception as e:
+            self.fallbacks += 1
+            logger.warning(f"NLP worker failed to parse {command!r} ({str(e) or type(e).__name__}); parsing in process")
+            return self.nlp.parse_command(command)
+
+    def _collect(self):
+        while True:
+            # Re-read the pipes each round: the watchdog swaps in new workers'
+            open_pipes = [results for results in self._results if results is not None and not results.closed]
+            if self._closed.is_set() and not open_pipes:
+                break
+            for results in wait(open_pipes, timeout=0.1):
+                try:
+                    request_id, worker_id, parsed_command, error = results.recv()
+                except (EOFError, OSError):
+                    # The worker exited; the watchdog deals with what it left pending
+                    results.close()
+                    continue
+                self._completed[worker_id] += 1
+                with self._pending_lock:
+                    future, _, _ = self._pending.pop(request_id, (None, None, None))
+                if future is None:
+                    continue
+                if error is not None:
+                    future.set_exception(RuntimeError(error))
+                else:
+                    future.set_result(parsed_command)
+
+    def _watch(self):
+        while not self._closed.wait(self.check_interval):
+            for worker_id, process in enumerate(self._processes):
+                if not process.is_alive() and not self._closed.is_set():
+                    self._replace(worker_id, process)
+
+    def _kill_stuck(self, future):
+        """Kill the worker still holding a timed-out command and fork a new one"""
+        with self._pending_lock:
+            entry = next(((worker, generation) for pending, worker, generation in self._pending.values()
+                          if pending is future), None)
+            if entry is None or entry[1] != self._generations[entry[0]]:
+                # Answered meanwhile, or its worker was already replaced
+                return
+            process = self._processes[entry[0]]
+        logger.warning(f"NLP worker {entry[0]} (pid {process.pid}) is stuck; killing it")
+        process.kill()
+        process.join(timeout=1)
+        self._replace(entry[0], process)
+
+    def _replace(self, worker_id, process):
+        """Fork a new worker for a dead one and fail what was queued to the old one"""
+        with self._pending_lock:
+            if self._processes[worker_id] is not process:
+                # The watchdog and a timed-out parse both saw it die
+                return
+            logger.warning(f"NLP worker {worker_id} (pid {process.pid}) exited with code {process.exitcode}; "
+                           "restarting")
+            # Requests submitted from here on go to the new worker's queue
+            generation = self._generations[worker_id]
+            self._generations[worker_id] += 1
+            self._spawn(worker_id)
+            lost = [(request_id, future) for request_id, (future, worker, submitted) in self._pending.items()
+                    if worker == worker_id and submitted == generation]
+            for request_id, _ in lost:
+                del self._pending[request_id]
+        self.restarts += 1
+        for _, future in lost:
+            future.set_exception(RuntimeError(f"NLP worker {worker_id} exited with code {process.exitcode}"))
+
+    def stats(self):
+        """Per-worker memory and throughput since the pool started"""
+        elapsed = time.perf_counter() - self._started
+        workers = []
+        for worker_id, process in enumerate(self._processes):
+            worker = {
+                "worker": worker_id,
+                "pid": process.pid,
+                "alive": process.is_alive(),
+                "completed": self._completed[worker_id],
+                "commands_per_s": self._completed[worker_id] / elapsed if elapsed else 0.0
+            }
+            worker.update(read_memory(process.pid))
+            workers.append(worker)
+
+        parent = {"pid": os.getpid()}
+        parent.update(read_memory(os.getpid()))
+        return {
+            "workers": workers,
+            "parent": parent,
+            "restarts": self.restarts,
+            "fallbacks": self.fallbacks,
+            "total_completed": sum(self._completed),
+            "total_commands_per_s": sum(self._completed) / elapsed if elapsed else 0.0
+        }
+
+    def close(self):
+        self._closed.set()
+        for requests in self._requests:
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+        self._collector.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pre-forked NLP workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--simple", action="store_true", help="use SimpleNLPModule instead of spaCy")
+    args = parser.parse_args()
+
+    # Add parent directory to path so we can import our modules
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if args.simple:
+        from core.simple_nlp import SimpleNLPModule
+        nlp = SimpleNLPModule()
+    else:
+        from core.nlp import NLPModule
+        nlp = NLPModule()
+
+    commands = ["set tempo to 120", "create midi track with piano", "add reverb to track 2",
+                "set reverb wet to 30%", "add delay to track 1"]
+
+    for workers in args.workers:
+        pool = PreforkNLPPool(nlp, workers=workers)
+        start = time.perf_counter()
+        futures = [pool.submit(f"session-{i % args.sessions}", commands[i % len(commands)])
+                   for i in range(args.commands)]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+
+        stats = pool.stats()
+        pss = sum(w["pss_kb"] or 0 for w in stats["workers"]) + (stats["parent"]["pss_kb"] or 0)
+        print(f"{workers} workers: {args.commands / elapsed:8.0f} commands/s, "
+              f"total PSS {pss / 1024:.1f} MB, parent RSS {(stats['parent']['rss_kb'] or 0) / 1024:.1f} MB")
+        for worker in stats["workers"]:
+            print(f"    worker {worker['worker']} (pid {worker['pid']}): {worker['completed']} commands, "
+                  f"RSS {(worker['rss_kb'] or 0) / 1024:.1f} MB, private {(worker['private_kb'] or 0) / 1024:.1f} MB")
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
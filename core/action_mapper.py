@@ -1,12 +1,32 @@
+from core.grammar import get_grammar
+
+
 class ActionMapper:
-    def __init__(self):
+    def __init__(self, catalog=None, track_index=None, grammar=None):
+        # Value ranges come from the compiled grammar (core/grammar.json)
+        self.grammar = grammar or get_grammar()
+        # Optional BrowserCatalog used to pick the exact browser item to load
+        self.catalog = catalog
+        # Optional TrackNameIndex for commands that name a track ("to the drums")
+        self.track_index = track_index
+        
         self.valid_actions = {
             "create": self._map_create_action,
             "set": self._map_set_action,
             "add_effect": self._map_add_effect_action,
-            "set_effect_param": self._map_set_effect_param_action
+            "set_effect_param": self._map_set_effect_param_action,
+            "add_pattern": self._map_add_pattern_action,
+            "import_midi": self._map_import_midi_action,
+            "ramp": self._map_ramp_action,
+            "launch": self._map_launch_action,
+            "start_playing": self._map_start_playing_action,
+            "stop_playing": self._map_stop_playing_action
         }
     
+    def use_grammar(self, grammar):
+        """Swap in a new grammar; mappings already running keep the one they started with"""
+        self.grammar = grammar
+    
     def map_to_actions(self, parsed_command):
         """
         Convert parsed NLP command into a sequence of API actions
@@ -17,9 +37,10 @@ class ActionMapper:
         if intent not in self.valid_actions:
             return None
             
-        return self.valid_actions[intent](parameters)
+        # Read once and pass along, so a reload mid-mapping can't mix grammars
+        return self.valid_actions[intent](parameters, self.grammar)
     
-    def _map_create_action(self, parameters):
+    def _map_create_action(self, parameters, grammar):
         """Map track creation commands to API actions"""
         actions = []
         
@@ -34,23 +55,27 @@ class ActionMapper:
         })
         
         if instrument:
+            params = {
+                "instrument": instrument
+            }
+            item = self._resolve_browser_item(parameters.get("item_query") or instrument, "instrument")
+            if item:
+                params["browser_item"] = item
             actions.append({
                 "action": "add_instrument",
-                "params": {
-                    "instrument": instrument
-                }
+                "params": params
             })
             
         return actions
     
-    def _map_set_action(self, parameters):
+    def _map_set_action(self, parameters, grammar):
         """Map setting commands to API actions"""
         actions = []
         
         if "tempo" in parameters:
             # Validate tempo range (20-999 BPM)
             tempo_value = parameters["tempo"]
-            if 20 <= tempo_value <= 999:
+            if grammar.is_valid("tempo", tempo_value):
                 actions.append({
                     "action": "set_tempo",
                     "params": {
@@ -60,29 +85,51 @@ class ActionMapper:
             
         return actions
     
-    def _map_add_effect_action(self, parameters):
+    def _map_add_effect_action(self, parameters, grammar):
         """Map effect addition commands to API actions"""
         actions = []
         
-        if "effect" in parameters and "track_number" in parameters:
-            actions.append({
-                "action": "add_effect",
-                "params": {
-                    "effect_type": parameters["effect"],
-                    "track": parameters["track_number"]
-                }
-            })
+        if "effect" not in parameters:
+            return actions
+        
+        item = self._resolve_browser_item(parameters.get("item_query") or parameters["effect"], "effect")
+        
+        if "track_number" not in parameters and "track_name" in parameters and self.track_index is not None:
+            track_number = self.track_index.resolve(parameters["track_name"])
+            if track_number is None:
+                return actions
+            parameters = dict(parameters, track_number=track_number)
+        
+        if "track_number" in parameters:
+            params = {
+                "effect_type": parameters["effect"],
+                "track": parameters["track_number"]
+            }
+        elif item:
+            # A resolved browser item without a track goes on the selected track
+            params = {
+                "effect_type": parameters["effect"]
+            }
+        else:
+            return actions
+        
+        if item:
+            params["browser_item"] = item
+        actions.append({
+            "action": "add_effect",
+            "params": params
+        })
             
         return actions
     
-    def _map_set_effect_param_action(self, parameters):
+    def _map_set_effect_param_action(self, parameters, grammar):
         """Map effect parameter setting commands to API actions"""
         actions = []
         
         if "effect" in parameters and "parameter" in parameters and "value" in parameters:
             # Validate value range (0-100 for percentages)
             value = parameters["value"]
-            if 0 <= value <= 100:
+            if grammar.is_valid("value", value):
                 actions.append({
                     "action": "set_effect_param",
                     "params": {
@@ -92,4 +139,189 @@ class ActionMapper:
                     }
                 })
             
-        return actions 
\ No newline at end of file
+        return actions
+    
+    def _map_add_pattern_action(self, parameters, grammar):
+        """Map generated pattern commands to a single clip-writing action"""
+        actions = []
+        
+        if "pattern" not in parameters:
+            return actions
+        
+        bars = parameters.get("bars", 4)
+        if not grammar.is_valid("bars", bars):
+            return actions
+        
+        params = {
+            "pattern": parameters["pattern"],
+            "bars": bars
+        }
+        if parameters["pattern"] == "arpeggio":
+            params["root"] = parameters.get("root", "c")
+            params["scale"] = parameters.get("scale", "minor")
+        
+        # Without a track the pattern goes into the selected track
+        if "track_number" not in parameters and "track_name" in parameters and self.track_index is not None:
+            track_number = self.track_index.resolve(parameters["track_name"])
+            if track_number is None:
+                return actions
+            params["track"] = track_number
+        elif "track_number" in parameters:
+            params["track"] = parameters["track_number"]
+        
+        # ClipWritingController (core/clip_writer.py) renders the notes and writes
+        # them in packed datagrams, so the action stays small and serializable
+        actions.append({
+            "action": "add_pattern",
+            "params": params
+        })
+        
+        return actions
+    
+    def _map_ramp_action(self, parameters, grammar):
+        """Map fades and ramps to a single ramp action run by the controller's ramp scheduler"""
+        actions = []
+        
+        if "value" not in parameters or "duration" not in parameters:
+            return actions
+        
+        if parameters.get("tempo"):
+            slot = "tempo"
+            params = {
+                "target": "tempo"
+            }
+        elif "effect" in parameters and "parameter" in parameters:
+            slot = "value"
+            params = {
+                "target": "effect_param",
+                "effect": parameters["effect"],
+                "parameter": parameters["parameter"]
+            }
+        else:
+            return actions
+        
+        # Both ends of the ramp must be valid values for the parameter
+        ends = [parameters["value"]] + ([parameters["from_value"]] if "from_value" in parameters else [])
+        if not all(grammar.is_valid(slot, value) for value in ends):
+            return actions
+        if not grammar.is_valid("duration", parameters["duration"]):
+            return actions
+        
+        if "from_value" in parameters:
+            params["from"] = parameters["from_value"]
+        params.update({
+            "to": parameters["value"],
+            "duration": parameters["duration"],
+            "unit": parameters.get("unit", "beats"),
+            "curve": parameters.get("curve", "linear")
+        })
+        actions.append({
+            "action": "ramp",
+            "params": params
+        })
+        
+        return actions
+    
+    def _map_import_midi_action(self, parameters, grammar):
+        """Map MIDI file import commands to API actions"""
+        actions = []
+        
+        if "file" not in parameters:
+            return actions
+        
+        # The controller streams the file into a clip (core/midi_import.py);
+        # without a track it goes into the selected track
+        params = {
+            "file": parameters["file"]
+        }
+        if "track_number" not in parameters and "track_name" in parameters and self.track_index is not None:
+            track_number = self.track_index.resolve(parameters["track_name"])
+            if track_number is None:
+                return actions
+            params["track"] = track_number
+        elif "track_number" in parameters:
+            params["track"] = parameters["track_number"]
+        actions.append({
+            "action": "import_midi",
+            "params": params
+        })
+        
+        return actions
+    
+    def _map_launch_action(self, parameters, grammar):
+        """Map scene and clip launches, optionally held for a beat or bar boundary"""
+        actions = []
+        
+        if "scene_number" in parameters:
+            if not grammar.is_valid("scene_number", parameters["scene_number"]):
+                return actions
+            action = {
+                "action": "launch_scene",
+                "params": {
+                    "scene": parameters["scene_number"]
+                }
+            }
+        elif "clip_number" in parameters and "track_number" in parameters:
+            if not (grammar.is_valid("clip_number", parameters["clip_number"]) and
+                    grammar.is_valid("track_number", parameters["track_number"])):
+                return actions
+            action = {
+                "action": "launch_clip",
+                "params": {
+                    "track": parameters["track_number"],
+                    "clip": parameters["clip_number"]
+                }
+            }
+        else:
+            return actions
+        
+        if not self._add_timing(action["params"], parameters, grammar):
+            return actions
+        actions.append(action)
+        
+        return actions
+    
+    def _map_start_playing_action(self, parameters, grammar):
+        """Map "start playback on the next bar" to a transport action"""
+        params = {}
+        if not self._add_timing(params, parameters, grammar):
+            return []
+        return [{"action": "start_playing", "params": params}]
+    
+    def _map_stop_playing_action(self, parameters, grammar):
+        """Map "stop on the next bar" to a transport action"""
+        params = {}
+        if not self._add_timing(params, parameters, grammar):
+            return []
+        return [{"action": "stop_playing", "params": params}]
+    
+    def _add_timing(self, params, parameters, grammar):
+        """
+        Copy "on the next bar" / "in 2 beats" timing for the beat scheduler
+        (core/beat_sync.py); without it the action is sent at once. Returns
+        False for timing out of range.
+        """
+        if not parameters.get("quantize"):
+            return True
+        wait = parameters.get("wait", 1)
+        if parameters.get("unit") not in ("bars", "beats") or not grammar.is_valid("wait", wait):
+            return False
+        params.update({
+            "quantize": parameters["quantize"],
+            "unit": parameters["unit"],
+            "wait": wait
+        })
+        return True
+    
+    def _resolve_browser_item(self, query, kind):
+        """Look up the browser item for a device name, if a catalog is configured"""
+        if self.catalog is None:
+            return None
+        item = self.catalog.resolve(query, kind=kind)
+        if item is None:
+            return None
+        return {
+            "name": item["name"],
+            "path": item["path"],
+            "uri": item["uri"]
+        }
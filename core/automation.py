@@ -0,0 +1,415 @@
+import time
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Updates per second for one ramp, and for all ramps together
+DEFAULT_RATE = 30.0
+DEFAULT_MAX_RATE = 200.0
+
+CURVES = {
+    "linear": lambda t: t,
+    # Slow start, fast finish; and its mirror image
+    "exponential": lambda t: np.expm1(4.0 * t) / np.expm1(4.0),
+    "logarithmic": lambda t: np.log1p(np.expm1(4.0) * t) / 4.0,
+    "smooth": lambda t: t * t * (3.0 - 2.0 * t)
+}
+
+
+def duration_seconds(duration, unit, tempo):
+    """Convert a ramp length in bars, beats or seconds to seconds at `tempo`"""
+    if unit == "seconds":
+        return float(duration)
+    beats = duration * 4 if unit == "bars" else duration
+    return beats * 60.0 / tempo
+
+
+def extract_ramp_parameters(words, grammar):
+    """
+    Pull the target, start and end values, length and curve out of the
+    normalized words of a "fade ..." / "ramp ..." command
+    """
+    parameters = {}
+    effects = grammar.values("effect")
+    effect_parameters = grammar.values("parameter")
+    for i, word in enumerate(words):
+        if word in effects:
+            parameters["effect"] = word
+        if word in effect_parameters:
+            parameters["parameter"] = word
+        if word == "tempo":
+            parameters["tempo"] = True
+        if word in grammar.values("curve"):
+            parameters["curve"] = word
+        if word in ("from", "to", "over") and i + 1 < len(words):
+            try:
+                value = float(words[i + 1].replace("%", ""))
+            except ValueError:
+                continue
+            if word == "over":
+                if i + 2 < len(words) and words[i + 2] in grammar.values("unit"):
+                    parameters["duration"] = value
+                    parameters["unit"] = words[i + 2]
+            else:
+                parameters["from_value" if word == "from" else "value"] = value
+    return parameters
+
+
+class Ramp:
+    """
+    One parameter moving from start to end over duration seconds.
+
+    All intermediate values are interpolated up front as one array; the
+    scheduler only indexes into it by time, so a ramp that falls behind jumps
+    to the current value instead of replaying the ones it missed.
+    """
+
+    def __init__(self, key, make_action, start, end, duration, curve="linear",
+                 rate=DEFAULT_RATE, resolution=None, started_at=None):
+        if curve not in CURVES:
+            raise ValueError(f"Unknown ramp curve: {curve}")
+        self.key = key
+        self.make_action = make_action
+        self.start = float(start)
+        self.end = float(end)
+        self.curve = curve
+        self.started_at = time.monotonic() if started_at is None else started_at
+
+        steps = max(2, int(np.ceil(duration * rate)) + 1)
+        t = np.linspace(0.0, 1.0, steps)
+        values = self.start + (self.end - self.start) * CURVES[curve](t)
+        times = self.started_at + t * duration
+        if resolution:
+            # Drop steps that round to the value already sent
+            values = np.round(values / resolution) * resolution
+            values[0], values[-1] = self.start, self.end
+            keep = np.ones(len(values), dtype=bool)
+            keep[1:] = values[1:] != values[:-1]
+            values, times = values[keep], times[keep]
+        self.values = values
+        self.times = times
+
+        self.sent = -1
+        self.cancelled = False
+        self.send = None
+        self.lane = key
+
+    @property
+    def finished(self):
+        return self.cancelled or self.sent == len(self.values) - 1
+
+    @property
+    def current_value(self):
+        """Last value sent (or the start value if nothing was sent yet)"""
+        return float(self.values[self.sent]) if self.sent >= 0 else self.start
+
+    def due_index(self, now):
+        return int(np.searchsorted(self.times, now, side="right")) - 1
+
+    def next_due(self):
+        return float(self.times[min(self.sent + 1, len(self.times) - 1)])
+
+
+class RampScheduler:
+    """
+    Run any number of ramps on one thread.
+
+    Ramps wait in a heap keyed on their next update time. Starting a ramp on
+    a parameter that is already ramping replaces the old ramp, continuing
+    from where it got to. Sends across all ramps are capped at max_rate per
+    second; ramps held back by the cap skip ahead rather than queue, so the
+    link to Live never sees a burst.
+
+    Updates are sent on a small pool, one at a time per lane (a rig). While
+    a lane's send is still running its ramps wait and then jump to their
+    current value, so a hung rig only stalls its own fades.
+    """
+
+    def __init__(self, max_rate=DEFAULT_MAX_RATE, send_workers=16):
+        self.min_interval = 1.0 / max_rate
+        self.active = {}
+        self.sent_updates = 0
+        self.skipped_updates = 0
+        self.failed_updates = 0
+
+        self._heap = []
+        self._counter = 0
+        self._next_send = 0.0
+        self._sending = set()
+        self._waiting = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=send_workers, thread_name_prefix="ramp-send")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ramp-scheduler")
+        self._thread.start()
+
+    def start(self, ramp, send, lane=None):
+        """
+        Schedule ramp, sending each update with send(action); replaces any
+        ramp already running on the same key. Ramps on the same lane (by
+        default the ramp's key) never send concurrently.
+        """
+        with self._condition:
+            previous = self.active.get(ramp.key)
+            if previous is not None:
+                previous.cancelled = True
+                logger.debug(f"Ramp on {ramp.key} replaced at {previous.current_value:.2f}")
+            self.active[ramp.key] = ramp
+            ramp.send = send
+            if lane is not None:
+                ramp.lane = lane
+            self._push(ramp, ramp.times[0])
+            self._condition.notify_all()
+
+    def cancel(self, key):
+        """
+        Stop the ramp on key, if any; returns the value it had reached. Waits
+        for an update already being sent on its lane, so a set that follows
+        can't be overtaken by it.
+        """
+        with self._condition:
+            ramp = self.active.pop(key, None)
+            if ramp is None:
+                return None
+            ramp.cancelled = True
+            while ramp.lane in self._sending and not self._closed:
+                self._condition.wait()
+            return ramp.current_value
+
+    def current_value(self, key):
+        ramp = self.active.get(key)
+        return ramp.current_value if ramp is not None else None
+
+    def _push(self, ramp, due):
+        self._counter += 1
+        heapq.heappush(self._heap, (due, self._counter, ramp))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+                now = time.monotonic()
+                _, _, ramp = heapq.heappop(self._heap)
+                if ramp.cancelled:
+                    continue
+                if ramp.lane in self._sending:
+                    # The rig is still busy with an earlier update: resume once it answers
+                    self._waiting.setdefault(ramp.lane, []).append(ramp)
+                    continue
+                if now < self._next_send:
+                    # Over the global rate: try again when there is room
+                    self._push(ramp, self._next_send)
+                    continue
+                index = ramp.due_index(now)
+                self.skipped_updates += max(0, index - ramp.sent - 1)
+                ramp.sent = index
+                value = float(ramp.values[index])
+                self._next_send = now + self.min_interval
+                if ramp.finished:
+                    if self.active.get(ramp.key) is ramp:
+                        del self.active[ramp.key]
+                else:
+                    self._push(ramp, ramp.next_due())
+                self._sending.add(ramp.lane)
+
+            # Send off this thread so a slow controller delays neither other rigs nor start()/cancel()
+            try:
+                self._pool.submit(self._send, ramp, value)
+            except RuntimeError:
+                # Shut down by close()
+                return
+
+    def _send(self, ramp, value):
+        # Cancelled since it was picked: the set that cancelled it must have the last word
+        sent = not ramp.cancelled
+        try:
+            ok = ramp.send(ramp.make_action(value)) if sent else None
+        except Exception as e:
+            logger.warning(f"Ramp update on {ramp.key} failed: {e}")
+            ok = False
+        with self._condition:
+            self.sent_updates += sent
+            if ok is False:
+                self.failed_updates += 1
+            self._sending.discard(ramp.lane)
+            now = time.monotonic()
+            for waiting in self._waiting.pop(ramp.lane, []):
+                self._push(waiting, now)
+            self._condition.notify_all()
+
+    def status(self):
+        return {
+            "active": len(self.active),
+            "sent_updates": self.sent_updates,
+            "skipped_updates": self.skipped_updates,
+            "failed_updates": self.failed_updates,
+            "sending": len(self._sending)
+        }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=1)
+        self._pool.shutdown(wait=False)
+
+
+def _parameter_key(action_type, params):
+    """Name the parameter a ramp or set action moves: "tempo" or "param:<effect>:<parameter>" """
+    if action_type == "set_tempo" or params.get("target") == "tempo":
+        return "tempo"
+    if params.get("effect") is not None and params.get("parameter") is not None:
+        return f"param:{params['effect']}:{params['parameter']}"
+    return None
+
+
+def _setter(target):
+    """Build the set action for one ramp step"""
+    if target == "tempo":
+        return lambda value: {"action": "set_tempo", "params": {"value": value}}
+    _, effect, parameter = target.split(":", 2)
+    return lambda value: {
+        "action": "set_effect_param",
+        "params": {"effect": effect, "parameter": parameter, "value": value}
+    }
+
+
+class RampingController:
+    """
+    Controller wrapper that runs "ramp" actions on a shared RampScheduler and
+    passes everything else through. A direct set_tempo / set_effect_param
+    cancels a ramp running on the same parameter.
+    """
+
+    def __init__(self, controller, scheduler=None, rate=DEFAULT_RATE):
+        self.controller = controller
+        self.owns_scheduler = scheduler is None
+        self.scheduler = scheduler or RampScheduler()
+        self.rate = rate
+        # Last value we set per parameter, for ramps without a "from"
+        self.values = {}
+
+    @property
+    def host(self):
+        return getattr(self.controller, "host", None)
+
+    @property
+    def port(self):
+        return getattr(self.controller, "port", None)
+
+    @property
+    def connected(self):
+        return getattr(self.controller, "connected", True)
+
+    @property
+    def available(self):
+        return getattr(self.controller, "available", True)
+
+    def _key(self, target):
+        # Ramps of different rigs sharing one scheduler must not replace each other
+        return (id(self), target)
+
+    def execute_action(self, action):
+        params = action.get("params", {})
+        if action.get("action") == "ramp":
+            return self._start_ramp(params)
+
+        if action.get("action") in ("set_tempo", "set_effect_param"):
+            target = _parameter_key(action["action"], params)
+            self.scheduler.cancel(self._key(target))
+            result = self.controller.execute_action(action)
+            if result is not False:
+                self.values[target] = params.get("value")
+            return result
+
+        if action.get("action") == "batch":
+            # Sets inside a macro batch cancel ramps just like direct ones
+            sets = [(_parameter_key(inner["action"], inner.get("params", {})), inner.get("params", {}).get("value"))
+                    for inner in params.get("actions", []) if inner.get("action") in ("set_tempo", "set_effect_param")]
+            for target, _ in sets:
+                self.scheduler.cancel(self._key(target))
+            result = self.controller.execute_action(action)
+            if result is not False:
+                for target, value in sets:
+                    self.values[target] = value
+            return result
+
+        return self.controller.execute_action(action)
+
+    def _start_ramp(self, params):
+        target = _parameter_key("ramp", params)
+        if target is None:
+            logger.warning(f"Ramp without a target: {params}")
+            return False
+
+        state = None
+        start = params.get("from")
+        if start is None:
+            start = self.scheduler.current_value(self._key(target))
+        if start is None:
+            start = self.values.get(target)
+        if start is None:
+            state = self.controller.get_project_state() or {}
+            start = self._state_value(state, target)
+        if start is None:
+            logger.warning(f"Don't know where {target} is; can't ramp it without a start value")
+            return False
+
+        tempo = self.values.get("tempo")
+        if tempo is None and params.get("unit", "beats") != "seconds":
+            state = state if state is not None else (self.controller.get_project_state() or {})
+            tempo = state.get("tempo", 120)
+        duration = duration_seconds(params.get("duration", 0), params.get("unit", "beats"), tempo or 120)
+
+        def send(update):
+            result = self.controller.execute_action(update)
+            if result is not False:
+                self.values[target] = update["params"]["value"]
+            return result
+
+        # Tempo only moves in whole BPM steps worth sending; parameters in 0.5% steps
+        ramp = Ramp(self._key(target), _setter(target), start, params["to"], duration,
+                    curve=params.get("curve", "linear"), rate=self.rate,
+                    resolution=1.0 if target == "tempo" else 0.5)
+        self.scheduler.start(ramp, send, lane=id(self))
+        logger.debug(f"Ramping {target} from {start} to {params['to']} over {duration:.2f}s")
+        return True
+
+    def _state_value(self, state, target):
+        if target == "tempo":
+            return state.get("tempo")
+        _, effect, parameter = target.split(":", 2)
+        for track in state.get("tracks", []):
+            for device in track.get("devices", []):
+                if device.get("name") == effect and parameter in device.get("parameters", {}):
+                    return device["parameters"][parameter]
+        return None
+
+    def get_project_state(self):
+        return self.controller.get_project_state()
+
+    def add_state_listener(self, callback):
+        """Forward to the wrapped controller; False when it can't push state changes"""
+        if hasattr(self.controller, "add_state_listener"):
+            return self.controller.add_state_listener(callback)
+        return False
+
+    def status(self):
+        return self.controller.status() if hasattr(self.controller, "status") else None
+
+    def close(self):
+        for key in [key for key in self.scheduler.active if key[0] == id(self)]:
+            self.scheduler.cancel(key)
+        if self.owns_scheduler:
+            self.scheduler.close()
+        if hasattr(self.controller, "close"):
+            self.controller.close()
@@ -0,0 +1,163 @@
+import time
+import logging
+
+from core.pipelined_executor import PipelinedExecutor, plan_dependencies
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRunner:
+    """
+    Run a list of utterances and/or pre-built actions as one pipeline.
+
+    Items may be a command string, {"command": "..."}, a single action
+    {"action": ..., "params": ...} or {"actions": [...]}. Every item is
+    planned first and all their actions go to one pipelined executor, so
+    independent actions of different items share the in-flight window and
+    only conflicting ones wait for each other. run() yields one result per
+    item as soon as all its actions have completed (so not necessarily in
+    item order; each result carries its "index"), then a single project
+    state snapshot, so callers can stream results without a state fetch per
+    command. When a pre-forked parser pool is given, every utterance is
+    submitted up front and parsed in parallel.
+    """
+
+    def __init__(self, nlp, mapper, controller, nlp_pool=None):
+        self.nlp = nlp
+        self.mapper = mapper
+        self.controller = controller
+        self.nlp_pool = nlp_pool
+        self.pipeline = PipelinedExecutor(controller)
+
+    def _command_of(self, item):
+        if isinstance(item, str):
+            return item
+        if isinstance(item, dict) and "command" in item:
+            return item["command"]
+        return None
+
+    def _prefetch(self, items, session_id):
+        if self.nlp_pool is None:
+            return [None] * len(items)
+        futures = []
+        for item in items:
+            command = self._command_of(item)
+            futures.append(self.nlp_pool.submit(session_id, command) if command is not None else None)
+        return futures
+
+    def _plan(self, item, future):
+        """Return (parsed_command, actions) for one batch item"""
+        command = self._command_of(item)
+        if command is not None:
+            if future is not None:
+                # Falls back to parsing here if the worker died or timed out
+                parsed_command = self.nlp_pool.result(future, command)
+            else:
+                parsed_command = self.nlp.parse_command(command)
+            return parsed_command, self.mapper.map_to_actions(parsed_command) or []
+
+        if isinstance(item, dict) and "actions" in item:
+            actions = item["actions"]
+        elif isinstance(item, dict) and "action" in item:
+            actions = [item]
+        else:
+            raise ValueError(f"Unrecognised batch item: {item!r}")
+
+        for action in actions:
+            if not isinstance(action, dict) or not isinstance(action.get("action"), str):
+                raise ValueError(f"Invalid action: {action!r}")
+        return None, actions
+
+    def run(self, items, session_id="batch", stop_on_error=False):
+        """
+        Yield {"type": "result", ...} per item, then one {"type": "state", ...}.
+        With stop_on_error each item waits for the one before it, and nothing
+        after the first failed item is sent.
+        """
+        start = time.perf_counter()
+        futures = self._prefetch(items, session_id)
+        succeeded = 0
+        failed = 0
+
+        # Plan everything up front; items that can't be planned are done already
+        results = {}
+        actions = []
+        owners = []
+        for index, (item, future) in enumerate(zip(items, futures)):
+            result = {"type": "result", "index": index, "input": item}
+            try:
+                parsed_command, item_actions = self._plan(item, future)
+                if parsed_command is not None:
+                    result["parsed"] = parsed_command
+                result["actions"] = item_actions
+                if not item_actions:
+                    result["success"] = False
+                    result["message"] = f"Could not understand command: {self._command_of(item)}"
+            except Exception as e:
+                logger.exception(f"Error processing batch item {index}: {e}")
+                result["success"] = False
+                result["message"] = f"Error: {str(e)}"
+
+            if "success" in result:
+                result["elapsed_ms"] = (time.perf_counter() - start) * 1000
+                failed += 1
+                yield result
+                if stop_on_error:
+                    break
+                continue
+            results[index] = result
+            actions.extend(result["actions"])
+            owners.extend([index] * len(result["actions"]))
+
+        dependencies = plan_dependencies(actions)
+        if stop_on_error:
+            # Chain the items: each one's actions wait for (and are skipped after
+            # a failure of) every action of the item before it
+            previous = []
+            for index in results:
+                current = [i for i, owner in enumerate(owners) if owner == index]
+                for i in current:
+                    dependencies[i] |= set(previous)
+                previous = current
+
+        reports = {index: [] for index in results}
+        for report in self.pipeline.stream(actions, dependencies, None if stop_on_error else owners):
+            index = owners[report["index"]]
+            reports[index].append(report)
+            result = results[index]
+            if len(reports[index]) < len(result["actions"]):
+                continue
+            item_reports = sorted(reports[index], key=lambda r: r["index"])
+            if stop_on_error and all(r.get("skipped") for r in item_reports):
+                # Never sent: an earlier item failed
+                continue
+            result["results"] = [r.get("result", False) for r in item_reports]
+            result["success"] = all(r["success"] for r in item_reports)
+            errors = [r["error"] for r in item_reports if "error" in r]
+            if errors:
+                result["message"] = errors[0]
+            # Time from the start of the batch until this item completed
+            result["elapsed_ms"] = (time.perf_counter() - start) * 1000
+            if result["success"]:
+                succeeded += 1
+            else:
+                failed += 1
+            yield result
+
+        self.pipeline.close()
+        try:
+            state = self.controller.get_project_state()
+        except Exception as e:
+            logger.warning(f"Could not fetch project state after batch: {e}")
+            state = None
+        yield {
+            "type": "state",
+            "state": state,
+            "summary": {
+                "total": len(items),
+                "succeeded": succeeded,
+                "failed": failed,
+                "skipped": len(items) - succeeded - failed,
+                "elapsed_ms": (time.perf_counter() - start) * 1000
+            }
+        }
@@ -0,0 +1,506 @@
+import time
+import heapq
+import logging
+import argparse
+import threading
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Actions that can wait for a beat boundary, and the timing keys they carry
+TIMED_ACTIONS = ("launch_scene", "launch_clip", "start_playing", "stop_playing")
+TIMING_KEYS = ("quantize", "unit", "wait")
+
+
+def extract_launch_parameters(words, grammar):
+    """
+    Pull the scene or clip, and when to launch it, out of the normalized
+    words of "launch scene 3 on the next bar", "fire clip 2 on track 1 in
+    2 bars", "start playback on the next beat" or "stop now"
+    """
+    parameters = {}
+    units = grammar.values("unit")
+    for i, word in enumerate(words):
+        following = words[i + 1] if i + 1 < len(words) else None
+        if word in ("scene", "clip", "track") and following is not None:
+            try:
+                parameters[f"{word}_number"] = int(following)
+            except ValueError:
+                pass
+        if word in ("now", "immediately"):
+            parameters["quantize"] = 0
+        if word == "next" and following in units and following != "seconds":
+            # "on the next bar": the first boundary from now
+            parameters.update({"quantize": 1, "unit": following, "wait": 1})
+        if word == "in" and following is not None and i + 2 < len(words) and words[i + 2] in units:
+            # "in 2 bars": two boundaries from now
+            try:
+                wait = int(following)
+            except ValueError:
+                continue
+            if words[i + 2] != "seconds":
+                parameters.update({"quantize": 1, "unit": words[i + 2], "wait": wait})
+    return parameters
+
+
+class LatencyEstimate:
+    """
+    One-way latency to Live, from recent round trips (RTT / 2).
+
+    `minimum` is the fastest recent path and corrects beat arrivals (queueing
+    only ever delays a message); `typical` (the median) is how early a
+    command has to leave to arrive on time.
+    """
+
+    def __init__(self, window=64, default=0.0):
+        self.rtts = deque(maxlen=window)
+        self.default = default
+
+    def observe_rtt(self, rtt):
+        if rtt >= 0:
+            self.rtts.append(rtt)
+
+    @property
+    def minimum(self):
+        return min(self.rtts) / 2 if self.rtts else self.default
+
+    @property
+    def typical(self):
+        return float(np.median(self.rtts)) / 2 if self.rtts else self.default
+
+    def status(self):
+        return {"samples": len(self.rtts), "minimum_ms": self.minimum * 1000, "typical_ms": self.typical * 1000}
+
+
+class SongClock:
+    """
+    Estimates Live's song position (in beats) on the local monotonic clock.
+
+    Each beat message from Live's beat listener is one (arrival time, beat)
+    observation. A line fitted over the last `window` of them gives the
+    beat rate (tempo, including any drift between Live's clock and ours).
+    Jitter only ever makes a message late, so the line is refitted on the
+    earlier half of the arrivals and shifted onto the earliest one. Arrival
+    times are corrected by the minimum one-way latency before fitting. A
+    tempo change restarts the fit.
+    """
+
+    def __init__(self, latency=None, window=32, time_source=time.monotonic):
+        self.latency = latency or LatencyEstimate()
+        self.time_source = time_source
+        self.observations = deque(maxlen=window)
+        self.tempo = None
+        self.beats_per_second = None
+        self.origin = None
+        self.jitter = None
+        self._lock = threading.Lock()
+
+    @property
+    def synced(self):
+        return self.beats_per_second is not None
+
+    def observe(self, beat, received_at=None):
+        """Record a beat message received at local time received_at (default: now)"""
+        received_at = self.time_source() if received_at is None else received_at
+        with self._lock:
+            self.observations.append((received_at, float(beat)))
+            self._fit()
+
+    def observe_tempo(self, tempo):
+        """Record Live's tempo; a change makes older beat observations useless"""
+        with self._lock:
+            if self.tempo is not None and tempo != self.tempo and self.observations:
+                self.observations = deque([self.observations[-1]], maxlen=self.observations.maxlen)
+                self.beats_per_second = None
+            self.tempo = tempo
+
+    def _fit(self):
+        if len(self.observations) < 3:
+            return
+        data = np.array(self.observations)
+        times = data[:, 0] - self.latency.minimum
+        beats = data[:, 1]
+        # Fit relative to the latest observation to keep the numbers small
+        t0 = times[-1]
+        slope, intercept = np.polyfit(times - t0, beats, 1)
+        residuals = beats - (slope * (times - t0) + intercept)
+        # Late arrivals sit below the line: refit on the earlier half only
+        early = residuals >= np.median(residuals)
+        if early.sum() >= 3:
+            slope, intercept = np.polyfit(times[early] - t0, beats[early], 1)
+            residuals = beats - (slope * (times - t0) + intercept)
+        if slope <= 0:
+            return
+        # and shift the line onto the earliest arrival, the least delayed one
+        self.origin = (float(t0), float(intercept + residuals.max()))
+        self.jitter = float(np.std(residuals) / slope)
+        self.beats_per_second = float(slope)
+
+    def beat_at(self, local_time=None):
+        """Song position in beats at local_time (default: now), or None while unsynced"""
+        # Read once: a tempo change on another thread can unsync the clock at any point
+        beats_per_second = self.beats_per_second
+        if beats_per_second is None:
+            return None
+        local_time = self.time_source() if local_time is None else local_time
+        t0, beat0 = self.origin
+        return beat0 + (local_time - t0) * beats_per_second
+
+    def time_of(self, beat):
+        """Local time at which the song reaches beat, or None while unsynced"""
+        beats_per_second = self.beats_per_second
+        if beats_per_second is None:
+            return None
+        t0, beat0 = self.origin
+        return t0 + (beat - beat0) / beats_per_second
+
+    def status(self):
+        beats_per_second = self.beats_per_second
+        status = {"synced": beats_per_second is not None, "observations": len(self.observations), "tempo": self.tempo}
+        if beats_per_second is not None:
+            status.update({
+                "beat": self.beat_at(),
+                "measured_tempo": beats_per_second * 60,
+                "drift_ppm": (beats_per_second * 60 / self.tempo - 1) * 1e6 if self.tempo else None,
+                "jitter_ms": self.jitter * 1000
+            })
+        return status
+
+
+class BeatScheduler:
+    """
+    Sends actions so they reach Live on a beat or bar boundary.
+
+    schedule() picks the target beat; a background thread sleeps until the
+    target time minus the typical one-way latency (and `margin`), then sends.
+    The send time is recomputed from the clock on every wake-up, so beat
+    messages arriving while an action waits keep refining it.
+
+    A tempo change unsyncs the clock until a few new beats arrive. Target
+    beats stay valid across it, so a launch falling due meanwhile waits
+    for the clock to resync; if that takes longer than `resync_timeout`
+    seconds it goes out at once and Live's own launch quantization applies.
+    """
+
+    def __init__(self, clock, send, beats_per_bar=4, margin=0.0, min_lead=0.005, resync_timeout=2.0,
+                 resync_interval=0.01):
+        self.clock = clock
+        self.send = send
+        self.beats_per_bar = beats_per_bar
+        # Leave earlier by this much, e.g. to fall inside Live's own launch quantization
+        self.margin = margin
+        # Boundaries closer than this are too close to make; take the next one
+        self.min_lead = min_lead
+        self.resync_timeout = resync_timeout
+        self.resync_interval = resync_interval
+        self.pending = {}
+        self.launched = 0
+        self.failed = 0
+        self.late = deque(maxlen=64)
+
+        self._heap = []
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="beat-scheduler")
+        self._thread.start()
+
+    def target_beat(self, quantize=1, unit="bars", wait=1, now=None):
+        """The `wait`-th boundary of the quantize grid that can still be reached"""
+        grid = quantize * (self.beats_per_bar if unit == "bars" else 1)
+        lead = self.clock.latency.typical + self.margin + self.min_lead
+        earliest = self.clock.beat_at((self.clock.time_source() if now is None else now) + lead)
+        if earliest is None:
+            return None
+        return (np.floor(earliest / grid) + max(1, wait)) * grid
+
+    def send_time(self, beat):
+        """When to send for beat to arrive on time, or None while the clock is unsynced"""
+        reached = self.clock.time_of(beat)
+        if reached is None:
+            return None
+        return reached - self.clock.latency.typical - self.margin
+
+    def schedule(self, action, quantize=1, unit="bars", wait=1):
+        """
+        Queue action for the next reachable boundary; returns
+        {"id", "beat", "send_at"} or None while the clock isn't synced
+        """
+        beat = self.target_beat(quantize, unit, wait)
+        send_at = self.send_time(beat) if beat is not None else None
+        if send_at is None:
+            return None
+        with self._condition:
+            self._counter += 1
+            launch = {"id": self._counter, "beat": float(beat), "action": action}
+            self.pending[launch["id"]] = launch
+            heapq.heappush(self._heap, (send_at, launch["id"]))
+            self._condition.notify()
+        return {"id": launch["id"], "beat": float(beat), "send_at": send_at}
+
+    def cancel(self, launch_id):
+        with self._condition:
+            return self.pending.pop(launch_id, None) is not None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._heap or self._heap[0][0] > self.clock.time_source()):
+                    timeout = self._heap[0][0] - self.clock.time_source() if self._heap else None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+                _, launch_id = heapq.heappop(self._heap)
+                launch = self.pending.get(launch_id)
+                if launch is None:
+                    continue
+                # The clock may have moved since this was queued
+                due = self.send_time(launch["beat"])
+                now = self.clock.time_source()
+                if due is None:
+                    unsynced = now - launch.setdefault("unsynced_since", now)
+                    if unsynced < self.resync_timeout:
+                        heapq.heappush(self._heap, (now + self.resync_interval, launch_id))
+                        continue
+                    logger.warning(f"Beat sync lost for {unsynced:.1f}s; sending {launch['action']['action']} now")
+                    due = now
+                elif due > now + 0.0005:
+                    heapq.heappush(self._heap, (due, launch_id))
+                    continue
+                del self.pending[launch_id]
+                self.late.append(now - due)
+
+            try:
+                ok = self.send(launch["action"])
+            except Exception as e:
+                logger.warning(f"Launch of {launch['action']} at beat {launch['beat']} failed: {e}")
+                ok = False
+            self.launched += 1
+            if ok is False:
+                self.failed += 1
+
+    def status(self):
+        late = np.array(self.late) * 1000 if self.late else np.zeros(1)
+        return {
+            "clock": self.clock.status(),
+            "latency": self.clock.latency.status(),
+            "pending": len(self.pending),
+            "launched": self.launched,
+            "failed": self.failed,
+            "send_late_ms": {"median": float(np.median(late)), "max": float(late.max())}
+        }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout=1)
+
+
+class ScheduledController:
+    """
+    Controller wrapper that holds launch and transport actions with timing
+    ("quantize", "unit", "wait") for the BeatScheduler and passes everything
+    else through. Until the clock has synced, timed actions go out at once
+    and Live's own launch quantization applies.
+    """
+
+    def __init__(self, controller, scheduler):
+        self.controller = controller
+        self.scheduler = scheduler
+
+    @property
+    def host(self):
+        return getattr(self.controller, "host", None)
+
+    @property
+    def port(self):
+        return getattr(self.controller, "port", None)
+
+    @property
+    def connected(self):
+        return getattr(self.controller, "connected", True)
+
+    @property
+    def available(self):
+        return getattr(self.controller, "available", True)
+
+    def execute_action(self, action):
+        params = action.get("params", {})
+        if action.get("action") not in TIMED_ACTIONS or not params.get("quantize"):
+            return self.controller.execute_action(action)
+
+        untimed = {"action": action["action"],
+                   "params": {key: value for key, value in params.items() if key not in TIMING_KEYS}}
+        launch = self.scheduler.schedule(untimed, params["quantize"], params.get("unit", "bars"),
+                                         params.get("wait", 1))
+        if launch is None:
+            logger.warning(f"No beat sync with Live yet; sending {action['action']} now")
+            return self.controller.execute_action(untimed)
+        logger.debug(f"{action['action']} scheduled for beat {launch['beat']:.0f}")
+        return True
+
+    def get_project_state(self):
+        return self.controller.get_project_state()
+
+    def add_state_listener(self, callback):
+        """Forward to the wrapped controller; False when it can't push state changes"""
+        if hasattr(self.controller, "add_state_listener"):
+            return self.controller.add_state_listener(callback)
+        return False
+
+    def status(self):
+        return self.controller.status() if hasattr(self.controller, "status") else None
+
+    def close(self):
+        self.scheduler.close()
+        if hasattr(self.controller, "close"):
+            self.controller.close()
+
+
+class OscBeatListener:
+    """
+    Feeds a SongClock from AbletonOSC: subscribes to Live's beat listener
+    and times a tempo query every `ping_interval` seconds for the latency
+    estimate. Needs python-osc.
+    """
+
+    def __init__(self, clock, host="127.0.0.1", port=11000, listen_port=11001, ping_interval=2.0):
+        self.clock = clock
+        self.host = host
+        self.port = port
+        self.listen_port = listen_port
+        self.ping_interval = ping_interval
+        self._ping_sent = None
+        self._stop = threading.Event()
+        self._server = None
+
+    def start(self):
+        from pythonosc import udp_client
+        from pythonosc.dispatcher import Dispatcher
+        from pythonosc.osc_server import ThreadingOSCUDPServer
+
+        dispatcher = Dispatcher()
+        dispatcher.map("/live/song/get/beat", lambda address, beat, *rest: self.clock.observe(beat))
+        dispatcher.map("/live/song/get/tempo", self._on_tempo)
+        self._server = ThreadingOSCUDPServer(("0.0.0.0", self.listen_port), dispatcher)
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="osc-beat-listener").start()
+
+        self._client = udp_client.SimpleUDPClient(self.host, self.port)
+        self._client.send_message("/live/song/start_listen/beat", [])
+        threading.Thread(target=self._ping, daemon=True, name="osc-latency-ping").start()
+        return self
+
+    def _on_tempo(self, address, tempo, *rest):
+        sent = self._ping_sent
+        if sent is not None:
+            self.clock.latency.observe_rtt(time.monotonic() - sent)
+            self._ping_sent = None
+        self.clock.observe_tempo(tempo)
+
+    def _ping(self):
+        while not self._stop.is_set():
+            self._ping_sent = time.monotonic()
+            self._client.send_message("/live/song/get/tempo", [])
+            self._stop.wait(self.ping_interval)
+
+    def close(self):
+        self._stop.set()
+        if self._server:
+            self._client.send_message("/live/song/stop_listen/beat", [])
+            self._server.shutdown()
+
+
+class SimulatedLive:
+    """
+    A song playing at `tempo` on a clock drifting `drift_ppm` from ours, with
+    messages in both directions delayed by `latency` plus up to `jitter`
+    seconds (uniformly). Emits beat messages into a SongClock and records
+    the song position at which each sent action arrives.
+    """
+
+    def __init__(self, clock, tempo=120.0, drift_ppm=200.0, latency=0.004, jitter=0.006, seed=0):
+        self.clock = clock
+        self.beats_per_second = tempo / 60 * (1 + drift_ppm * 1e-6)
+        self.latency = latency
+        self.jitter = jitter
+        self.started = time.monotonic() - 0.2 / self.beats_per_second
+        self.arrivals = []
+        self.rng = np.random.default_rng(seed)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        clock.observe_tempo(tempo)
+
+    def delay(self):
+        with self._lock:
+            return self.latency + float(self.rng.uniform(0, self.jitter))
+
+    def song_beat(self, local_time):
+        return (local_time - self.started) * self.beats_per_second
+
+    def start(self):
+        threading.Thread(target=self._beats, daemon=True, name="simulated-live").start()
+        return self
+
+    def _beats(self):
+        beat = int(self.song_beat(time.monotonic())) + 1
+        while not self._stop.is_set():
+            at = self.started + beat / self.beats_per_second
+            # Deliver the beat message late by the link's delay
+            self._stop.wait(max(0.0, at + self.delay() - time.monotonic()))
+            self.clock.observe(beat)
+            if beat % 2 == 0:
+                self.clock.latency.observe_rtt(self.delay() + self.delay())
+            beat += 1
+
+    def send(self, action):
+        """Stand-in for the controller: the action lands after one link delay"""
+        arrival = time.monotonic() + self.delay()
+        self.arrivals.append((action, self.song_beat(arrival)))
+        return True
+
+    def close(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure launch timing against a simulated, jittery Live")
+    parser.add_argument("--tempo", type=float, default=174.0)
+    parser.add_argument("--launches", type=int, default=16)
+    parser.add_argument("--jitter-ms", type=float, default=8.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    clock = SongClock()
+    live = SimulatedLive(clock, tempo=args.tempo, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000).start()
+    scheduler = BeatScheduler(clock, live.send)
+    while clock.status()["observations"] < 8:
+        time.sleep(0.01)
+
+    # Immediate sends, as today: they land wherever the link delay puts them
+    immediate = []
+    for _ in range(args.launches):
+        time.sleep(float(live.rng.uniform(0.05, 0.3)))
+        arrival = live.song_beat(time.monotonic() + live.delay())
+        immediate.append(abs(arrival - round(arrival)) / live.beats_per_second)
+
+    for _ in range(args.launches):
+        launch = scheduler.schedule({"action": "launch_scene", "params": {"scene_number": 1}}, 1, "beats")
+        while launch["id"] in scheduler.pending:
+            time.sleep(0.005)
+    errors = [(beat - round(beat)) / live.beats_per_second for _, beat in live.arrivals]
+    live.close()
+    scheduler.close()
+
+    beat_ms = 1000 / live.beats_per_second
+    print(f"{args.tempo:.0f} BPM ({beat_ms:.0f} ms beats), link {args.latency_ms:.0f} ms + up to {args.jitter_ms:.0f} ms jitter")
+    print(f"Immediate sends:  mean {np.mean(immediate) * 1000:6.2f} ms off the nearest beat")
+    print(f"Scheduled sends:  mean {np.mean(np.abs(errors)) * 1000:6.2f} ms, "
+          f"worst {np.max(np.abs(errors)) * 1000:.2f} ms off the target beat")
+    print(f"Clock: {clock.status()}")
+
+
+if __name__ == "__main__":
+    main()
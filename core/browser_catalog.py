@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Browser categories grouped by what the action mapper can do with them
+CATEGORY_KINDS = {
+    "instruments": "instrument",
+    "drums": "instrument",
+    "sounds": "instrument",
+    "plugins": "instrument",
+    "audio_effects": "effect",
+    "midi_effects": "effect",
+    "samples": "sample",
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(text):
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def item_phrase(words):
+    """The words naming the thing being added, without the verb, articles or target track"""
+    phrase = []
+    for word in words[1:]:
+        if word in ("to", "on", "onto"):
+            break
+        if word not in ("a", "an", "the", "some", "new"):
+            phrase.append(word)
+    return " ".join(phrase)
+
+
+def _term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _terms(name):
+    """Return (token terms, trigram terms) for a normalised name"""
+    tokens = set(name.split())
+    padded = f" {name} "
+    trigrams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+    return [f"w:{t}" for t in tokens], [f"g:{g}" for g in trigrams]
+
+
+def _flatten(node, category=None, path=()):
+    """Yield items from either a flat list or a nested browser tree"""
+    if isinstance(node, list):
+        for child in node:
+            yield from _flatten(child, category, path)
+        return
+
+    name = node.get("name", "")
+    children = node.get("children")
+    if children:
+        # Top-level folders name the category ("Instruments", "Audio Effects", ...)
+        child_category = category or name.lower().replace(" ", "_")
+        yield from _flatten(children, child_category, path + (name,))
+    else:
+        yield {
+            "name": os.path.splitext(name)[0],
+            "path": node.get("path") or "/".join(path + (name,)),
+            "category": node.get("category") or category or "",
+            "uri": node.get("uri", "")
+        }
+
+
+def build_index(dump_path, index_dir):
+    """
+    Build an on-disk catalog index from a JSON browser dump.
+
+    The dump is either a flat list of {"name", "path", "category"} items or a
+    nested tree of {"name", "children"} folders as exported from the browser.
+    """
+    with open(dump_path, encoding="utf-8") as f:
+        items = list(_flatten(json.load(f)))
+
+    os.makedirs(index_dir, exist_ok=True)
+
+    # Item table: one record per item in a single UTF-8 blob
+    records = [
+        "\x1f".join((item["name"], item["path"], item["category"], item["uri"])).encode("utf-8")
+        for item in items
+    ]
+    item_offsets = np.zeros(len(records) + 1, dtype=np.uint64)
+    item_offsets[1:] = np.cumsum([len(r) for r in records])
+    item_blob = np.frombuffer(b"".join(records), dtype=np.uint8)
+
+    # Postings: term hash -> item ids
+    postings = {}
+    trigram_counts = np.zeros(len(items), dtype=np.uint16)
+    for item_id, item in enumerate(items):
+        tokens, trigrams = _terms(_normalize(item["name"]))
+        trigram_counts[item_id] = len(trigrams)
+        for term in tokens + trigrams:
+            postings.setdefault(_term_hash(term), []).append(item_id)
+
+    term_hashes = np.array(sorted(postings), dtype=np.uint64)
+    term_offsets = np.zeros(len(term_hashes) + 1, dtype=np.uint64)
+    term_offsets[1:] = np.cumsum([len(postings[h]) for h in term_hashes.tolist()])
+    posting_ids = np.fromiter(
+        (item_id for h in term_hashes.tolist() for item_id in postings[h]),
+        dtype=np.uint32, count=int(term_offsets[-1])
+    )
+
+    categories = sorted({item["category"] for item in items})
+    category_index = {c: i for i, c in enumerate(categories)}
+    item_categories = np.array([category_index[item["category"]] for item in items], dtype=np.uint8)
+
+    arrays = {
+        "item_offsets": item_offsets,
+        "item_blob": item_blob,
+        "item_categories": item_categories,
+        "trigram_counts": trigram_counts,
+        "term_hashes": term_hashes,
+        "term_offsets": term_offsets,
+        "postings": posting_ids,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(index_dir, f"{name}.npy"), array)
+
+    with open(os.path.join(index_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": INDEX_VERSION,
+            "items": len(items),
+            "terms": len(term_hashes),
+            "categories": categories
+        }, f)
+
+    logger.debug(f"Indexed {len(items)} browser items into {index_dir}")
+    return len(items)
+
+
+class BrowserCatalog:
+    """
+    Memory-mapped index over the Live browser for ranked name lookups.
+
+    Queries are matched through whole-token postings (exact words score
+    highest) and trigram postings (partial and misspelt names), then ranked
+    by token hits plus the trigram Dice coefficient.
+    """
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["version"] != INDEX_VERSION:
+            raise ValueError(f"Unsupported catalog index version {manifest['version']}, rebuild it")
+
+        self.categories = manifest["categories"]
+
+        def load(name):
+            return np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+
+        self.item_offsets = load("item_offsets")
+        self.item_blob = load("item_blob")
+        self.item_categories = load("item_categories")
+        self.trigram_counts = load("trigram_counts")
+        self.term_hashes = load("term_hashes")
+        self.term_offsets = load("term_offsets")
+        self.postings = load("postings")
+
+    def __len__(self):
+        return len(self.item_offsets) - 1
+
+    def item(self, item_id):
+        """Return the catalog item with the given id as a dict"""
+        start, end = int(self.item_offsets[item_id]), int(self.item_offsets[item_id + 1])
+        name, path, category, uri = bytes(self.item_blob[start:end]).decode("utf-8").split("\x1f")
+        return {
+            "name": name,
+            "path": path,
+            "category": category,
+            "kind": CATEGORY_KINDS.get(category, category),
+            "uri": uri
+        }
+
+    def _postings(self, term):
+        h = np.uint64(_term_hash(term))
+        i = int(np.searchsorted(self.term_hashes, h))
+        if i < len(self.term_hashes) and self.term_hashes[i] == h:
+            return self.postings[int(self.term_offsets[i]):int(self.term_offsets[i + 1])]
+        return None
+
+    def search(self, query, kind=None, limit=5):
+        """
+        Return up to limit items ranked by relevance to query, optionally
+        restricted to one kind ("instrument", "effect" or "sample")
+        """
+        name = _normalize(query)
+        if not name:
+            return []
+        tokens, trigrams = _terms(name)
+
+        token_lists = [p for p in (self._postings(t) for t in tokens) if p is not None]
+        trigram_lists = [p for p in (self._postings(t) for t in trigrams) if p is not None]
+        if not trigram_lists:
+            return []
+
+        candidates, trigram_hits = np.unique(np.concatenate(trigram_lists), return_counts=True)
+        scores = 2.0 * trigram_hits / (len(trigrams) + self.trigram_counts[candidates].astype(np.float64))
+
+        if token_lists:
+            token_ids, token_hits = np.unique(np.concatenate(token_lists), return_counts=True)
+            positions = np.minimum(np.searchsorted(candidates, token_ids), len(candidates) - 1)
+            found = candidates[positions] == token_ids
+            scores[positions[found]] += token_hits[found]
+
+        if kind is not None:
+            allowed = [i for i, c in enumerate(self.categories) if CATEGORY_KINDS.get(c, c) == kind]
+            mask = np.isin(self.item_categories[candidates], allowed)
+            candidates, scores = candidates[mask], scores[mask]
+            if not len(candidates):
+                return []
+
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            item = self.item(int(candidates[i]))
+            item["score"] = float(scores[i])
+            results.append(item)
+        return results
+
+    def resolve(self, query, kind=None, min_score=0.5):
+        """Return the best matching item, or None if nothing is close enough"""
+        results = self.search(query, kind=kind, limit=1)
+        if results and results[0]["score"] >= min_score:
+            return results[0]
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the Live browser catalog index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="index a JSON browser dump")
+    build.add_argument("dump")
+    build.add_argument("index_dir")
+
+    query = subparsers.add_parser("query", help="search an index")
+    query.add_argument("index_dir")
+    query.add_argument("text")
+    query.add_argument("--kind", choices=["instrument", "effect", "sample"])
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        count = build_index(args.dump, args.index_dir)
+        print(f"Indexed {count} items in {(time.perf_counter() - start) * 1000:.0f} ms")
+    else:
+        catalog = BrowserCatalog(args.index_dir)
+        start = time.perf_counter()
+        results = catalog.search(args.text, kind=args.kind)
+        elapsed = (time.perf_counter() - start) * 1000
+        for item in results:
+            print(f"{item['score']:6.2f}  {item['name']}  ({item['path']})")
+        print(f"{len(results)} results in {elapsed:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
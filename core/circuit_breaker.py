@@ -0,0 +1,186 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LiveUnavailableError(Exception):
+    """Raised instead of waiting on a Live endpoint that is down or too slow"""
+
+
+class GuardedController:
+    """
+    Wrap a Live controller with per-call deadlines and a circuit breaker.
+
+    Every call runs on a helper thread and is abandoned once its deadline
+    passes. After failure_threshold consecutive failures the circuit opens and
+    calls fail immediately with LiveUnavailableError instead of hanging. A
+    background thread then probes the endpoint (half-open) every
+    probe_interval seconds and closes the circuit as soon as Live answers.
+
+    An abandoned call keeps its helper thread until Live finally returns.
+    Once all `workers` are held that way, calls fail fast instead of queueing
+    behind them, and the circuit stays open until some are freed.
+    """
+
+    def __init__(self, controller, call_timeout=2.0, state_timeout=None,
+                 failure_threshold=3, probe_interval=2.0, probe=None, workers=8):
+        self.controller = controller
+        self.call_timeout = call_timeout
+        self.state_timeout = state_timeout or call_timeout
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        # Cheap liveness check; defaults to fetching the project state
+        self._probe = probe or (lambda: bool(self.controller.get_project_state()))
+
+        self.circuit_state = CLOSED
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.opened_at = None
+        self.fast_failures = 0
+        self.workers = workers
+        self.busy_workers = 0
+
+        self._lock = threading.Lock()
+        self._calls = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="live-call")
+        self._probe_thread = None
+        self._closed = threading.Event()
+
+    # Pass through the attributes callers read directly
+    @property
+    def host(self):
+        return getattr(self.controller, "host", None)
+
+    @property
+    def port(self):
+        return getattr(self.controller, "port", None)
+
+    @property
+    def connected(self):
+        return self.circuit_state == CLOSED and getattr(self.controller, "connected", True)
+
+    @property
+    def available(self):
+        return self.circuit_state == CLOSED
+
+    def _call(self, function, args, timeout):
+        # While open or being probed, don't queue more work behind a dead endpoint
+        if self.circuit_state != CLOSED:
+            self.fast_failures += 1
+            raise LiveUnavailableError(f"Live unavailable ({self.last_error})")
+        with self._lock:
+            saturated = self.busy_workers >= self.workers
+            if not saturated:
+                self.busy_workers += 1
+        if saturated:
+            self.fast_failures += 1
+            self._failure(f"all {self.workers} call workers stuck on earlier calls")
+            raise LiveUnavailableError(f"Live unavailable ({self.last_error})")
+
+        future = self._calls.submit(self._run, function, args)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._failure(f"no answer within {timeout:.1f}s")
+            raise LiveUnavailableError(f"Live did not answer within {timeout:.1f}s")
+        except Exception as e:
+            self._failure(str(e))
+            raise
+        self._success()
+        return result
+
+    def _run(self, function, args):
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.busy_workers -= 1
+
+    def _success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+
+    def _failure(self, error):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.circuit_state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.circuit_state = OPEN
+        self.opened_at = time.time()
+        logger.warning(f"Live endpoint unavailable, opening circuit: {self.last_error}")
+        if self._probe_thread is None or not self._probe_thread.is_alive():
+            self._probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        while not self._closed.wait(self.probe_interval):
+            with self._lock:
+                self.circuit_state = HALF_OPEN
+            ok = self._run_probe()
+            with self._lock:
+                if ok and self.busy_workers >= self.workers:
+                    # Live answers, but every call would still queue behind the stuck ones
+                    self.last_error = f"all {self.workers} call workers stuck on earlier calls"
+                    ok = False
+                if ok:
+                    logger.info("Live endpoint answered probe, closing circuit")
+                    self.circuit_state = CLOSED
+                    self.consecutive_failures = 0
+                    self.opened_at = None
+                    return
+                self.circuit_state = OPEN
+
+    def _run_probe(self):
+        # Probe on its own thread so calls stuck on the dead endpoint can't starve it
+        outcome = {}
+
+        def probe():
+            try:
+                outcome["ok"] = self._probe()
+            except Exception as e:
+                outcome["error"] = str(e)
+
+        thread = threading.Thread(target=probe, daemon=True)
+        thread.start()
+        thread.join(self.state_timeout)
+        if outcome.get("ok"):
+            return True
+        self.last_error = outcome.get("error") or "probe timed out"
+        return False
+
+    def execute_action(self, action):
+        return self._call(self.controller.execute_action, (action,), self.call_timeout)
+
+    def get_project_state(self):
+        return self._call(self.controller.get_project_state, (), self.state_timeout)
+
+    def add_state_listener(self, callback):
+        """Forward to the wrapped controller; False when it can't push state changes"""
+        if hasattr(self.controller, "add_state_listener"):
+            return self.controller.add_state_listener(callback)
+        return False
+
+    def status(self):
+        return {
+            "circuit": self.circuit_state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "opened_at": self.opened_at,
+            "fast_failures": self.fast_failures,
+            "busy_workers": self.busy_workers
+        }
+
+    def close(self):
+        self._closed.set()
+        self._calls.shutdown(wait=False)
+        if hasattr(self.controller, "close"):
+            self.controller.close()
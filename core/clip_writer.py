@@ -0,0 +1,130 @@
+import logging
+
+from core.midi_import import MidiImporter, resolve_midi_path
+from core.midi_patterns import ClipNoteWriter, osc_address, render_pattern, udp_sender
+
+logger = logging.getLogger(__name__)
+
+
+class ClipWritingController:
+    """
+    Controller wrapper that writes clip notes itself and passes everything
+    else through.
+
+    The Max bridge has no way to carry thousands of notes, so add_pattern
+    actions are rendered here (core/midi_patterns.py) and import_midi files
+    streamed from ABLETONML_MIDI_DIR (core/midi_import.py), both sent
+    straight to the rig's AbletonOSC listener at osc_host:osc_port (see
+    osc_address; the wrapped controller's port is the Max bridge's) as
+    packed /live/clip/add/notes datagrams. Without a track number the
+    selected track is used; the clip goes into the first slot the project
+    state doesn't show as taken.
+
+    It sits above GuardedController: the project state read goes through
+    the guard's deadline and breaker, but streaming thousands of datagrams
+    doesn't, so a large import is neither cut off by the call deadline nor
+    counted as Live failing to answer. With `acquire` (a pacer's, handed
+    down by PacedController) every datagram waits for its own token.
+    """
+
+    # Actions sent here as many datagrams rather than one call to the wrapped controller
+    bulk_actions = ("add_pattern", "import_midi")
+
+    def __init__(self, controller, send=None, osc_host=None, osc_port=None, acquire=None):
+        self.controller = controller
+        self.osc_host, self.osc_port = osc_address(osc_host, osc_port)
+        self.acquire = acquire
+        # Created on first use
+        self._send = send
+        self._writer = None
+        self.handlers = {"add_pattern": self._add_pattern, "import_midi": self._import_midi}
+
+    @property
+    def host(self):
+        return getattr(self.controller, "host", None)
+
+    @property
+    def port(self):
+        return getattr(self.controller, "port", None)
+
+    @property
+    def connected(self):
+        return getattr(self.controller, "connected", True)
+
+    @property
+    def available(self):
+        return getattr(self.controller, "available", True)
+
+    @property
+    def send(self):
+        if self._send is None:
+            self._send = udp_sender(self.osc_host, self.osc_port)
+        return self._send
+
+    def _send_paced(self, datagram):
+        if self.acquire is not None:
+            self.acquire()
+        self.send(datagram)
+
+    @property
+    def writer(self):
+        if self._writer is None:
+            self._writer = ClipNoteWriter(self._send_paced)
+        return self._writer
+
+    def execute_action(self, action):
+        handler = self.handlers.get(action.get("action"))
+        if handler is None:
+            return self.controller.execute_action(action)
+        return handler(action.get("params", {}))
+
+    def _clip_slot(self, track_number):
+        """0-based (track, clip slot) for a 1-based track number, or the selected track"""
+        state = self.controller.get_project_state() or {}
+        tracks = state.get("tracks", [])
+        index = track_number - 1 if track_number is not None else state.get("selected_track", -1)
+        if not 0 <= index < len(tracks):
+            return None, None
+        return index, len(tracks[index].get("clips", []))
+
+    def _add_pattern(self, params):
+        try:
+            notes = render_pattern(params)
+        except ValueError as e:
+            logger.warning(f"Could not render pattern: {e}")
+            return False
+        track_index, clip_index = self._clip_slot(params.get("track"))
+        if track_index is None:
+            logger.warning(f"No track {params.get('track', '(selected)')} to write the pattern to")
+            return False
+        self.writer.write(track_index, clip_index, notes, length=params.get("bars", 4) * 4)
+        return True
+
+    def _import_midi(self, params):
+        track_index, clip_index = self._clip_slot(params.get("track"))
+        if track_index is None:
+            logger.warning(f"No track {params.get('track', '(selected)')} to import {params.get('file')} into")
+            return False
+        try:
+            summary = MidiImporter(self._send_paced).import_file(resolve_midi_path(params["file"]), track_index, clip_index)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not import {params['file']}: {e}")
+            return False
+        logger.info(f"Imported {summary['notes']} notes from {params['file']} in {summary['datagrams']} datagrams")
+        return True
+
+    def get_project_state(self):
+        return self.controller.get_project_state()
+
+    def add_state_listener(self, callback):
+        """Forward to the wrapped controller; False when it can't push state changes"""
+        if hasattr(self.controller, "add_state_listener"):
+            return self.controller.add_state_listener(callback)
+        return False
+
+    def status(self):
+        return self.controller.status() if hasattr(self.controller, "status") else None
+
+    def close(self):
+        if hasattr(self.controller, "close"):
+            self.controller.close()
@@ -0,0 +1,217 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from core.track_index import TrackNameIndex
+from core.pipelined_executor import PipelinedExecutor
+from core.circuit_breaker import GuardedController
+from core.clip_writer import ClipWritingController
+
+logger = logging.getLogger(__name__)
+
+
+def default_controller_factory(host, port):
+    """
+    Create a guarded MaxController for a rig's Max bridge at host:port,
+    writing clip notes to AbletonOSC on the same host (port
+    ABLETONML_OSC_PORT, default 11000)
+    """
+    from core.max_controller import MaxController
+    controller = MaxController()
+    controller.host = host
+    controller.port = port
+    return ClipWritingController(GuardedController(controller), osc_host=host)
+
+
+class Endpoint:
+    """One Live rig: its controller, a mirror of its last known state and its health"""
+
+    def __init__(self, name, controller, track_index=None, pipeline_window=4):
+        self.name = name
+        self.controller = controller
+        self.pipeline = PipelinedExecutor(controller, window=pipeline_window)
+        self.state = None
+        # Track names differ per rig, so each one resolves against its own index
+        self.track_index = track_index if track_index is not None else TrackNameIndex()
+        self.healthy = True
+        self.last_ok = None
+        self.last_error = None
+        self.consecutive_failures = 0
+
+        # One thread per rig keeps its calls in order and lets a slow rig
+        # fall behind without holding up the others
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"live-{name}")
+
+    def _record(self, ok, error=None):
+        if ok:
+            self.healthy = True
+            self.last_ok = time.time()
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+            self.healthy = False
+
+    def run_actions(self, actions):
+        results = []
+        for report in self.pipeline.run(actions):
+            if "error" in report and not report.get("skipped"):
+                self._record(False, report["error"])
+            elif not report.get("skipped"):
+                # A rejected action (e.g. no such track) says nothing about the rig's health
+                self._record(True)
+            results.append(report.get("result", False))
+        return results
+
+    @property
+    def available(self):
+        """False while the controller's circuit breaker is open"""
+        return getattr(self.controller, "available", True)
+
+    def fetch_state(self):
+        try:
+            state = self.controller.get_project_state()
+            self._record(bool(state), None if state else "empty project state")
+        except Exception as e:
+            self._record(False, str(e))
+            return self.state
+        if state:
+            self.state = state
+            self.track_index.update_from_state(state)
+        return state
+
+    def status(self):
+        return {
+            "name": self.name,
+            "host": getattr(self.controller, "host", None),
+            "port": getattr(self.controller, "port", None),
+            "connected": getattr(self.controller, "connected", None),
+            "healthy": self.healthy,
+            "last_ok": self.last_ok,
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures,
+            "available": self.available,
+            "circuit": self.controller.status() if hasattr(self.controller, "status") else None
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.pipeline.close()
+        if hasattr(self.controller, "close"):
+            self.controller.close()
+
+
+class ControllerPool:
+    """
+    Registry of Live endpoints that sessions bind to by name.
+
+    A target is either one endpoint or a named group of endpoints; commands
+    sent to a group fan out to every member concurrently, each on its own
+    executor thread.
+    """
+
+    def __init__(self, controller_factory=None, default=None):
+        self.controller_factory = controller_factory or default_controller_factory
+        self.endpoints = {}
+        self.groups = {}
+        self.bindings = {}
+        self.default = default
+        self._lock = threading.Lock()
+
+    def add_endpoint(self, name, host=None, port=None, controller=None, track_index=None):
+        """Register a rig, creating its controller from host/port if none is given"""
+        if controller is None:
+            controller = self.controller_factory(host, port)
+        with self._lock:
+            self.endpoints[name] = Endpoint(name, controller, track_index)
+            if self.default is None:
+                self.default = name
+        logger.debug(f"Added Live endpoint {name}")
+        return self.endpoints[name]
+
+    def add_group(self, name, members):
+        unknown = [m for m in members if m not in self.endpoints]
+        if unknown:
+            raise ValueError(f"Unknown endpoints in group {name}: {unknown}")
+        with self._lock:
+            self.groups[name] = list(members)
+
+    def bind(self, session_id, target):
+        """Route a session's commands to an endpoint or group"""
+        if target not in self.endpoints and target not in self.groups:
+            raise ValueError(f"Unknown Live target: {target}")
+        with self._lock:
+            self.bindings[session_id] = target
+
+    def unbind(self, session_id):
+        with self._lock:
+            self.bindings.pop(session_id, None)
+
+    def target_for(self, session_id):
+        return self.bindings.get(session_id, self.default)
+
+    def members(self, target):
+        """Return the endpoints a target refers to"""
+        if target in self.groups:
+            return [self.endpoints[name] for name in self.groups[target]]
+        if target in self.endpoints:
+            return [self.endpoints[target]]
+        raise ValueError(f"Unknown Live target: {target}")
+
+    def _fan_out(self, target, call, timeout):
+        futures = {endpoint.name: endpoint.executor.submit(call, endpoint) for endpoint in self.members(target)}
+        wait(futures.values(), timeout=timeout)
+        results = {}
+        for name, future in futures.items():
+            if future.done():
+                results[name] = future.result()
+            else:
+                # Leave it running on the rig's own thread; don't hold up the rest
+                results[name] = None
+                logger.warning(f"Live endpoint {name} did not answer within {timeout}s")
+        return results
+
+    def execute(self, target, actions, timeout=None):
+        """
+        Run actions on every endpoint of target concurrently; returns
+        {endpoint name: [result per action]} (None for endpoints that timed out)
+        """
+        return self._fan_out(target, lambda endpoint: endpoint.run_actions(actions), timeout)
+
+    def get_project_state(self, target, timeout=None):
+        """Fetch and mirror the state of every endpoint of target"""
+        return self._fan_out(target, lambda endpoint: endpoint.fetch_state(), timeout)
+
+    def status(self):
+        return {
+            "default": self.default,
+            "endpoints": [endpoint.status() for endpoint in self.endpoints.values()],
+            "groups": dict(self.groups)
+        }
+
+    def close(self):
+        for endpoint in self.endpoints.values():
+            endpoint.close()
+
+
+def parse_endpoints(spec):
+    """
+    Parse "studio_a=10.0.0.5:11000,studio_b=10.0.0.6:11000" into
+    [(name, host, port), ...]
+    """
+    endpoints = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, address = entry.partition("=")
+        host, _, port = address.rpartition(":")
+        endpoints.append((name.strip(), host or "127.0.0.1", int(port)))
+    return endpoints
+
+
+def parse_groups(spec):
+    """Parse "all=studio_a+studio_b;drums=studio_b" into {group: [members]}"""
+    groups = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        name, _, members = entry.partition("=")
+        groups[name.strip()] = [m.strip() for m in members.split("+") if m.strip()]
+    return groups
@@ -0,0 +1,139 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Optimal string alignment distance between a and b, or max_distance + 1
+    as soon as it is known to exceed max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            # Transposition of two adjacent characters
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+
+    return previous[len(b)]
+
+
+class FuzzyVocabulary:
+    """
+    SymSpell-style index for correcting near-miss tokens from speech-to-text.
+
+    Every vocabulary word is indexed under all strings reachable from its
+    prefix by up to max_distance deletions. A lookup generates the deletions
+    of the input token and only verifies the handful of words sharing one, so
+    the cost per token does not grow with the vocabulary size.
+    """
+
+    def __init__(self, words=(), max_distance=2, prefix_length=7, min_length=4):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # Shorter tokens ("to", "the", "on") are too ambiguous to correct
+        self.min_length = min_length
+
+        self.words = {}
+        self.deletes = {}
+        self._cache = {}
+        self.add_words(words)
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def __len__(self):
+        return len(self.words)
+
+    def add_words(self, words):
+        """
+        Add words to the index; repeated words raise their ranking weight
+        """
+        for word in words:
+            word = word.lower()
+            if word in self.words:
+                self.words[word] += 1
+                continue
+            self.words[word] = 1
+            for delete in self._deletes(word[:self.prefix_length]):
+                self.deletes.setdefault(delete, set()).add(word)
+
+        # Corrections made against the old vocabulary may now be wrong
+        self._cache.clear()
+
+    def _deletes(self, word):
+        results = {word}
+        frontier = {word}
+        for _ in range(self.max_distance):
+            next_frontier = set()
+            for candidate in frontier:
+                if len(candidate) <= 1:
+                    continue
+                for i in range(len(candidate)):
+                    next_frontier.add(candidate[:i] + candidate[i + 1:])
+            results |= next_frontier
+            frontier = next_frontier
+        return results
+
+    def _allowed_distance(self, token):
+        # One edit for short words, max_distance for longer ones
+        return 1 if len(token) < 6 else self.max_distance
+
+    def lookup(self, token):
+        """
+        Return the closest vocabulary word to token as (word, distance),
+        or None if nothing is within the allowed distance
+        """
+        token = token.lower()
+        if token in self.words:
+            return token, 0
+        if len(token) < self.min_length or any(ch.isdigit() for ch in token):
+            return None
+
+        if token in self._cache:
+            return self._cache[token]
+
+        allowed = self._allowed_distance(token)
+        best = None
+        seen = set()
+        for delete in self._deletes(token[:self.prefix_length]):
+            for word in self.deletes.get(delete, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = edit_distance(token, word, allowed)
+                if distance > allowed:
+                    continue
+                # Prefer smaller distance, then more frequent, then alphabetical
+                rank = (distance, -self.words[word], word)
+                if best is None or rank < best[0]:
+                    best = (rank, word, distance)
+
+        result = (best[1], best[2]) if best else None
+        if len(self._cache) > 10000:
+            self._cache.clear()
+        self._cache[token] = result
+        return result
+
+    def correct(self, token):
+        """Return the corrected token, or the token unchanged"""
+        match = self.lookup(token)
+        if match and match[1] > 0:
+            logger.debug(f"Corrected '{token}' -> '{match[0]}'")
+        return match[0] if match else token
+
+    def correct_words(self, words):
+        return [self.correct(word) for word in words]
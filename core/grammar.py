@@ -0,0 +1,257 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAMMAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grammar.json")
+
+# Bump when CompiledGrammar's layout changes so stale caches are ignored
+COMPILER_VERSION = 1
+
+
+def default_cache_dir():
+    return os.environ.get("ABLETONML_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "abletonml")
+
+
+def default_data_dir():
+    """For files users create and expect to keep, which a cache may not hold"""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.environ.get("ABLETONML_DATA_DIR") or os.path.join(base, "abletonml")
+
+
+class CompiledGrammar:
+    """
+    Lookup tables compiled from the declarative command grammar (grammar.json).
+
+    Parsers and the action mapper read vocabulary and value ranges from here
+    instead of inline lists, so adding an intent or a word is a data change.
+    """
+
+    def __init__(self, spec, source_hash):
+        self.source_hash = source_hash
+
+        self.intents = tuple(spec["intents"])
+        self.intent_slots = {name: tuple(intent.get("slots", ())) for name, intent in spec["intents"].items()}
+
+        # verb -> intents in declaration order ("add" is both create and add_effect)
+        self.verb_intents = {}
+        for name, intent in spec["intents"].items():
+            for verb in intent.get("verbs", ()):
+                self.verb_intents.setdefault(verb, []).append(name)
+        self.verb_intents = {verb: tuple(names) for verb, names in self.verb_intents.items()}
+
+        # Enumerated slots become frozensets; numeric slots become ranges
+        self.slot_values = {}
+        self.ranges = {}
+        for name, slot in spec["slots"].items():
+            if "values" in slot:
+                self.slot_values[name] = frozenset(slot["values"])
+            else:
+                self.ranges[name] = (slot.get("type", "number"), slot.get("min"), slot.get("max"))
+
+        # word -> slot name, for single-lookup classification of tokens
+        self.word_slots = {}
+        for name, values in self.slot_values.items():
+            for value in values:
+                self.word_slots.setdefault(value, name)
+
+        self.synonyms = dict(spec.get("synonyms", {}))
+
+        vocabulary = set(spec.get("keywords", ()))
+        vocabulary.update(self.verb_intents)
+        vocabulary.update(self.word_slots)
+        vocabulary.update(self.synonyms)
+        vocabulary.update(self.synonyms.values())
+        self.vocabulary = tuple(sorted(vocabulary))
+
+    def values(self, slot):
+        """Return the allowed words for an enumerated slot"""
+        return self.slot_values.get(slot, frozenset())
+
+    def normalize(self, word):
+        return self.synonyms.get(word, word)
+
+    def slot_of(self, word):
+        return self.word_slots.get(word)
+
+    def is_valid(self, slot, value):
+        """Check a numeric slot value against its declared range"""
+        if slot not in self.ranges:
+            return True
+        value_type, minimum, maximum = self.ranges[slot]
+        if value_type == "int" and int(value) != value:
+            return False
+        if minimum is not None and value < minimum:
+            return False
+        if maximum is not None and value > maximum:
+            return False
+        return True
+
+
+def _cache_path(cache_dir, source_hash):
+    return os.path.join(cache_dir, f"grammar-{COMPILER_VERSION}-{source_hash[:16]}.pickle")
+
+
+def compile_grammar(source, cache_dir=None):
+    """
+    Compile grammar source (JSON bytes), reusing a cached artifact keyed on
+    the content hash when one exists
+    """
+    source_hash = hashlib.sha256(source).hexdigest()
+    cache_dir = cache_dir or default_cache_dir()
+    path = _cache_path(cache_dir, source_hash)
+
+    try:
+        with open(path, "rb") as f:
+            grammar = pickle.load(f)
+        if grammar.source_hash == source_hash:
+            logger.debug(f"Loaded precompiled grammar from {path}")
+            return grammar
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable grammar cache {path}: {e}")
+
+    grammar = CompiledGrammar(json.loads(source), source_hash)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so concurrent processes never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(grammar, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        logger.debug(f"Cached compiled grammar at {path}")
+    except OSError as e:
+        logger.warning(f"Could not cache compiled grammar: {e}")
+
+    return grammar
+
+
+def load_grammar(path=DEFAULT_GRAMMAR_PATH, cache_dir=None):
+    with open(path, "rb") as f:
+        return compile_grammar(f.read(), cache_dir)
+
+
+_default_grammar = None
+_default_lock = threading.Lock()
+
+
+def grammar_path():
+    """The grammar file in use: ABLETONML_GRAMMAR, or the built-in core/grammar.json"""
+    return os.environ.get("ABLETONML_GRAMMAR") or DEFAULT_GRAMMAR_PATH
+
+
+def get_grammar():
+    """Return the shared grammar compiled from the grammar file"""
+    global _default_grammar
+    if _default_grammar is None:
+        with _default_lock:
+            if _default_grammar is None:
+                _default_grammar = load_grammar(grammar_path())
+    return _default_grammar
+
+
+def set_grammar(grammar):
+    """Make grammar the shared one returned to components created from now on"""
+    global _default_grammar
+    _default_grammar = grammar
+
+
+class GrammarWatcher:
+    """
+    Watches the grammar file and hot-swaps the vocabulary when it changes.
+
+    A background thread polls the file's size and mtime; on a change it
+    recompiles in that thread and, if the new grammar compiles, hands it to
+    every subscriber (parsers, mappers, worker pools), each of which builds
+    its own tables off the request path and swaps them in with a single
+    assignment. A broken edit is logged and the old grammar stays in use.
+    """
+
+    def __init__(self, path=None, interval=1.0, cache_dir=None):
+        self.path = path or grammar_path()
+        self.interval = interval
+        self.cache_dir = cache_dir
+        self.grammar = get_grammar() if self.path == grammar_path() else load_grammar(self.path, cache_dir)
+        self.reloads = 0
+        self.last_error = None
+        self.loaded_at = time.time()
+        self._subscribers = []
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Call callback(grammar) after every successful reload"""
+        self._subscribers.append(callback)
+        return callback
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def check(self):
+        """Reload if the file changed since the last check; returns True if a new grammar was swapped in"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        return self.reload()
+
+    def reload(self):
+        """Recompile the grammar file and swap it in; returns True if it changed"""
+        try:
+            with open(self.path, "rb") as f:
+                source = f.read()
+            if hashlib.sha256(source).hexdigest() == self.grammar.source_hash:
+                return False
+            grammar = compile_grammar(source, self.cache_dir)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Keeping the current grammar; {self.path} did not compile: {self.last_error}")
+            return False
+
+        self.grammar = grammar
+        self.reloads += 1
+        self.last_error = None
+        self.loaded_at = time.time()
+        set_grammar(grammar)
+        for callback in self._subscribers:
+            try:
+                callback(grammar)
+            except Exception as e:
+                logger.exception(f"Grammar subscriber {callback!r} failed: {e}")
+        logger.info(f"Reloaded grammar {grammar.source_hash[:12]} from {self.path}")
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="grammar-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def status(self):
+        return {
+            "path": self.path,
+            "version": self.grammar.source_hash[:12],
+            "reloads": self.reloads,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error
+        }
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+import os
+import re
+import time
+import zlib
+import random
+import logging
+import argparse
+
+import numpy as np
+
+from core.grammar import default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Intents produced by the rule-based parsers (see core/grammar.json); "unknown" stands for intent None
+INTENTS = ["create", "set", "add_effect", "set_effect_param", "add_pattern", "import_midi", "ramp",
+           "launch", "start_playing", "stop_playing", "unknown"]
+
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:/[a-z]+)?|\d+%?")
+
+
+def _tokenize(text):
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    # Numbers carry no intent, only their position does
+    return ["<num>" if token[0].isdigit() else token for token in tokens]
+
+
+class HashingIntentClassifier:
+    """
+    Linear intent classifier over hashed word n-gram features.
+
+    Unlike NLPModule (first spaCy VERB) and SimpleNLPModule (first word),
+    it scores every unigram and bigram in the command, so polite phrasing such
+    as "could you please put some reverb on track 2" still resolves. A whole
+    batch is classified with one matrix product. Commands whose best intent
+    scores below `min_confidence` are returned as None rather than guessed.
+    Both parsers fall back on it (their `classifier`) when the verb lookup
+    finds no intent.
+    """
+
+    def __init__(self, n_features=2048, intents=INTENTS, min_confidence=0.4):
+        self.n_features = n_features
+        self.intents = list(intents)
+        self.min_confidence = min_confidence
+        self.weights = np.zeros((n_features, len(self.intents)), dtype=np.float32)
+        self.bias = np.zeros(len(self.intents), dtype=np.float32)
+        self._feature_cache = {}
+
+    def _feature_index(self, feature):
+        index = self._feature_cache.get(feature)
+        if index is None:
+            index = zlib.crc32(feature.encode("utf-8")) % self.n_features
+            self._feature_cache[feature] = index
+        return index
+
+    def _features(self, text):
+        tokens = _tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return [self._feature_index(feature) for feature in features]
+
+    def transform(self, texts):
+        """
+        Build the (batch, n_features) feature matrix for a list of commands
+        """
+        rows = []
+        cols = []
+        for row, text in enumerate(texts):
+            indices = self._features(text)
+            rows.extend([row] * len(indices))
+            cols.extend(indices)
+
+        X = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        np.add.at(X, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+
+        # L2-normalise so long commands don't dominate the logits
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        np.divide(X, norms, out=X, where=norms > 0)
+        return X
+
+    def fit(self, texts, labels, epochs=300, learning_rate=10.0, l2=1e-4):
+        """
+        Train softmax regression with full-batch gradient descent
+        """
+        X = self.transform(texts)
+        label_index = {intent: i for i, intent in enumerate(self.intents)}
+        y = np.array([label_index[label or "unknown"] for label in labels])
+        Y = np.eye(len(self.intents), dtype=np.float32)[y]
+
+        for _ in range(epochs):
+            probabilities = self._softmax(X @ self.weights + self.bias)
+            error = (probabilities - Y) / len(texts)
+            self.weights -= learning_rate * (X.T @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+
+        return self
+
+    def predict_proba(self, texts):
+        """Return intent probabilities, one row per command"""
+        return self._softmax(self.transform(texts) @ self.weights + self.bias)
+
+    def predict_batch(self, texts, min_confidence=None):
+        """
+        Predict intents for a batch of commands; "unknown", and any intent
+        with probability below min_confidence, is returned as None
+        """
+        if not texts:
+            return []
+        min_confidence = self.min_confidence if min_confidence is None else min_confidence
+        probabilities = self.predict_proba(texts)
+        best = np.argmax(probabilities, axis=1)
+        confident = probabilities[np.arange(len(texts)), best] >= min_confidence
+        return [self.intents[i] if sure and self.intents[i] != "unknown" else None
+                for i, sure in zip(best, confident)]
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def save(self, path):
+        np.savez(path, weights=self.weights, bias=self.bias, intents=np.array(self.intents),
+                 n_features=self.n_features, min_confidence=self.min_confidence)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        model = cls(n_features=int(data["n_features"]), intents=[str(i) for i in data["intents"]],
+                    min_confidence=float(data["min_confidence"]) if "min_confidence" in data else 0.4)
+        model.weights = data["weights"]
+        model.bias = data["bias"]
+        return model
+
+    @staticmethod
+    def _softmax(logits):
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+# Training corpus vocabulary
+PREFIXES = ["", "", "", "please", "could you", "could you please", "can you", "can you please",
+            "i want to", "i'd like to", "let's", "go ahead and", "now", "hey", "would you"]
+SUFFIXES = ["", "", "", "please", "for me", "now", "thanks", "right now"]
+INSTRUMENTS = ["piano", "synth", "drums", "bass", "strings", "organ"]
+EFFECTS = ["reverb", "delay", "echo", "compressor", "eq", "chorus"]
+PARAMETERS = ["wet", "dry", "dry/wet", "mix", "amount", "level", "intensity"]
+PATTERNS = ["kick", "four on the floor", "hi hat", "arpeggio", "bassline", "drum"]
+FILES = ["groove", "beat", "chords", "melody", "bassline", "take"]
+UNITS = ["bar", "beat"]
+
+TEMPLATES = {
+    "create": [
+        "create a {type} track", "make a new {type} track", "add a {type} track",
+        "create {type} track with {instrument}", "add {instrument}", "load a {instrument}",
+        "make a {instrument} track", "insert a {type} track", "give me a {instrument}",
+        "new {type} track", "put a {instrument} on a new track", "add a {instrument} instrument",
+    ],
+    "set": [
+        "set tempo to {number}", "change bpm to {number}", "set the tempo to {number} bpm",
+        "make the tempo {number}", "tempo {number}", "adjust tempo to {number}",
+        "change the bpm to {number}", "put the tempo at {number}", "set bpm {number}",
+        "speed it up to {number} bpm", "slow the tempo down to {number}",
+    ],
+    "add_effect": [
+        "add {effect} to track {number}", "put some {effect} on track {number}",
+        "add a {effect} on track {number}", "put {effect} on track {number}",
+        "insert {effect} on track {number}", "throw a {effect} on track {number}",
+        "apply {effect} to track {number}", "add some {effect} to track {number}",
+        "add {effect}", "put a {effect} on it",
+    ],
+    "set_effect_param": [
+        "set {effect} {parameter} to {number}%", "set the {effect} {parameter} to {number}",
+        "change {effect} {parameter} to {number}", "turn the {effect} {parameter} to {number}%",
+        "make the {effect} {parameter} {number}", "adjust {effect} {parameter} to {number}",
+        "put the {effect} {parameter} at {number}%", "{effect} {parameter} {number}",
+    ],
+    "add_pattern": [
+        "add a {pattern} pattern", "add a {pattern} pattern for {number} bars",
+        "add a {pattern} pattern to track {number}", "generate a {pattern} pattern",
+        "write a {pattern} pattern on track {number}", "make a {pattern} pattern for {number} bars",
+        "give me a {pattern} pattern", "program a {pattern} pattern on track {number}",
+    ],
+    "import_midi": [
+        "import {file}.mid", "load {file}.mid into track {number}", "import {file}.mid to track {number}",
+        "import the midi file {file}", "load the {file} midi file", "bring in {file}.mid on track {number}",
+        "import midi {file} into track {number}", "open {file}.mid on track {number}",
+    ],
+    "ramp": [
+        "fade {effect} {parameter} to {number} over {number} bars",
+        "ramp tempo to {number} over {number} beats", "sweep the {effect} {parameter} to {number}",
+        "fade the {effect} {parameter} from {number} to {number}", "ramp the tempo up to {number}",
+        "fade {effect} {parameter} out over {number} bars", "sweep {effect} {parameter} over {number} beats",
+        "gradually ramp {effect} {parameter} to {number}",
+    ],
+    "launch": [
+        "launch scene {number}", "launch scene {number} on the next {unit}", "fire clip {number} on track {number}",
+        "trigger scene {number}", "fire scene {number} in {number} {unit}s",
+        "launch clip {number} on track {number} on the next {unit}", "trigger clip {number} on track {number}",
+        "fire scene {number} now",
+    ],
+    "start_playing": [
+        "start playback", "start playing on the next {unit}", "start the song", "start playback now",
+        "start playing in {number} {unit}s", "start the transport", "start playing",
+        "start the song on the next {unit}",
+    ],
+    "stop_playing": [
+        "stop playback", "stop playing on the next {unit}", "stop the song", "stop now",
+        "stop playback in {number} {unit}s", "stop the transport", "stop playing",
+        "stop the song on the next {unit}",
+    ],
+    "unknown": [
+        "hello there", "what can you do", "play something nice", "undo that", "thank you",
+        "how are you", "stop listening", "never mind", "what time is it", "save the project",
+        "tell me a joke", "open preferences", "remove track {number}", "delete track {number}",
+        "mute track {number}", "solo track {number}", "rename track {number}", "duplicate track {number}",
+    ],
+}
+
+
+def split_templates(templates=TEMPLATES, held_out_every=4):
+    """
+    Split each intent's templates into (training, held out) sets: every
+    `held_out_every`-th template is kept out of training, so evaluation
+    measures phrasings the model has never seen rather than new slot values
+    """
+    training, held_out = {}, {}
+    for intent, phrasings in templates.items():
+        training[intent] = [t for i, t in enumerate(phrasings) if i % held_out_every != held_out_every - 1]
+        held_out[intent] = [t for i, t in enumerate(phrasings) if i % held_out_every == held_out_every - 1]
+    return training, held_out
+
+
+def generate_corpus(n_per_intent=300, seed=0, templates=TEMPLATES):
+    """
+    Generate (command, intent) pairs from templates with polite prefixes/suffixes
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for intent, phrasings in templates.items():
+        for _ in range(n_per_intent):
+            text = rng.choice(phrasings)
+            # Each {number} gets its own value
+            while "{number}" in text:
+                text = text.replace("{number}", str(rng.randint(1, 180)), 1)
+            text = text.format(
+                type=rng.choice(["midi", "audio"]),
+                instrument=rng.choice(INSTRUMENTS),
+                effect=rng.choice(EFFECTS),
+                parameter=rng.choice(PARAMETERS),
+                pattern=rng.choice(PATTERNS),
+                file=rng.choice(FILES),
+                unit=rng.choice(UNITS),
+            )
+            text = " ".join(part for part in (rng.choice(PREFIXES), text, rng.choice(SUFFIXES)) if part)
+            corpus.append((text, None if intent == "unknown" else intent))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def train_default_model(n_per_intent=300, seed=0, templates=TEMPLATES):
+    corpus = generate_corpus(n_per_intent, seed, templates)
+    texts, labels = zip(*corpus)
+    return HashingIntentClassifier().fit(list(texts), list(labels))
+
+
+def default_model_path():
+    return os.environ.get("ABLETONML_INTENT_MODEL") or os.path.join(default_cache_dir(), "intent_model.npz")
+
+
+def load_default_model(path=None):
+    """
+    The model saved at `path` (default_model_path()); when there is none
+    yet, one is trained from every template (a few seconds) and saved there
+    """
+    path = path or default_model_path()
+    try:
+        return HashingIntentClassifier.load(path)
+    except (OSError, KeyError, ValueError):
+        pass
+    model = train_default_model()
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        model.save(path)
+    except OSError as e:
+        logger.warning(f"Could not save the intent model to {path}: {e}")
+    return model
+
+
+def compare(parsers, texts, labels):
+    """
+    Measure accuracy and latency of each named parser on a labelled set
+    """
+    results = {}
+    for name, predict_batch in parsers.items():
+        start = time.perf_counter()
+        predictions = predict_batch(texts)
+        elapsed = time.perf_counter() - start
+        correct = sum(1 for p, label in zip(predictions, labels) if p == label)
+        results[name] = {
+            "accuracy": correct / len(texts),
+            "total_ms": elapsed * 1000,
+            "per_command_us": elapsed / len(texts) * 1e6
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and benchmark the hashed n-gram intent classifier")
+    parser.add_argument("--save", help="write the trained model to this .npz path")
+    parser.add_argument("--test-size", type=int, default=100, help="test commands per intent")
+    args = parser.parse_args()
+
+    from core.simple_nlp import SimpleNLPModule
+
+    # Evaluate on phrasings left out of training, not just new slot values
+    training, held_out = split_templates()
+    start = time.perf_counter()
+    model = train_default_model(templates=training)
+    print(f"Trained in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if args.save:
+        # The saved model learns from every template
+        train_default_model().save(args.save)
+
+    texts, labels = zip(*generate_corpus(args.test_size, seed=1, templates=held_out))
+    texts, labels = list(texts), list(labels)
+
+    simple_nlp = SimpleNLPModule()
+    parsers = {
+        "hashing_classifier (batch)": model.predict_batch,
+        "SimpleNLPModule": lambda batch: [simple_nlp.parse_command(t)["intent"] for t in batch],
+    }
+    try:
+        from core.nlp import NLPModule
+        spacy_nlp = NLPModule()
+        parsers["NLPModule (spaCy)"] = lambda batch: [spacy_nlp.parse_command(t)["intent"] for t in batch]
+    except (ImportError, OSError) as e:
+        print(f"Skipping NLPModule: {e}")
+
+    print(f"\n{'parser':<30}{'accuracy':>10}{'total ms':>12}{'us/cmd':>10}")
+    for name, result in compare(parsers, texts, labels).items():
+        print(f"{name:<30}{result['accuracy']:>10.1%}{result['total_ms']:>12.2f}{result['per_command_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+import time
+import socket
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from core.midi_patterns import encode_message, osc_address
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in ms, roughly log-spaced; the last bucket is open
+RTT_BOUNDS_MS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 250, 500, 1000, 2000)
+
+# A link is degraded while any recent figure is over its threshold
+DEFAULT_THRESHOLDS = {"rtt_p95_ms": 50.0, "jitter_ms": 15.0, "loss_rate": 0.05}
+
+
+def parse_thresholds(spec):
+    """Parse "rtt_p95_ms=30,loss_rate=0.01" over the default alert thresholds"""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = entry.partition("=")
+        if name.strip() not in DEFAULT_THRESHOLDS:
+            raise ValueError(f"Unknown link alert threshold: {name}")
+        thresholds[name.strip()] = float(value)
+    return thresholds
+
+
+TEMPO_QUERY = "/live/song/get/tempo"
+
+
+class OscTempoProbe:
+    """
+    Liveness query sent straight to a rig's AbletonOSC port: one tempo
+    query per call, True once the answer arrives within `timeout`.
+
+    It goes around the controller stack, so the round trip is the link's
+    own rather than including pacer token waits, and a lost probe never
+    counts toward opening the circuit breaker. AbletonOSC answers to the
+    address the query came from; bind `reply_port` for a build that answers
+    on a fixed port instead.
+    """
+
+    def __init__(self, host, port=11000, timeout=1.0, reply_port=0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.query = encode_message(TEMPO_QUERY)
+        self._reply = TEMPO_QUERY.encode("ascii") + b"\0"
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(("0.0.0.0", reply_port))
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self._discard_late_answers()
+            self._socket.sendto(self.query, (self.host, self.port))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._socket.settimeout(remaining)
+                try:
+                    data, _ = self._socket.recvfrom(65536)
+                except socket.timeout:
+                    return False
+                except OSError:
+                    # e.g. ICMP port unreachable while Live isn't running
+                    return False
+                if data.startswith(self._reply):
+                    return True
+
+    def _discard_late_answers(self):
+        # Answers to earlier probes that timed out would be taken for this one's
+        self._socket.setblocking(False)
+        try:
+            while True:
+                self._socket.recvfrom(65536)
+        except OSError:
+            pass
+
+    def close(self):
+        self._socket.close()
+
+
+def probe_for(controller):
+    """
+    The cheapest liveness query for a controller stack: the first ping()
+    down the chain of wrapped controllers (the simulated controller has
+    one), else an AbletonOSC tempo query to the first osc_host/osc_port
+    down the chain (ClipWritingController's) or to osc_address()
+    """
+    address = None
+    inner = controller
+    while inner is not None:
+        if hasattr(inner, "ping"):
+            return inner.ping
+        if address is None and hasattr(inner, "osc_host"):
+            address = (inner.osc_host, inner.osc_port)
+        inner = getattr(inner, "controller", None)
+    return OscTempoProbe(*(address or osc_address()))
+
+
+class LinkStats:
+    """
+    Round-trip statistics for one endpoint in fixed memory.
+
+    The last `window` probes live in two preallocated arrays (RTT and
+    answered/lost), which give the recent percentiles and loss rate; a
+    cumulative histogram over RTT_BOUNDS_MS counts every answer since start
+    for metrics. Jitter is the RFC 3550 running estimate: the mean deviation
+    between consecutive round trips, smoothed by 1/16.
+    """
+
+    def __init__(self, name, window=256, thresholds=None, min_samples=10):
+        self.name = name
+        self.thresholds = dict(thresholds or DEFAULT_THRESHOLDS)
+        self.min_samples = min_samples
+        self.rtts = np.full(window, np.nan)
+        self.answered = np.zeros(window, dtype=bool)
+        self.bounds = np.array(RTT_BOUNDS_MS)
+        self.counts = np.zeros(len(RTT_BOUNDS_MS) + 1, dtype=np.int64)
+        self.rtt_sum = 0.0
+        self.sent = 0
+        self.lost = 0
+        self.jitter = 0.0
+        self.last_rtt = None
+        self.degraded = False
+        self._lock = threading.Lock()
+
+    def record(self, rtt_ms):
+        """Record a probe: its round trip in ms, or None if it was lost"""
+        with self._lock:
+            slot = self.sent % len(self.rtts)
+            self.sent += 1
+            if rtt_ms is None:
+                self.lost += 1
+                self.rtts[slot] = np.nan
+                self.answered[slot] = False
+                return
+            self.rtts[slot] = rtt_ms
+            self.answered[slot] = True
+            self.counts[np.searchsorted(self.bounds, rtt_ms)] += 1
+            self.rtt_sum += rtt_ms
+            if self.last_rtt is not None:
+                self.jitter += (abs(rtt_ms - self.last_rtt) - self.jitter) / 16
+            self.last_rtt = rtt_ms
+
+    def recent(self):
+        """RTT percentiles and loss rate over the last `window` probes"""
+        with self._lock:
+            filled = min(self.sent, len(self.rtts))
+            rtts = self.rtts[:filled][self.answered[:filled]]
+            loss_rate = 1 - len(rtts) / filled if filled else 0.0
+        figures = {"samples": filled, "loss_rate": loss_rate, "jitter_ms": self.jitter}
+        if len(rtts):
+            p50, p95, p99 = np.percentile(rtts, [50, 95, 99]).tolist()
+            figures.update({"rtt_min_ms": float(rtts.min()), "rtt_p50_ms": p50, "rtt_p95_ms": p95,
+                            "rtt_p99_ms": p99, "rtt_max_ms": float(rtts.max())})
+        return figures
+
+    def alerts(self, figures=None):
+        """The recent figures over their thresholds (none until min_samples probes)"""
+        figures = figures or self.recent()
+        if figures["samples"] < self.min_samples:
+            return []
+        return [{"metric": metric, "value": figures[metric], "threshold": threshold}
+                for metric, threshold in self.thresholds.items()
+                if figures.get(metric) is not None and figures[metric] > threshold]
+
+    def status(self):
+        figures = self.recent()
+        return dict(figures, endpoint=self.name, sent=self.sent, lost=self.lost, last_rtt_ms=self.last_rtt,
+                    degraded=self.degraded, alerts=self.alerts(figures))
+
+
+class LinkProber:
+    """
+    Probes every registered endpoint every `interval` seconds from one
+    thread. Each probe runs on a small pool and counts as lost if it doesn't
+    answer within `timeout`; an endpoint whose last probe is still stuck is
+    not probed again until it returns, so a dead link can't pile up threads.
+    on_alert(name, degraded, alerts) is called when a link becomes degraded
+    or recovers.
+    """
+
+    def __init__(self, interval=2.0, timeout=1.0, thresholds=None, window=256, on_alert=None):
+        self.interval = interval
+        self.timeout = timeout
+        self.thresholds = thresholds
+        self.window = window
+        self.on_alert = on_alert
+        self.links = {}
+        self._probes = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="link-probe")
+        self._thread = None
+
+    def add(self, name, probe):
+        with self._lock:
+            self._probes[name] = probe
+            self.links[name] = LinkStats(name, self.window, self.thresholds)
+        return self.links[name]
+
+    def remove(self, name):
+        with self._lock:
+            probe = self._probes.pop(name, None)
+            self.links.pop(name, None)
+        if hasattr(probe, "close"):
+            probe.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="link-prober")
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe_all()
+            self._stop.wait(self.interval)
+
+    def probe_all(self):
+        """Send one probe to every endpoint and wait (up to timeout) for the answers"""
+        with self._lock:
+            probes = list(self._probes.items())
+        started = {}
+        for name, probe in probes:
+            in_flight = self._in_flight.get(name)
+            if in_flight is not None and not in_flight.done():
+                # Still stuck on an earlier probe: that's another lost one
+                self._record(name, None)
+                continue
+            started[name] = self._in_flight[name] = self._pool.submit(self._timed, probe)
+        deadline = time.perf_counter() + self.timeout
+        for name, future in started.items():
+            try:
+                rtt = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except Exception:
+                rtt = None
+            self._record(name, rtt)
+
+    def _record(self, name, rtt):
+        link = self.links.get(name)
+        if link is not None:
+            link.record(rtt)
+            self._check(link)
+
+    def _timed(self, probe):
+        start = time.perf_counter()
+        if probe() is False:
+            raise RuntimeError("probe failed")
+        return (time.perf_counter() - start) * 1000
+
+    def _check(self, link):
+        alerts = link.alerts()
+        if bool(alerts) == link.degraded:
+            return
+        link.degraded = bool(alerts)
+        if link.degraded:
+            logger.warning(f"Link to {link.name} degraded: " +
+                           ", ".join(f"{a['metric']} {a['value']:.3g} > {a['threshold']:.3g}" for a in alerts))
+        else:
+            logger.info(f"Link to {link.name} recovered")
+        if self.on_alert:
+            try:
+                self.on_alert(link.name, link.degraded, alerts)
+            except Exception as e:
+                logger.warning(f"Link alert callback failed: {e}")
+
+    def status(self):
+        with self._lock:
+            links = list(self.links.values())
+        return {link.name: link.status() for link in links}
+
+    def metrics(self):
+        """Prometheus text exposition of every link's histogram, jitter and loss"""
+        with self._lock:
+            links = list(self.links.values())
+        lines = ["# TYPE abletonml_link_rtt_ms histogram"]
+        for link in links:
+            label = f'endpoint="{link.name}"'
+            cumulative = np.cumsum(link.counts).tolist()
+            for bound, count in zip(RTT_BOUNDS_MS, cumulative):
+                lines.append(f'abletonml_link_rtt_ms_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'abletonml_link_rtt_ms_bucket{{{label},le="+Inf"}} {cumulative[-1]}')
+            lines.append(f"abletonml_link_rtt_ms_sum{{{label}}} {link.rtt_sum}")
+            lines.append(f"abletonml_link_rtt_ms_count{{{label}}} {cumulative[-1]}")
+        for metric, kind, value in (("jitter_ms", "gauge", lambda link: link.jitter),
+                                    ("probes_sent", "counter", lambda link: link.sent),
+                                    ("probes_lost", "counter", lambda link: link.lost),
+                                    ("loss_rate", "gauge", lambda link: link.recent()["loss_rate"]),
+                                    ("degraded", "gauge", lambda link: int(link.degraded))):
+            lines.append(f"# TYPE abletonml_link_{metric} {kind}")
+            lines.extend(f'abletonml_link_{metric}{{endpoint="{link.name}"}} {value(link)}' for link in links)
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False)
+        with self._lock:
+            probes = list(self._probes.values())
+        for probe in probes:
+            if hasattr(probe, "close"):
+                probe.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe simulated links and show their latency figures")
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    def simulated_link(base, spread, loss, seed):
+        rng = np.random.default_rng(seed)
+
+        def probe():
+            if rng.random() < loss:
+                return False
+            time.sleep(base + rng.exponential(spread))
+            return True
+        return probe
+
+    links = {"healthy": simulated_link(0.002, 0.0005, 0.0, 1),
+             "jittery": simulated_link(0.004, 0.02, 0.0, 2),
+             "lossy": simulated_link(0.003, 0.001, 0.1, 3)}
+    prober = LinkProber(interval=args.interval, timeout=0.1)
+    for name, probe in links.items():
+        prober.add(name, probe)
+    start = time.perf_counter()
+    for _ in range(args.probes):
+        prober.probe_all()
+    elapsed = time.perf_counter() - start
+    for name, status in prober.status().items():
+        print(f"{name:8s} p50 {status['rtt_p50_ms']:6.2f} ms  p95 {status['rtt_p95_ms']:6.2f} ms  "
+              f"jitter {status['jitter_ms']:5.2f} ms  loss {status['loss_rate'] * 100:4.1f}%  "
+              f"{'DEGRADED ' + ', '.join(a['metric'] for a in status['alerts']) if status['degraded'] else 'ok'}")
+    stats = prober.links["healthy"]
+    memory = stats.rtts.nbytes + stats.answered.nbytes + stats.counts.nbytes
+    print(f"{args.probes * len(links)} probes in {elapsed:.2f}s; {memory} bytes of samples per link, "
+          f"whatever the uptime")
+    prober.close()
+
+
+if __name__ == "__main__":
+    main()
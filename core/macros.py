@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+from core.grammar import default_data_dir, get_grammar
+
+logger = logging.getLogger(__name__)
+
+# "{wet}" in a macro step refers to the macro parameter "wet"
+PLACEHOLDER = re.compile(r"\{([a-z_][a-z0-9_]*)\}")
+
+# Grammar slot that validates each action parameter a macro may substitute
+PARAM_SLOTS = {
+    ("create_track", "type"): "track_type",
+    ("add_instrument", "instrument"): "instrument",
+    ("add_instrument", "track"): "track_number",
+    ("add_effect", "effect_type"): "effect",
+    ("add_effect", "track"): "track_number",
+    ("set_tempo", "value"): "tempo",
+    ("set_effect_param", "effect"): "effect",
+    ("set_effect_param", "parameter"): "parameter",
+    ("set_effect_param", "value"): "value",
+    ("add_pattern", "pattern"): "pattern",
+    ("add_pattern", "bars"): "bars",
+    ("add_pattern", "track"): "track_number",
+    ("import_midi", "track"): "track_number",
+}
+
+# Actions a batch can carry; ramps run on the ramp scheduler, not in Live
+BATCHABLE = {action for action, _ in PARAM_SLOTS}
+
+
+def slot_is_valid(grammar, slot, value):
+    """Check a value against an enumerated or numeric grammar slot"""
+    allowed = grammar.values(slot)
+    if allowed:
+        return value in allowed
+    try:
+        return grammar.is_valid(slot, value)
+    except TypeError:
+        return False
+
+
+class Macro:
+    """
+    A named action batch with parameters, compiled once.
+
+    The action template is validated when the macro is defined, so invoking
+    the macro only substitutes and range-checks the parameter values: no
+    parsing and no mapping. Actions without parameters are shared between
+    invocations rather than copied.
+    """
+
+    def __init__(self, name, parameters, actions, steps=None, grammar=None):
+        self.name = name
+        # {name: default value}
+        self.parameters = dict(parameters)
+        # Action dicts whose param values may be {"$param": name}
+        self.actions = actions
+        self.steps = steps or []
+        self.grammar = grammar or get_grammar()
+        self._compile()
+
+    def _compile(self):
+        self.bindings = []
+        self._static = []
+        for index, action in enumerate(self.actions):
+            action_type = action.get("action")
+            if action_type not in BATCHABLE:
+                raise ValueError(f"Macro {self.name!r}: {action_type!r} actions can't be batched")
+            static = {"action": action_type, "params": {}}
+            for key, value in action.get("params", {}).items():
+                if isinstance(value, dict) and "$param" in value:
+                    parameter = value["$param"]
+                    if parameter not in self.parameters:
+                        raise ValueError(f"Macro {self.name!r}: unknown parameter {parameter!r}")
+                    self.bindings.append((index, key, parameter, PARAM_SLOTS.get((action_type, key))))
+                    static["params"][key] = None
+                else:
+                    static["params"][key] = value
+            self._static.append(static)
+        # Every parameter must be used, and the defaults must be valid
+        unused = set(self.parameters) - {parameter for _, _, parameter, _ in self.bindings}
+        if unused:
+            raise ValueError(f"Macro {self.name!r}: parameters not used by any step: {sorted(unused)}")
+        self.validate(self.parameters)
+
+    def values_for(self, values=None):
+        """Defaults overlaid with the given values; unknown names are an error"""
+        values = values or {}
+        unknown = set(values) - set(self.parameters)
+        if unknown:
+            raise ValueError(f"Macro {self.name!r} has no parameter {sorted(unknown)[0]!r}")
+        merged = dict(self.parameters)
+        merged.update(values)
+        return merged
+
+    def validate(self, values):
+        for index, key, parameter, slot in self.bindings:
+            if slot and not slot_is_valid(self.grammar, slot, values[parameter]):
+                raise ValueError(f"Macro {self.name!r}: invalid {parameter} {values[parameter]!r}")
+
+    def bind(self, values=None):
+        """Return the batch action with parameters substituted"""
+        values = self.values_for(values)
+        self.validate(values)
+        actions = list(self._static)
+        for index, key, parameter, _ in self.bindings:
+            if actions[index] is self._static[index]:
+                actions[index] = {"action": actions[index]["action"], "params": dict(actions[index]["params"])}
+            actions[index]["params"][key] = values[parameter]
+        return {"action": "batch", "params": {"macro": self.name, "actions": actions}}
+
+    def to_dict(self):
+        return {"name": self.name, "parameters": self.parameters, "actions": self.actions, "steps": self.steps}
+
+    @classmethod
+    def from_dict(cls, data, grammar=None):
+        return cls(data["name"], data.get("parameters", {}), data["actions"], data.get("steps"), grammar)
+
+
+def _same_value(default, value):
+    numbers = (int, float)
+    if isinstance(default, numbers) and isinstance(value, numbers):
+        return not isinstance(default, bool) and not isinstance(value, bool) and default == value
+    if isinstance(default, str) and isinstance(value, str):
+        return default.lower() == value.lower()
+    return False
+
+
+def _bind_parameters(action, step_parameters, values):
+    """Replace the action params produced by a step's placeholders with {"$param": name}"""
+    params = dict(action.get("params", {}))
+    for key, value in params.items():
+        matches = [name for name in set(step_parameters) if _same_value(values[name], value)]
+        if len(matches) > 1:
+            raise ValueError(f"Parameters {matches} have the same default; give them different defaults")
+        if matches:
+            params[key] = {"$param": matches[0]}
+    return {"action": action["action"], "params": params}
+
+
+def compile_macro(name, steps, parameters, nlp, mapper):
+    """
+    Build a Macro from steps, each a command ("set reverb wet to {wet}") or
+    an action dict. Commands are parsed and mapped once, here, with the
+    parameter defaults filled in; the action params that took a default's
+    value become that parameter's substitution points.
+    """
+    actions = []
+    for step in steps:
+        if isinstance(step, dict):
+            step_actions = [step] if "action" in step else step.get("actions", [])
+            for action in step_actions:
+                if not isinstance(action, dict) or not isinstance(action.get("action"), str):
+                    raise ValueError(f"Invalid action in macro {name!r}: {action!r}")
+                params = {}
+                for key, value in action.get("params", {}).items():
+                    match = PLACEHOLDER.fullmatch(value) if isinstance(value, str) else None
+                    params[key] = {"$param": match.group(1)} if match else value
+                actions.append({"action": action["action"], "params": params})
+            continue
+
+        step_parameters = PLACEHOLDER.findall(step)
+        missing = [parameter for parameter in step_parameters if parameter not in parameters]
+        if missing:
+            raise ValueError(f"Macro {name!r}: no default for {missing[0]!r} in {step!r}")
+        command = PLACEHOLDER.sub(lambda match: str(parameters[match.group(1)]), step)
+        step_actions = mapper.map_to_actions(nlp.parse_command(command))
+        if not step_actions:
+            raise ValueError(f"Macro {name!r}: could not understand {command!r}")
+        bound = [_bind_parameters(action, step_parameters, parameters) for action in step_actions]
+        used = {value["$param"] for action in bound for value in action["params"].values()
+                if isinstance(value, dict) and "$param" in value}
+        lost = [parameter for parameter in step_parameters if parameter not in used]
+        if lost:
+            raise ValueError(f"Macro {name!r}: {lost[0]!r} in {step!r} doesn't reach any action parameter")
+        actions.extend(bound)
+    return Macro(name, parameters, actions, steps=list(steps), grammar=mapper.grammar)
+
+
+def default_macro_path():
+    """Macros are user data, so they live in the data directory, not the cache"""
+    return os.environ.get("ABLETONML_MACROS") or os.path.join(default_data_dir(), "macros.json")
+
+
+class MacroLibrary:
+    """
+    Named macros, stored as compiled action templates in a JSON file so
+    loading them never runs the parser. Invocations are matched by name
+    ("vocal chain wet 40 track 3") before the command reaches the NLP.
+    """
+
+    def __init__(self, path=None, grammar=None):
+        self.path = path
+        self.grammar = grammar or get_grammar()
+        self.macros = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for data in json.load(f):
+                    try:
+                        macro = Macro.from_dict(data, self.grammar)
+                    except (KeyError, ValueError) as e:
+                        logger.warning(f"Skipping stored macro {data.get('name')!r}: {e}")
+                        continue
+                    self.macros[macro.name] = macro
+
+    def use_grammar(self, grammar):
+        """Validate macro values against a reloaded grammar from now on"""
+        self.grammar = grammar
+        for macro in list(self.macros.values()):
+            macro.grammar = grammar
+
+    def __len__(self):
+        return len(self.macros)
+
+    def __contains__(self, name):
+        return name in self.macros
+
+    def get(self, name):
+        return self.macros.get(name)
+
+    def define(self, name, steps, parameters, nlp, mapper):
+        name = " ".join(name.lower().split())
+        if not name:
+            raise ValueError("Macro name must not be empty")
+        macro = compile_macro(name, steps, parameters or {}, nlp, mapper)
+        with self._lock:
+            self.macros[name] = macro
+            self._save()
+        return macro
+
+    def remove(self, name):
+        with self._lock:
+            removed = self.macros.pop(name, None)
+            self._save()
+        return removed is not None
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([macro.to_dict() for macro in self.macros.values()], f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def match(self, command):
+        """
+        Return (macro, values) when a command invokes a macro, else None.
+        Arguments are "name value" pairs after the macro name, optionally
+        introduced by "with" and separated by "and".
+        """
+        words = command.lower().replace(",", " ").split()
+        for length in range(len(words), 0, -1):
+            macro = self.macros.get(" ".join(words[:length]))
+            if macro is None:
+                continue
+            rest = [word for word in words[length:] if word not in ("with", "and", "=", "to")]
+            if len(rest) % 2:
+                return None
+            values = {}
+            for parameter, value in zip(rest[::2], rest[1::2]):
+                try:
+                    number = float(value)
+                    values[parameter] = int(number) if number.is_integer() else number
+                except ValueError:
+                    values[parameter] = value
+            return macro, values
+        return None
+
+    def invoke(self, controller, name, values=None):
+        """Send the macro's batch to a controller in one call"""
+        macro = self.macros.get(name)
+        if macro is None:
+            raise ValueError(f"Unknown macro: {name}")
+        return controller.execute_action(macro.bind(values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark macro invocation against parsing each step")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    from core.simple_nlp import SimpleNLPModule
+    from core.action_mapper import ActionMapper
+    from core.simulated_controller import SimulatedController
+
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+    steps = ["create audio track", "add compressor to track {track}", "add reverb to track {track}",
+             "set reverb wet to {wet}"]
+    library = MacroLibrary()
+    macro = library.define("vocal chain", steps, {"track": 1, "wet": 30}, nlp, mapper)
+    print(f"Compiled {macro.name!r}: {len(macro.actions)} actions, {len(macro.bindings)} substitutions")
+
+    commands = [step.format(track=1, wet=40) for step in steps]
+    controller = SimulatedController(latency=0.002)
+    start = time.perf_counter()
+    for _ in range(args.runs // 10):
+        for command in commands:
+            for action in mapper.map_to_actions(nlp.parse_command(command)):
+                controller.execute_action(action)
+    per_step = (time.perf_counter() - start) / (args.runs // 10)
+
+    controller = SimulatedController(latency=0.002)
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        library.invoke(controller, "vocal chain", {"wet": 40})
+    per_macro = (time.perf_counter() - start) / args.runs
+
+    print(f"Step by step (parse, map, {len(macro.actions)} sends at 2 ms): {per_step * 1000:.2f} ms")
+    print(f"Macro (one batch send at 2 ms):                  {per_macro * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+import os
+import re
+import time
+import struct
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from core.midi_patterns import MAX_DATAGRAM, ClipNoteWriter, NoteArray
+
+logger = logging.getLogger(__name__)
+
+# Notes per batch handed to the clip writer; memory use is bounded by this,
+# the read block and the number of notes sounding at once
+DEFAULT_BATCH = 4096
+READ_BLOCK = 64 * 1024
+
+
+def resolve_midi_path(name):
+    """
+    Map a spoken file name to a file in ABLETONML_MIDI_DIR (or the working
+    directory); names are restricted so they can't escape the directory
+    """
+    if not re.fullmatch(r"[A-Za-z0-9_. -]{1,128}", name) or name.startswith("."):
+        raise ValueError(f"Invalid MIDI file name: {name}")
+    directory = os.path.realpath(os.environ.get("ABLETONML_MIDI_DIR") or os.getcwd())
+    path = os.path.realpath(os.path.join(directory, name))
+    # A symlink in the directory could still point elsewhere
+    if os.path.dirname(path) != directory:
+        raise ValueError(f"{name} is outside the MIDI directory")
+    return path
+
+
+def _read_varlen(buffer, pos):
+    value = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+class MidiFileStream:
+    """
+    Read the notes of a Standard MIDI File incrementally.
+
+    mido.MidiFile parses every track into message lists up front, which for
+    multi-megabyte orchestral files costs far more memory than the file
+    itself. This reader walks the chunks in fixed-size blocks, pairs note-ons
+    with note-offs per track and channel, and yields notes in batches with
+    ticks already converted to beats.
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH, block_size=READ_BLOCK):
+        self.path = path
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self.notes_read = 0
+
+        with open(path, "rb") as f:
+            chunk_type, length = struct.unpack(">4sI", f.read(8))
+            if chunk_type != b"MThd":
+                raise ValueError(f"{path} is not a Standard MIDI File")
+            self.format, self.track_count, division = struct.unpack(">HHH", f.read(6))
+        if division & 0x8000:
+            raise ValueError("SMPTE time division is not supported")
+        self.ticks_per_beat = division
+        self._header_length = 8 + length
+
+    @property
+    def progress(self):
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+    def batches(self):
+        """Yield (midi track number, NoteArray) batches of at most batch_size notes"""
+        with open(self.path, "rb") as f:
+            f.seek(self._header_length)
+            self.bytes_read = self._header_length
+            track = 0
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    break
+                chunk_type, length = struct.unpack(">4sI", header)
+                self.bytes_read += 8
+                if chunk_type != b"MTrk":
+                    # Unknown chunks must be skipped, per the spec
+                    f.seek(length, os.SEEK_CUR)
+                    self.bytes_read += length
+                    continue
+                for batch in self._track_batches(f, length):
+                    yield track, batch
+                track += 1
+
+    def _track_batches(self, f, length):
+        remaining = length
+        buffer = b""
+        pos = 0
+        tick = 0
+        status = None
+        sounding = {}
+        pitch, start, duration, velocity = [], [], [], []
+
+        while True:
+            event_start = pos
+            try:
+                delta, pos = _read_varlen(buffer, pos)
+                byte = buffer[pos]
+                if byte >= 0x80:
+                    status = byte
+                    pos += 1
+                elif status is None:
+                    raise ValueError("Running status without a preceding status byte")
+
+                if status == 0xFF:
+                    meta_type = buffer[pos]
+                    meta_length, pos = _read_varlen(buffer, pos + 1)
+                    pos += meta_length
+                    if pos > len(buffer):
+                        raise IndexError
+                    if meta_type == 0x2F:
+                        tick += delta
+                        break
+                    status = None
+                elif status in (0xF0, 0xF7):
+                    sysex_length, pos = _read_varlen(buffer, pos)
+                    pos += sysex_length
+                    if pos > len(buffer):
+                        raise IndexError
+                    status = None
+                else:
+                    kind = status & 0xF0
+                    if kind in (0xC0, 0xD0):
+                        pos += 1
+                        if pos > len(buffer):
+                            raise IndexError
+                    else:
+                        note, level = buffer[pos], buffer[pos + 1]
+                        pos += 2
+                        if kind == 0x90 and level:
+                            sounding.setdefault((status & 0x0F, note), []).append((tick + delta, level))
+                        elif kind == 0x80 or kind == 0x90:
+                            started = sounding.get((status & 0x0F, note))
+                            if started:
+                                on_tick, on_level = started.pop(0)
+                                pitch.append(note)
+                                start.append(on_tick)
+                                duration.append(tick + delta - on_tick)
+                                velocity.append(on_level)
+                tick += delta
+            except IndexError:
+                # The event runs past the buffered bytes: keep its start and read more
+                if not remaining:
+                    break
+                block = f.read(min(self.block_size, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                self.bytes_read += len(block)
+                buffer = buffer[event_start:] + block
+                pos = 0
+                continue
+
+            if len(pitch) >= self.batch_size:
+                yield self._flush(pitch, start, duration, velocity)
+                pitch, start, duration, velocity = [], [], [], []
+
+        # Notes never released end at the end of the track
+        for (channel, note), started in sounding.items():
+            for on_tick, on_level in started:
+                pitch.append(note)
+                start.append(on_tick)
+                duration.append(tick - on_tick)
+                velocity.append(on_level)
+        if pitch:
+            yield self._flush(pitch, start, duration, velocity)
+
+        # Skip anything left after the end-of-track event
+        if remaining:
+            f.seek(remaining, os.SEEK_CUR)
+            self.bytes_read += remaining
+
+    def _flush(self, pitch, start, duration, velocity):
+        # Ticks are collected as ints and converted to beats a batch at a time
+        self.notes_read += len(pitch)
+        return NoteArray(pitch, np.asarray(start) / self.ticks_per_beat,
+                         np.asarray(duration) / self.ticks_per_beat, velocity)
+
+
+class MidiImporter:
+    """
+    Stream a MIDI file into one Live clip through AbletonOSC: notes go out in
+    packed datagrams batch by batch while the file is still being read, and
+    the clip is extended to the file's length at the end.
+    """
+
+    def __init__(self, send, batch_size=DEFAULT_BATCH, max_datagram=MAX_DATAGRAM):
+        self.writer = ClipNoteWriter(send, max_datagram)
+        self.batch_size = batch_size
+
+    def import_file(self, path, track_index, clip_index=0, progress=None):
+        """
+        Import every note of the file into a clip slot (0-based indices).
+        progress(fraction, notes) is called after each batch.
+        """
+        stream = MidiFileStream(path, self.batch_size)
+        datagrams = 0
+        end = 0.0
+        first = True
+        for _, notes in stream.batches():
+            # Create the clip with the first batch; its length is only known at the end
+            datagrams += self.writer.write(track_index, clip_index, notes, length=4.0, create_clip=first)
+            first = False
+            end = max(end, notes.end)
+            if progress is not None:
+                progress(stream.progress, stream.notes_read)
+
+        length = max(4.0, float(np.ceil(end / 4.0) * 4.0))
+        if not first:
+            datagrams += self.writer.set_length(track_index, clip_index, length)
+        return {
+            "notes": stream.notes_read,
+            "datagrams": datagrams,
+            "length": length,
+            "tracks": stream.track_count
+        }
+
+
+def generate_midi_file(path, tracks=16, notes_per_track=20000, ticks_per_beat=480):
+    """Write a large multi-track MIDI file with mido, for benchmarks and tests"""
+    import mido
+
+    rng = np.random.default_rng(0)
+    midi = mido.MidiFile(ticks_per_beat=ticks_per_beat)
+    for number in range(tracks):
+        track = mido.MidiTrack()
+        track.append(mido.MetaMessage("track_name", name=f"Part {number + 1}"))
+        channel = number % 16
+        gaps = rng.integers(0, ticks_per_beat, notes_per_track)
+        lengths = rng.integers(ticks_per_beat // 8, ticks_per_beat, notes_per_track)
+        pitches = rng.integers(36, 96, notes_per_track)
+        for gap, note_length, note in zip(gaps.tolist(), lengths.tolist(), pitches.tolist()):
+            track.append(mido.Message("note_on", channel=channel, note=note, velocity=100, time=gap))
+            track.append(mido.Message("note_off", channel=channel, note=note, velocity=0, time=note_length))
+        midi.tracks.append(track)
+    midi.save(path)
+
+
+def _peak_memory(function):
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming MIDI import")
+    parser.add_argument("--tracks", type=int, default=16)
+    parser.add_argument("--notes", type=int, default=20000, help="notes per track")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH)
+    args = parser.parse_args()
+
+    import mido
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benchmark.mid")
+        generate_midi_file(path, args.tracks, args.notes)
+        size_mb = os.path.getsize(path) / 1e6
+
+        def streaming_import():
+            # Encode everything but drop the datagrams; send cost is measured in midi_patterns
+            return MidiImporter(lambda datagram: None, args.batch).import_file(path, track_index=0)
+
+        # Time without tracemalloc, which slows allocation-heavy code down a lot
+        start = time.perf_counter()
+        summary = streaming_import()
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        mido.MidiFile(path)
+        mido_elapsed = time.perf_counter() - start
+
+        streaming_peak = _peak_memory(streaming_import)
+        mido_peak = _peak_memory(lambda: mido.MidiFile(path))
+
+    print(f"{size_mb:.1f} MB file, {summary['notes']} notes in {summary['tracks']} tracks")
+    print(f"  streaming import: {elapsed:.2f} s ({summary['notes'] / elapsed:,.0f} notes/s), "
+          f"{summary['datagrams']} datagrams, peak {streaming_peak / 1e6:.1f} MB")
+    print(f"  mido.MidiFile load only: {mido_elapsed:.2f} s, peak {mido_peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
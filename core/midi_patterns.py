@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+import os
+import time
+import socket
+import logging
+import argparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NOTE_OFFSETS = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+SCALES = {
+    "major": (0, 2, 4, 5, 7, 9, 11),
+    "minor": (0, 2, 3, 5, 7, 8, 10)
+}
+
+# General MIDI drum map, which Live's Drum Racks follow
+KICK = 36
+CLOSED_HAT = 42
+
+# macOS caps UDP datagrams at 9216 bytes by default; stay under it
+MAX_DATAGRAM = 8192
+
+# One note on the wire: int32 pitch, float32 start, float32 duration,
+# float32 velocity, int32 mute (big-endian, as OSC requires)
+NOTE_DTYPE = np.dtype([
+    ("pitch", ">i4"),
+    ("start", ">f4"),
+    ("duration", ">f4"),
+    ("velocity", ">f4"),
+    ("mute", ">i4")
+])
+NOTE_TAGS = b"ifffi"
+
+
+def parse_note_name(text, octave=3):
+    """
+    Return the MIDI pitch for a note name such as "c", "f#", "eb" or "a4",
+    or None if text is not a note name (octave 3 puts C at 60)
+    """
+    text = text.strip().lower()
+    if not text or text[0] not in NOTE_OFFSETS:
+        return None
+    pitch = NOTE_OFFSETS[text[0]]
+    rest = text[1:]
+    if rest[:1] in ("#", "b") and (len(rest) == 1 or rest[1:].lstrip("-").isdigit()):
+        pitch += 1 if rest[0] == "#" else -1
+        rest = rest[1:]
+    if rest:
+        if not rest.lstrip("-").isdigit():
+            return None
+        octave = int(rest)
+    return pitch + (octave + 2) * 12
+
+
+class NoteArray:
+    """
+    MIDI notes as parallel columns: pitch, start and duration (in beats) and
+    velocity. Patterns are built and shifted as whole arrays, never note by note.
+    """
+
+    def __init__(self, pitch=(), start=(), duration=(), velocity=()):
+        self.pitch = np.asarray(pitch, dtype=np.int32)
+        self.start = np.asarray(start, dtype=np.float64)
+        self.duration = np.asarray(duration, dtype=np.float64)
+        self.velocity = np.asarray(velocity, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.pitch)
+
+    @classmethod
+    def concatenate(cls, arrays):
+        arrays = list(arrays)
+        return cls(
+            np.concatenate([a.pitch for a in arrays]) if arrays else (),
+            np.concatenate([a.start for a in arrays]) if arrays else (),
+            np.concatenate([a.duration for a in arrays]) if arrays else (),
+            np.concatenate([a.velocity for a in arrays]) if arrays else ()
+        )
+
+    def shifted(self, beats):
+        return NoteArray(self.pitch, self.start + beats, self.duration, self.velocity)
+
+    @property
+    def end(self):
+        """Beat at which the last note stops sounding"""
+        return float((self.start + self.duration).max()) if len(self) else 0.0
+
+    def to_records(self):
+        """Pack the columns into one big-endian record array ready for OSC"""
+        records = np.empty(len(self), dtype=NOTE_DTYPE)
+        records["pitch"] = self.pitch
+        records["start"] = self.start
+        records["duration"] = self.duration
+        records["velocity"] = self.velocity
+        records["mute"] = 0
+        return records
+
+
+def _grid(bars, step, beats_per_bar):
+    return np.arange(0, bars * beats_per_bar, step, dtype=np.float64)
+
+
+def four_on_the_floor(bars=4, pitch=KICK, velocity=110, beats_per_bar=4):
+    """A kick on every beat"""
+    start = _grid(bars, 1.0, beats_per_bar)
+    return NoteArray(np.full(len(start), pitch), start, np.full(len(start), 0.25), np.full(len(start), velocity))
+
+
+def hi_hats(bars=4, pitch=CLOSED_HAT, velocity=90, beats_per_bar=4):
+    """Eighth-note hats with the off-beats accented"""
+    start = _grid(bars, 0.5, beats_per_bar)
+    accents = np.where(np.arange(len(start)) % 2 == 1, velocity, velocity * 0.7)
+    return NoteArray(np.full(len(start), pitch), start, np.full(len(start), 0.125), accents)
+
+
+def arpeggio(root="c", scale="minor", bars=4, step=0.25, octaves=2, velocity=100, beats_per_bar=4):
+    """
+    An up-down arpeggio over the root, third and fifth of a scale, cycling
+    through `octaves` octaves in steps of `step` beats
+    """
+    root_pitch = parse_note_name(root) if isinstance(root, str) else root
+    if root_pitch is None:
+        raise ValueError(f"Unknown root note: {root}")
+    degrees = np.asarray(SCALES[scale])[[0, 2, 4]]
+    ladder = (degrees[None, :] + 12 * np.arange(octaves)[:, None]).ravel()
+    ladder = np.append(ladder, 12 * octaves)
+    cycle = np.concatenate([ladder, ladder[-2:0:-1]])
+
+    start = _grid(bars, step, beats_per_bar)
+    pitch = root_pitch + cycle[np.arange(len(start)) % len(cycle)]
+    return NoteArray(pitch, start, np.full(len(start), step * 0.9), np.full(len(start), velocity))
+
+
+PATTERNS = {
+    "four-on-the-floor": lambda params: four_on_the_floor(params.get("bars", 4)),
+    "hi-hats": lambda params: hi_hats(params.get("bars", 4)),
+    "arpeggio": lambda params: arpeggio(params.get("root", "c"), params.get("scale", "minor"), params.get("bars", 4))
+}
+
+
+def render_pattern(params):
+    """Generate the notes for an add_pattern action's params"""
+    pattern = params.get("pattern")
+    if pattern not in PATTERNS:
+        raise ValueError(f"Unknown pattern: {pattern}")
+    return PATTERNS[pattern](params)
+
+
+def join_pattern_names(words, patterns):
+    """Rejoin hyphenated pattern names said with spaces: "four on the floor" -> "four-on-the-floor" """
+    joined = list(words)
+    for pattern in patterns:
+        parts = pattern.split("-")
+        if len(parts) < 2:
+            continue
+        for i in range(len(joined) - len(parts), -1, -1):
+            if joined[i:i + len(parts)] == parts:
+                joined[i:i + len(parts)] = [pattern]
+    return joined
+
+
+def extract_pattern_parameters(words, grammar):
+    """
+    Pull pattern, root, scale, bar count and track number out of the
+    normalized words of an "add ... pattern" command
+    """
+    parameters = {}
+    patterns = grammar.values("pattern")
+    scales = grammar.values("scale")
+    for i, word in enumerate(words):
+        if word in patterns:
+            parameters["pattern"] = word
+        if word in scales:
+            parameters["scale"] = word
+            # "add a minor arpeggio": that "a" is the article, unless one precedes it ("an a minor")
+            if i > 0 and parse_note_name(words[i - 1]) is not None and (
+                    words[i - 1] != "a" or (i > 1 and words[i - 2] in ("a", "an", "the"))):
+                parameters["root"] = words[i - 1]
+        if word == "bars" and i > 0:
+            try:
+                parameters["bars"] = int(words[i - 1])
+            except ValueError:
+                pass
+        if word == "track" and i + 1 < len(words):
+            try:
+                parameters["track_number"] = int(words[i + 1])
+            except ValueError:
+                pass
+    return parameters
+
+
+def _osc_string(value):
+    data = value if isinstance(value, bytes) else value.encode("utf-8")
+    return data + b"\0" * (4 - len(data) % 4)
+
+
+def notes_per_datagram(max_datagram=MAX_DATAGRAM, address="/live/clip/add/notes"):
+    """How many notes fit in one /live/clip/add/notes datagram"""
+    fixed = len(_osc_string(address)) + 8  # address plus the track and clip ints
+    # Type tags: "," + "ii" + 5 per note + NUL, padded to 4 bytes
+    count = (max_datagram - fixed) // (NOTE_DTYPE.itemsize + len(NOTE_TAGS))
+    while count > 0 and fixed + len(_osc_string(b",ii" + NOTE_TAGS * count)) + count * NOTE_DTYPE.itemsize > max_datagram:
+        count -= 1
+    if count < 1:
+        raise ValueError(f"Datagram limit of {max_datagram} bytes cannot hold a single note")
+    return count
+
+
+def encode_clip_notes(track_index, clip_index, notes, max_datagram=MAX_DATAGRAM):
+    """
+    Encode notes as AbletonOSC /live/clip/add/notes messages, as many notes
+    per datagram as fit under max_datagram. Track and clip are 0-based.
+    """
+    address = _osc_string("/live/clip/add/notes")
+    header_ints = np.array([track_index, clip_index], dtype=">i4").tobytes()
+    records = notes.to_records()
+    per_datagram = notes_per_datagram(max_datagram)
+
+    datagrams = []
+    for offset in range(0, len(records), per_datagram):
+        chunk = records[offset:offset + per_datagram]
+        tags = _osc_string(b",ii" + NOTE_TAGS * len(chunk))
+        datagrams.append(address + tags + header_ints + chunk.tobytes())
+    return datagrams
+
+
+def encode_message(address, *args):
+    """Encode a small OSC message with int, float and string arguments"""
+    tags = b","
+    payload = b""
+    for arg in args:
+        if isinstance(arg, bool) or isinstance(arg, int):
+            tags += b"i"
+            payload += np.array(int(arg), dtype=">i4").tobytes()
+        elif isinstance(arg, float):
+            tags += b"f"
+            payload += np.array(arg, dtype=">f4").tobytes()
+        else:
+            tags += b"s"
+            payload += _osc_string(str(arg))
+    return _osc_string(address) + _osc_string(tags) + payload
+
+
+def osc_address(host=None, port=None):
+    """
+    AbletonOSC's (host, port): the arguments, else ABLETONML_OSC_HOST and
+    ABLETONML_OSC_PORT, else 127.0.0.1:11000. This is Live's own OSC
+    listener, not the Max bridge's port.
+    """
+    return (host or os.environ.get("ABLETONML_OSC_HOST") or "127.0.0.1",
+            int(port or os.environ.get("ABLETONML_OSC_PORT") or 11000))
+
+
+def udp_sender(host, port):
+    """Return a send(datagram) function for an AbletonOSC endpoint"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    return lambda datagram: sock.sendto(datagram, (host, port))
+
+
+class ClipNoteWriter:
+    """
+    Write generated notes into a Live clip through AbletonOSC.
+
+    Creates the clip, then sends the notes as a handful of packed
+    /live/clip/add/notes datagrams instead of one message per note.
+    """
+
+    def __init__(self, send, max_datagram=MAX_DATAGRAM):
+        self.send = send
+        self.max_datagram = max_datagram
+
+    def write(self, track_index, clip_index, notes, length=None, create_clip=True):
+        """
+        Send notes to a clip slot (0-based indices); returns the number of
+        datagrams sent
+        """
+        datagrams = encode_clip_notes(track_index, clip_index, notes, self.max_datagram)
+        if create_clip:
+            length = float(length or max(4.0, np.ceil(notes.end / 4.0) * 4.0))
+            datagrams.insert(0, encode_message("/live/clip_slot/create_clip", track_index, clip_index, length))
+        for datagram in datagrams:
+            self.send(datagram)
+        logger.debug(f"Wrote {len(notes)} notes to track {track_index} clip {clip_index} in {len(datagrams)} datagrams")
+        return len(datagrams)
+
+    def set_length(self, track_index, clip_index, length):
+        """Extend a clip's loop and end marker to `length` beats"""
+        for address in ("/live/clip/set/loop_end", "/live/clip/set/end_marker"):
+            self.send(encode_message(address, track_index, clip_index, float(length)))
+        return 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generating and sending clip notes")
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--max-datagram", type=int, default=MAX_DATAGRAM)
+    args = parser.parse_args()
+
+    # Count datagrams on a local socket standing in for AbletonOSC
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    sink.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+    sink.settimeout(1.0)
+    writer = ClipNoteWriter(udp_sender(*sink.getsockname()), args.max_datagram)
+
+    start = time.perf_counter()
+    bars = max(1, args.notes // 16)
+    notes = arpeggio("c", "minor", bars=bars)
+    generated = time.perf_counter()
+    sent = writer.write(0, 0, notes)
+    done = time.perf_counter()
+
+    received = 0
+    try:
+        while received < sent:
+            sink.recv(65536)
+            received += 1
+    except socket.timeout:
+        pass
+
+    print(f"{len(notes)} notes: generated in {(generated - start) * 1000:.2f} ms, "
+          f"encoded and sent in {(done - generated) * 1000:.2f} ms as {sent} datagrams "
+          f"({received} received)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,39 @@
 import spacy
 
+from core.grammar import get_grammar
+from core.browser_catalog import item_phrase
+from core.midi_patterns import extract_pattern_parameters, join_pattern_names
+from core.automation import extract_ramp_parameters
+from core.beat_sync import extract_launch_parameters
+
 class NLPModule:
-    def __init__(self):
+    def __init__(self, catalog=None, grammar=None, classifier=None):
         # Load English language model
         self.nlp = spacy.load("en_core_web_sm")
         
-        # Define command patterns
-        self.command_patterns = {
-            "create": ["create", "make", "add"],
-            "set": ["set", "change", "adjust"],
-            "add_effect": ["add"]
-        }
+        # Optional BrowserCatalog for names outside the built-in vocabulary
+        self.catalog = catalog
+        
+        # Verbs and vocabulary come from the compiled grammar (core/grammar.json)
+        self.grammar = grammar or get_grammar()
+        
+        # Optional HashingIntentClassifier for commands whose verb the grammar doesn't know
+        self.classifier = classifier
+    
+    def use_grammar(self, grammar):
+        """Swap in a new grammar; parses already running keep the one they started with"""
+        self.grammar = grammar
         
     def parse_command(self, command_text):
         """
         Parse a natural language command into structured intent and parameters
         """
+        # One read, so a vocabulary reload mid-parse can't mix old and new tables
+        grammar = self.grammar
         doc = self.nlp(command_text.lower())
+        track_types = grammar.values("track_type")
+        instruments = grammar.values("instrument")
+        effects = grammar.values("effect")
         
         # Initialize result structure
         result = {
@@ -31,20 +48,34 @@ class NLPModule:
                 verb = token.text
                 break
         
+        # Split on whitespace: spaCy breaks "four-on-the-floor" at the hyphens;
+        # "four on the floor" is rejoined into the same pattern name
+        raw_words = join_pattern_names(command_text.lower().split(), grammar.values("pattern"))
+        words = [grammar.normalize(word) for word in raw_words]
+        
+        # Imperatives like "ramp tempo to 140" are often tagged as nouns
+        if verb is None and words and words[0] in grammar.verb_intents:
+            verb = words[0]
+        
         # Determine intent
-        if verb:
-            for intent, patterns in self.command_patterns.items():
-                if verb in patterns:
-                    result["intent"] = intent
-                    break
+        if verb in grammar.verb_intents:
+            result["intent"] = grammar.verb_intents[verb][0]
+        
+        # "add" covers instruments, effects, patterns and browser items by name
+        if verb == "add":
+            result["intent"] = self._add_intent(raw_words, words, grammar, result["parameters"])
+        
+        # "could you please put some reverb on track 2": the classifier's intent, if it's confident
+        if result["intent"] is None and self.classifier is not None:
+            result["intent"] = self.classifier.predict(command_text)
         
         # Extract parameters based on intent
         if result["intent"] == "create":
             # Look for track type and instrument
             for token in doc:
-                if token.text in ["midi", "audio"]:
+                if token.text in track_types:
                     result["parameters"]["track_type"] = token.text
-                if token.text in ["piano", "synth", "drums"]:
+                if token.text in instruments:
                     result["parameters"]["instrument"] = token.text
                     
         elif result["intent"] == "set":
@@ -63,12 +94,71 @@ class NLPModule:
         elif result["intent"] == "add_effect":
             # Look for effect type and track number
             for i, token in enumerate(doc):
-                if token.text in ["reverb", "delay", "compressor"]:
+                if token.text in effects:
                     result["parameters"]["effect"] = token.text
                 if token.text == "track" and i + 1 < len(doc):
                     try:
                         result["parameters"]["track_number"] = int(doc[i + 1].text)
                     except ValueError:
                         pass
+            
+            # "add reverb to the drums" - keep the spoken track name for the mapper to resolve
+            if "track_number" not in result["parameters"]:
+                for i in range(len(doc) - 1, 0, -1):
+                    if doc[i].text in ["to", "on", "onto"]:
+                        track_name = doc[i + 1:].text
+                        if track_name:
+                            result["parameters"]["track_name"] = track_name
+                        break
+        
+        elif result["intent"] == "add_pattern":
+            result["parameters"].update(extract_pattern_parameters(words, grammar))
         
-        return result 
\ No newline at end of file
+        elif result["intent"] == "ramp":
+            result["parameters"].update(extract_ramp_parameters(words, grammar))
+        
+        elif result["intent"] in ("launch", "start_playing", "stop_playing"):
+            result["parameters"].update(extract_launch_parameters(words, grammar))
+        
+        elif result["intent"] == "import_midi":
+            # "load groove.mid into track 2" - take the file name from the raw text to keep its case
+            for i, word in enumerate(command_text.split()):
+                if word.lower().endswith((".mid", ".midi")):
+                    result["parameters"]["file"] = word
+                if word.lower() == "track" and i + 1 < len(words):
+                    try:
+                        result["parameters"]["track_number"] = int(words[i + 1])
+                    except ValueError:
+                        pass
+            # "load groove.mid into the drums"
+            if "track_number" not in result["parameters"]:
+                for i in range(len(doc) - 1, 0, -1):
+                    if doc[i].text in ["to", "on", "onto", "into"]:
+                        track_name = doc[i + 1:].text
+                        if track_name:
+                            result["parameters"]["track_name"] = track_name
+                        break
+        
+        return result
+    
+    def _add_intent(self, raw_words, words, grammar, parameters):
+        """
+        Pick the intent of an "add" command. Browser names outside the grammar
+        ("add Glue Compressor") are resolved through the catalog, if any, and
+        the spoken name is kept for the mapper to pick the exact browser item.
+        """
+        # "add a c minor arpeggio" - generated patterns are added, not created
+        if any(word in grammar.values("pattern") for word in words):
+            return "add_pattern"
+        has_effect = any(word in grammar.values("effect") for word in words)
+        known = has_effect or any(word in grammar.values(slot) for slot in ("instrument", "track_type") for word in words)
+        if self.catalog is not None:
+            parameters["item_query"] = item_phrase(raw_words)
+            item = None if known else self.catalog.resolve(parameters["item_query"])
+            if item is not None and item["kind"] == "instrument":
+                parameters["instrument"] = item["name"]
+                return "create"
+            if item is not None and item["kind"] == "effect":
+                parameters["effect"] = item["name"]
+                return "add_effect"
+        return "add_effect" if has_effect else "create" 
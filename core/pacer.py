@@ -0,0 +1,183 @@
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePacer:
+    """
+    Token bucket whose rate adapts to how Live is coping, AIMD style.
+
+    Every acknowledged message with a latency near the best seen adds
+    `increase` messages/s per second of traffic (additive increase). A lost
+    message, or a latency well above the baseline (Live's remote-script
+    thread queueing up), halves the rate, at most once per round trip
+    (multiplicative decrease). Senders wait their turn in FIFO order, so
+    pacing never reorders messages.
+    """
+
+    def __init__(self, rate=100.0, min_rate=10.0, max_rate=2000.0, burst=8,
+                 increase=50.0, decrease=0.5, latency_factor=2.0, latency_slack=0.01, window=64):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_slack = latency_slack
+
+        self.tokens = float(burst)
+        self.sent = 0
+        self.acked = 0
+        self.losses = 0
+        self.decreases = 0
+        self.srtt = None
+        self._samples = deque(maxlen=window)
+
+        self._condition = threading.Condition()
+        self._refilled_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._next_ticket = 0
+        self._serving = 0
+
+    @property
+    def queue_depth(self):
+        """Senders waiting for a token"""
+        return self._next_ticket - self._serving
+
+    @property
+    def min_rtt(self):
+        return min(self._samples) if self._samples else None
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        """Block until this sender may transmit; senders go in arrival order"""
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if ticket == self._serving and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    self._serving += 1
+                    self.sent += 1
+                    self._condition.notify_all()
+                    return
+                if ticket == self._serving:
+                    self._condition.wait((1.0 - self.tokens) / self.rate)
+                else:
+                    self._condition.wait()
+
+    def on_ack(self, latency):
+        """Record an acknowledged message and its round trip in seconds"""
+        with self._condition:
+            self.acked += 1
+            self._samples.append(latency)
+            self.srtt = latency if self.srtt is None else 0.875 * self.srtt + 0.125 * latency
+            threshold = max(self.min_rtt * self.latency_factor, self.min_rtt + self.latency_slack)
+            if latency > threshold:
+                self._decrease(f"latency {latency * 1000:.1f} ms over {threshold * 1000:.1f} ms")
+            else:
+                # increase msgs/s per second of traffic at the current rate
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_loss(self):
+        """Record a message that was never acknowledged"""
+        with self._condition:
+            self.losses += 1
+            self._decrease("loss")
+
+    def _decrease(self, reason):
+        now = time.monotonic()
+        # One congestion event usually costs several messages; back off once per round trip
+        if now - self._last_decrease < (self.srtt or 0.0):
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        logger.debug(f"Pacing down to {self.rate:.0f} msg/s ({reason})")
+
+    def status(self):
+        return {
+            "rate": round(self.rate, 1),
+            "queue_depth": self.queue_depth,
+            "tokens": round(self.tokens, 2),
+            "sent": self.sent,
+            "acked": self.acked,
+            "losses": self.losses,
+            "decreases": self.decreases,
+            "srtt_ms": self.srtt * 1000 if self.srtt is not None else None,
+            "min_rtt_ms": self.min_rtt * 1000 if self.min_rtt is not None else None
+        }
+
+
+class PacedController:
+    """
+    Controller wrapper that sends every action through an AdaptivePacer and
+    feeds the acknowledgement latency (or the loss) back into it.
+
+    A bulk sender right below it (ClipWritingController, with `acquire`
+    unset) gets the pacer too, so each datagram of a pattern or MIDI import
+    costs a token instead of the whole burst costing one.
+    """
+
+    def __init__(self, controller, pacer=None):
+        self.controller = controller
+        self.pacer = pacer or AdaptivePacer()
+        if hasattr(controller, "acquire") and controller.acquire is None:
+            controller.acquire = self.pacer.acquire
+
+    @property
+    def host(self):
+        return getattr(self.controller, "host", None)
+
+    @property
+    def port(self):
+        return getattr(self.controller, "port", None)
+
+    @property
+    def connected(self):
+        return getattr(self.controller, "connected", True)
+
+    @property
+    def available(self):
+        return getattr(self.controller, "available", True)
+
+    def execute_action(self, action):
+        self.pacer.acquire()
+        start = time.monotonic()
+        try:
+            result = self.controller.execute_action(action)
+        except Exception:
+            # No acknowledgement: a deadline passed or the link is down
+            self.pacer.on_loss()
+            raise
+        if action.get("action") in getattr(self.controller, "bulk_actions", ()):
+            # Its duration is mostly our own per-datagram token waits, not Live's latency
+            return result
+        # A rejected action (False) was still acknowledged
+        self.pacer.on_ack(time.monotonic() - start)
+        return result
+
+    def get_project_state(self):
+        return self.controller.get_project_state()
+
+    def add_state_listener(self, callback):
+        """Forward to the wrapped controller; False when it can't push state changes"""
+        if hasattr(self.controller, "add_state_listener"):
+            return self.controller.add_state_listener(callback)
+        return False
+
+    def status(self):
+        return self.controller.status() if hasattr(self.controller, "status") else None
+
+    def close(self):
+        if hasattr(self.controller, "close"):
+            self.controller.close()
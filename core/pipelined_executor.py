@@ -0,0 +1,175 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+
+def action_resources(action):
+    """
+    Return (reads, writes) resource keys for an action; two actions must run
+    in order when one writes something the other reads or writes
+    """
+    action_type = action.get("action")
+    params = action.get("params", {})
+    track = params.get("track")
+    track_key = f"track:{track}" if track is not None else "track:*"
+
+    if action_type == "create_track":
+        return set(), {"tracks", "track:*"}
+    if action_type == "add_instrument":
+        return {"tracks"}, {track_key, "devices:instrument"}
+    if action_type == "add_effect":
+        return {"tracks"}, {track_key, f"devices:{params.get('effect_type')}"}
+    if action_type in ("add_pattern", "import_midi"):
+        return {"tracks"}, {track_key}
+    if action_type == "set_tempo":
+        return set(), {"tempo"}
+    if action_type == "set_effect_param":
+        effect = params.get("effect")
+        return {"tracks", f"devices:{effect}"}, {f"param:{effect}:{params.get('parameter')}"}
+    if action_type == "batch":
+        reads, writes = set(), set()
+        for inner in params.get("actions", []):
+            inner_reads, inner_writes = action_resources(inner)
+            reads |= inner_reads
+            writes |= inner_writes
+        return reads, writes
+    if action_type == "ramp":
+        if params.get("target") == "tempo":
+            return set(), {"tempo"}
+        effect = params.get("effect")
+        return {"tracks", f"devices:{effect}"}, {f"param:{effect}:{params.get('parameter')}"}
+    if action_type in ("launch_scene", "start_playing", "stop_playing"):
+        return set(), {"transport"}
+    if action_type == "launch_clip":
+        return {"tracks"}, {track_key, "transport"}
+
+    # Anything we don't know about is a barrier
+    return set(), {"*"}
+
+
+def _conflicts(keys_a, keys_b):
+    if "*" in keys_a or "*" in keys_b:
+        return True
+    if keys_a & keys_b:
+        return True
+    # A track-less device action (selected track) may touch any numbered track
+    tracks_a = {k for k in keys_a if k.startswith("track:")}
+    tracks_b = {k for k in keys_b if k.startswith("track:")}
+    return bool(tracks_a and tracks_b and ("track:*" in tracks_a or "track:*" in tracks_b))
+
+
+def _without_devices(keys):
+    # Adding devices only appends to the device list, so two adds never
+    # conflict with each other, only with actions that read the devices
+    return {key for key in keys if not key.startswith("devices:")}
+
+
+def plan_dependencies(actions):
+    """Return, for each action, the indices of earlier actions it must wait for"""
+    resources = [action_resources(action) for action in actions]
+    dependencies = []
+    for i, (reads, writes) in enumerate(resources):
+        depends_on = set()
+        for j in range(i):
+            other_reads, other_writes = resources[j]
+            if (_conflicts(_without_devices(writes), _without_devices(other_writes))
+                    or _conflicts(writes, other_reads) or _conflicts(reads, other_writes)):
+                depends_on.add(j)
+        dependencies.append(depends_on)
+    return dependencies
+
+
+class PipelinedExecutor:
+    """
+    Keep up to `window` actions in flight instead of waiting a full round
+    trip per action.
+
+    Actions only wait for the earlier actions they depend on (e.g.
+    add_instrument after create_track), so an N-action plan takes roughly one
+    round trip per dependency level rather than N. If the controller offers
+    execute_action_async (a Future resolved on acknowledgement) it is used
+    directly; otherwise blocking execute_action calls run on a thread pool.
+    Actions depending on a failed action are skipped, not sent.
+    """
+
+    def __init__(self, controller, window=4):
+        self.controller = controller
+        self.window = max(1, window)
+        self._threads = None
+        self._threads_lock = threading.Lock()
+
+    def _submit(self, action):
+        if hasattr(self.controller, "execute_action_async"):
+            return self.controller.execute_action_async(action)
+        with self._threads_lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.window, thread_name_prefix="pipeline")
+        return self._threads.submit(self.controller.execute_action, action)
+
+    def run(self, actions):
+        """
+        Execute actions and return one report per action, in plan order
+        """
+        return sorted(self.stream(actions), key=lambda report: report["index"])
+
+    def stream(self, actions, dependencies=None, groups=None):
+        """
+        Execute actions and yield each one's report as soon as it completes.
+        `dependencies` overrides the planned ones (index sets, as returned by
+        plan_dependencies). With `groups` (one key per action), a failure only
+        skips dependent actions of the same group; actions of other groups
+        still wait for it, then run.
+        """
+        if dependencies is None:
+            dependencies = plan_dependencies(actions)
+        reports = [{"index": i, "action": action, "success": None} for i, action in enumerate(actions)]
+        waiting = list(range(len(actions)))
+        in_flight = {}
+        done = set()
+
+        while waiting or in_flight:
+            # Send everything whose dependencies are complete, up to the window
+            for i in list(waiting):
+                if len(in_flight) >= self.window:
+                    break
+                if not dependencies[i] <= done:
+                    continue
+                waiting.remove(i)
+                failed = [j for j in dependencies[i] if not reports[j]["success"]
+                          and (groups is None or groups[j] == groups[i])]
+                if failed:
+                    reports[i].update(success=False, skipped=True,
+                                      error=f"Skipped: depends on failed action {min(failed)}")
+                    done.add(i)
+                    yield reports[i]
+                    continue
+                reports[i]["sent_at"] = time.perf_counter()
+                in_flight[self._submit(actions[i])] = i
+
+            if not in_flight:
+                continue
+
+            finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = in_flight.pop(future)
+                report = reports[i]
+                report["latency_ms"] = (time.perf_counter() - report.pop("sent_at")) * 1000
+                try:
+                    result = future.result()
+                    report["result"] = result
+                    report["success"] = result is not False
+                except Exception as e:
+                    logger.exception(f"Error executing action {actions[i]}: {e}")
+                    report["success"] = False
+                    report["error"] = str(e)
+                done.add(i)
+                yield report
+
+    def close(self):
+        with self._threads_lock:
+            if self._threads is not None:
+                self._threads.shutdown(wait=False)
+                self._threads = None
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+import json
+import time
+import logging
+import argparse
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SessionRecorder:
+    """
+    Append-only log of the commands a session received.
+
+    Each line is a JSON record with the arrival time, the raw command, the
+    parse result, the action plan, how long each stage took and the error
+    for commands that failed, so a slow session can be replayed later with
+    SessionReplayer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self._start = time.perf_counter()
+        logger.debug(f"Recording session to {path}")
+
+    def record(self, command, parsed_command=None, actions=None, results=None,
+               timings=None, session_id=None, received_at=None, error=None):
+        """
+        Append one command record to the log. `received_at` is the
+        time.perf_counter() reading taken when the command arrived; records
+        are usually written once it has run, and replay follows arrival times.
+        """
+        now = time.perf_counter()
+        received_at = now if received_at is None else received_at
+        entry = {
+            "time": time.time() - (now - received_at),
+            "offset": received_at - self._start,
+            "session": session_id,
+            "command": command,
+            "parsed": parsed_command,
+            "actions": actions,
+            "results": results,
+            "timings": timings or {},
+            "error": error
+        }
+        line = json.dumps(entry, default=str)
+
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_session(path):
+    """Yield the records of a session log in arrival order"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class SessionReplayer:
+    """
+    Feed a recorded session back through the parser, mapper and controller.
+
+    speed=1 replays with the original inter-arrival gaps, speed=N compresses
+    them N times and speed=None replays back to back as fast as possible.
+    """
+
+    def __init__(self, nlp, mapper, controller, speed=1.0):
+        self.nlp = nlp
+        self.mapper = mapper
+        self.controller = controller
+        self.speed = speed
+
+    def replay(self, records):
+        """
+        Replay records and return a per-command report plus a summary
+        """
+        report = []
+        start = time.perf_counter()
+        first_offset = None
+
+        for record in records:
+            if first_offset is None:
+                first_offset = record.get("offset", 0.0)
+
+            # Wait for the (scaled) original arrival time
+            if self.speed:
+                due = (record.get("offset", 0.0) - first_offset) / self.speed
+                delay = due - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            report.append(self._replay_one(record))
+
+        return {
+            "commands": report,
+            "summary": self._summarize(report, time.perf_counter() - start)
+        }
+
+    def _replay_one(self, record):
+        command = record["command"]
+        timings = {}
+
+        t0 = time.perf_counter()
+        parsed_command = self.nlp.parse_command(command)
+        t1 = time.perf_counter()
+        actions = self.mapper.map_to_actions(parsed_command) or []
+        t2 = time.perf_counter()
+        results = [self.controller.execute_action(action) for action in actions]
+        t3 = time.perf_counter()
+
+        timings["parse_ms"] = (t1 - t0) * 1000
+        timings["map_ms"] = (t2 - t1) * 1000
+        timings["execute_ms"] = (t3 - t2) * 1000
+        timings["total_ms"] = (t3 - t0) * 1000
+
+        return {
+            "command": command,
+            "parsed_match": parsed_command == record.get("parsed"),
+            "actions_match": actions == (record.get("actions") or []),
+            "results": results,
+            "timings": timings,
+            "original_timings": record.get("timings", {})
+        }
+
+    def _summarize(self, report, wall_time):
+        summary = {
+            "count": len(report),
+            "wall_time_s": wall_time,
+            "mismatches": sum(1 for r in report if not (r["parsed_match"] and r["actions_match"]))
+        }
+
+        for stage in ("parse_ms", "map_ms", "execute_ms", "total_ms"):
+            replayed = [r["timings"][stage] for r in report]
+            original = [r["original_timings"][stage] for r in report
+                        if stage in r["original_timings"]]
+            summary[stage] = {
+                "replayed_mean": sum(replayed) / len(replayed) if replayed else 0.0,
+                "original_mean": sum(original) / len(original) if original else None
+            }
+
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded AbletonML session")
+    parser.add_argument("log", help="session log written by SessionRecorder")
+    parser.add_argument("--speed", default="1",
+                        help="replay speed multiplier, or 'max' for back to back")
+    parser.add_argument("--simple", action="store_true",
+                        help="use SimpleNLPModule instead of the spaCy parser")
+    parser.add_argument("--live", action="store_true",
+                        help="execute against Live instead of the simulated controller")
+    args = parser.parse_args()
+
+    from core.action_mapper import ActionMapper
+
+    if args.simple:
+        from core.simple_nlp import SimpleNLPModule
+        nlp = SimpleNLPModule()
+    else:
+        from core.nlp import NLPModule
+        nlp = NLPModule()
+
+    if args.live:
+        from core.max_controller import MaxController
+        controller = MaxController()
+    else:
+        from core.simulated_controller import SimulatedController
+        controller = SimulatedController()
+
+    speed = None if args.speed == "max" else float(args.speed)
+    replayer = SessionReplayer(nlp, ActionMapper(), controller, speed=speed)
+    result = replayer.replay(read_session(args.log))
+
+    for entry in result["commands"]:
+        status = "✅" if entry["parsed_match"] and entry["actions_match"] else "❌"
+        print(f"{status} {entry['command']!r}: {entry['timings']['total_ms']:.2f} ms "
+              f"(original {entry['original_timings'].get('total_ms', float('nan')):.2f} ms)")
+    print(json.dumps(result["summary"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,78 @@
-class SimpleNLPModule:
-    def __init__(self):
-        # Define command patterns without spaCy
+from core.fuzzy_vocabulary import FuzzyVocabulary
+from core.browser_catalog import item_phrase
+from core.grammar import get_grammar
+from core.midi_patterns import extract_pattern_parameters, join_pattern_names
+from core.automation import extract_ramp_parameters
+from core.beat_sync import extract_launch_parameters
+
+
+class ParserTables:
+    """Everything SimpleNLPModule derives from one grammar, swapped as a unit"""
+    
+    def __init__(self, grammar):
+        self.grammar = grammar
         self.command_patterns = {
-            "create": ["create", "make", "add"],
-            "set": ["set", "change", "adjust"],
-            "add_effect": ["add"]
+            intent: [verb for verb, intents in grammar.verb_intents.items() if intent in intents]
+            for intent in grammar.intents
         }
+        self.synonyms = grammar.synonyms
         
-        # Define synonyms for normalization
-        self.synonyms = {
-            "bpm": "tempo",
-            "audio": "audio",
-            "midi": "midi",
-            "echo": "delay",
-            "reverb": "reverb",
-            "compressor": "compressor",
-            "piano": "piano",
-            "synth": "synth",
-            "drums": "drums",
-            "wet": "wet",
-            "dry": "dry",
-            "dry/wet": "dry/wet",
-            "mix": "dry/wet",
-            "amount": "amount",
-            "level": "level",
-            "intensity": "intensity"
-        }
+        # Index all known vocabulary so speech-to-text near misses
+        # ("revurb", "compresser", "tempto") can be corrected; a new index
+        # also starts with an empty correction cache
+        self.vocabulary = FuzzyVocabulary(grammar.vocabulary)
+
+
+class SimpleNLPModule:
+    def __init__(self, catalog=None, grammar=None, classifier=None):
+        # Optional BrowserCatalog for names outside the built-in vocabulary
+        self.catalog = catalog
+        
+        # Optional HashingIntentClassifier for commands whose verb the grammar doesn't know
+        self.classifier = classifier
+        
+        # Vocabulary, verbs and synonyms come from the compiled grammar (core/grammar.json)
+        self.use_grammar(grammar or get_grammar())
+    
+    def use_grammar(self, grammar):
+        """
+        Swap in tables built from a new grammar. The tables are built first and
+        replaced with one assignment, so parses already running finish on the
+        old ones and no lock is needed on the parse path.
+        """
+        self.tables = ParserTables(grammar)
+    
+    @property
+    def grammar(self):
+        return self.tables.grammar
+    
+    @property
+    def command_patterns(self):
+        return self.tables.command_patterns
+    
+    @property
+    def synonyms(self):
+        return self.tables.synonyms
+    
+    @property
+    def vocabulary(self):
+        return self.tables.vocabulary
         
     def parse_command(self, command_text):
         """
         Parse a natural language command into structured intent and parameters
         Simple version without spaCy
         """
-        words = command_text.lower().split()
+        # One read, so a vocabulary reload mid-parse can't mix old and new tables
+        tables = self.tables
+        grammar = tables.grammar
+        
+        # "four on the floor" is the same pattern as "four-on-the-floor"
+        words = join_pattern_names(command_text.lower().split(), grammar.values("pattern"))
+        effects = grammar.values("effect")
+        instruments = grammar.values("instrument")
+        track_types = grammar.values("track_type")
+        effect_parameters = grammar.values("parameter")
         
         # Initialize result structure
         result = {
@@ -43,7 +83,8 @@ class SimpleNLPModule:
         # Normalize synonyms
         normalized_words = []
         for word in words:
-            normalized_word = self.synonyms.get(word, word)
+            word = tables.vocabulary.correct(word)
+            normalized_word = tables.synonyms.get(word, word)
             normalized_words.append(normalized_word)
         
         # Extract verb (command type) - first word is usually the verb
@@ -52,11 +93,28 @@ class SimpleNLPModule:
         # Determine intent - handle "add" specially
         if verb == "add":
             # Check what we're adding to determine intent
-            has_effect = any(word in ["reverb", "delay", "compressor"] for word in normalized_words)
-            has_instrument = any(word in ["piano", "synth", "drums"] for word in normalized_words)
-            has_track_type = any(word in ["audio", "midi"] for word in normalized_words)
+            has_effect = any(word in effects for word in normalized_words)
+            has_instrument = any(word in instruments for word in normalized_words)
+            has_track_type = any(word in track_types for word in normalized_words)
+            has_pattern = any(word in grammar.values("pattern") for word in normalized_words)
+            
+            # Resolve browser names ("grand piano", "glue compressor") through the catalog
+            item = None
+            if self.catalog is not None:
+                result["parameters"]["item_query"] = item_phrase(words)
+                if not (has_effect or has_instrument or has_track_type or has_pattern):
+                    item = self.catalog.resolve(result["parameters"]["item_query"])
             
-            if has_effect:
+            if has_pattern:
+                result["intent"] = "add_pattern"
+            elif item is not None and item["kind"] in ("instrument", "effect"):
+                if item["kind"] == "instrument":
+                    result["intent"] = "create"
+                    result["parameters"]["instrument"] = item["name"]
+                else:
+                    result["intent"] = "add_effect"
+                    result["parameters"]["effect"] = item["name"]
+            elif has_effect:
                 result["intent"] = "add_effect"
             elif has_instrument:
                 result["intent"] = "create"  # Adding instrument to current track
@@ -66,26 +124,27 @@ class SimpleNLPModule:
                 result["intent"] = "add_effect"  # Default to effect if unclear
         elif verb == "set":
             # Check if this is setting effect parameters
-            has_effect = any(word in ["reverb", "delay", "compressor"] for word in normalized_words)
-            has_parameter = any(word in ["wet", "dry", "dry/wet", "mix", "amount", "level", "intensity"] for word in normalized_words)
+            has_effect = any(word in effects for word in normalized_words)
+            has_parameter = any(word in effect_parameters for word in normalized_words)
             
             if has_effect and has_parameter:
                 result["intent"] = "set_effect_param"
             else:
                 result["intent"] = "set"  # Default to regular set commands
-        elif verb:
-            for intent, patterns in self.command_patterns.items():
-                if verb in patterns:
-                    result["intent"] = intent
-                    break
+        elif verb in grammar.verb_intents:
+            result["intent"] = grammar.verb_intents[verb][0]
+        
+        # "could you please put some reverb on track 2": the classifier's intent, if it's confident
+        if result["intent"] is None and self.classifier is not None:
+            result["intent"] = self.classifier.predict(command_text)
         
         # Extract parameters based on intent
         if result["intent"] == "create":
             # Look for track type and instrument
             for i, word in enumerate(normalized_words):
-                if word in ["midi", "audio"]:
+                if word in track_types:
                     result["parameters"]["track_type"] = word
-                if word in ["piano", "synth", "drums"]:
+                if word in instruments:
                     result["parameters"]["instrument"] = word
                     
         elif result["intent"] == "set":
@@ -104,20 +163,26 @@ class SimpleNLPModule:
         elif result["intent"] == "add_effect":
             # Look for effect type and track number
             for i, word in enumerate(normalized_words):
-                if word in ["reverb", "delay", "compressor"]:
+                if word in effects:
                     result["parameters"]["effect"] = word
                 if word == "track" and i + 1 < len(normalized_words):
                     try:
                         result["parameters"]["track_number"] = int(normalized_words[i + 1])
                     except ValueError:
                         pass
+            
+            # "add reverb to the drums" - keep the spoken track name for the mapper to resolve
+            if "track_number" not in result["parameters"]:
+                track_name = self._track_phrase(words)
+                if track_name:
+                    result["parameters"]["track_name"] = track_name
                         
         elif result["intent"] == "set_effect_param":
             # Look for effect, parameter, and value
             for i, word in enumerate(normalized_words):
-                if word in ["reverb", "delay", "compressor"]:
+                if word in effects:
                     result["parameters"]["effect"] = word
-                if word in ["wet", "dry", "dry/wet", "mix", "amount", "level", "intensity"]:
+                if word in effect_parameters:
                     result["parameters"]["parameter"] = word
                 if word == "to" and i + 1 < len(normalized_words):
                     # Look for numeric value (with optional %)
@@ -128,7 +193,45 @@ class SimpleNLPModule:
                         break
                     except ValueError:
                         continue
-                        
-
+        
+        elif result["intent"] == "import_midi":
+            # "load groove.mid into track 2" - take the file name from the raw text to keep its case
+            for word in command_text.split():
+                if word.lower().endswith((".mid", ".midi")):
+                    result["parameters"]["file"] = word
+            for i, word in enumerate(normalized_words):
+                if word == "track" and i + 1 < len(normalized_words):
+                    try:
+                        result["parameters"]["track_number"] = int(normalized_words[i + 1])
+                    except ValueError:
+                        pass
+            # "load groove.mid into the drums"
+            if "track_number" not in result["parameters"]:
+                track_name = self._track_phrase(words)
+                if track_name:
+                    result["parameters"]["track_name"] = track_name
+        
+        elif result["intent"] == "ramp":
+            # "fade reverb wet from 0 to 80 over 4 bars", "ramp tempo to 140 over 16 beats"
+            result["parameters"].update(extract_ramp_parameters(normalized_words, grammar))
+        
+        elif result["intent"] in ("launch", "start_playing", "stop_playing"):
+            # "launch scene 3 on the next bar", "stop in 2 bars"
+            result["parameters"].update(extract_launch_parameters(normalized_words, grammar))
+        
+        elif result["intent"] == "add_pattern":
+            # "add a c minor arpeggio to track 3", "add a four-on-the-floor kick pattern for 8 bars"
+            result["parameters"].update(extract_pattern_parameters(normalized_words, grammar))
+            if "track_number" not in result["parameters"]:
+                track_name = self._track_phrase(words)
+                if track_name:
+                    result["parameters"]["track_name"] = track_name
         
         return result
+    
+    def _track_phrase(self, words):
+        """Return the words after the last "to"/"on"/"into", naming the target track"""
+        for i in range(len(words) - 1, 0, -1):
+            if words[i] in ("to", "on", "onto", "into"):
+                return " ".join(words[i + 1:])
+        return None
@@ -0,0 +1,192 @@
+import copy
+import logging
+import threading
+import time
+
+from core.midi_patterns import render_pattern
+from core.midi_import import MidiFileStream, resolve_midi_path
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedController:
+    """
+    In-process stand-in for the Live controller.
+
+    Keeps a project state in memory and applies actions to it, so the
+    NLP -> action mapper -> controller pipeline can run without Ableton Live.
+    Exposes the same surface as the real controller (execute_action,
+    get_project_state, connected, host, port, close).
+    """
+
+    def __init__(self, host="127.0.0.1", port=11000, latency=0.0):
+        self.host = host
+        self.port = port
+        self.connected = True
+
+        # Simulated round trip per call, in seconds
+        self.latency = latency
+
+        self._lock = threading.Lock()
+        # Called with a copy of the new state after every change
+        self._listeners = []
+        self.state = {
+            "tempo": 120,
+            "tracks": [],
+            "selected_track": -1
+        }
+
+    def execute_action(self, action):
+        """
+        Apply an action to the simulated project state
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        action_type = action.get("action")
+        params = action.get("params", {})
+
+        with self._lock:
+            handler = getattr(self, f"_do_{action_type}", None)
+            if handler is None:
+                logger.warning(f"Simulated controller ignoring unknown action: {action_type}")
+                return False
+            result = handler(params)
+            state = copy.deepcopy(self.state) if result and self._listeners else None
+        if state is not None:
+            for callback in list(self._listeners):
+                # The change is already made; a failing listener mustn't turn it into an error
+                try:
+                    callback(state)
+                except Exception as e:
+                    logger.warning(f"State listener failed: {e}")
+        return result
+
+    def add_state_listener(self, callback):
+        """Push the project state to callback(state) after every change; returns True"""
+        self._listeners.append(callback)
+        return True
+
+    def get_project_state(self):
+        """Return a copy of the simulated project state"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            return copy.deepcopy(self.state)
+
+    def ping(self):
+        """Cheapest round trip: nothing but the simulated latency"""
+        if self.latency:
+            time.sleep(self.latency)
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def _track(self, number):
+        # Track numbers in commands are 1-based
+        index = number - 1 if number is not None else self.state["selected_track"]
+        if 0 <= index < len(self.state["tracks"]):
+            return self.state["tracks"][index]
+        return None
+
+    def _do_create_track(self, params):
+        track_type = params.get("type", "midi")
+        number = len(self.state["tracks"]) + 1
+        self.state["tracks"].append({
+            "name": params.get("name") or f"{number}-{track_type.upper()}",
+            "type": track_type,
+            "devices": []
+        })
+        self.state["selected_track"] = number - 1
+        return True
+
+    def _do_add_instrument(self, params):
+        track = self._track(params.get("track"))
+        if track is None:
+            return False
+        track["devices"].append({"name": params["instrument"], "type": "instrument"})
+        return True
+
+    def _do_add_effect(self, params):
+        track = self._track(params.get("track"))
+        if track is None:
+            return False
+        track["devices"].append({"name": params["effect_type"], "type": "effect"})
+        return True
+
+    def _do_set_tempo(self, params):
+        self.state["tempo"] = params["value"]
+        return True
+
+    def _do_set_effect_param(self, params):
+        for track in self.state["tracks"]:
+            for device in track["devices"]:
+                if device["name"] == params["effect"]:
+                    device.setdefault("parameters", {})[params["parameter"]] = params["value"]
+                    return True
+        return False
+
+    def _do_batch(self, params):
+        # One round trip for the whole batch; stops at the first failure
+        for action in params.get("actions", []):
+            handler = getattr(self, f"_do_{action.get('action')}", None)
+            if handler is None or action.get("action") == "batch":
+                logger.warning(f"Simulated controller ignoring unknown batch action: {action.get('action')}")
+                return False
+            if not handler(action.get("params", {})):
+                return False
+        return True
+
+    def _do_launch_scene(self, params):
+        self.state["playing"] = True
+        self.state["launched_scene"] = params["scene"]
+        return True
+
+    def _do_launch_clip(self, params):
+        track = self._track(params.get("track"))
+        if track is None:
+            return False
+        self.state["playing"] = True
+        track["playing_clip"] = params["clip"]
+        return True
+
+    def _do_start_playing(self, params):
+        self.state["playing"] = True
+        return True
+
+    def _do_stop_playing(self, params):
+        self.state["playing"] = False
+        return True
+
+    def _do_add_pattern(self, params):
+        track = self._track(params.get("track"))
+        if track is None:
+            return False
+        notes = render_pattern(params)
+        track.setdefault("clips", []).append({
+            "pattern": params["pattern"],
+            "notes": len(notes),
+            "length": params.get("bars", 4) * 4
+        })
+        return True
+
+    def _do_import_midi(self, params):
+        track = self._track(params.get("track"))
+        if track is None:
+            return False
+        try:
+            stream = MidiFileStream(resolve_midi_path(params["file"]))
+            end = 0.0
+            for _, notes in stream.batches():
+                end = max(end, notes.end)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not import {params['file']}: {e}")
+            return False
+        track.setdefault("clips", []).append({
+            "file": params["file"],
+            "notes": stream.notes_read,
+            "length": end
+        })
+        return True
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+import os
+import json
+import mmap
+import time
+import struct
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AMLS"
+VERSION = 1
+
+# Header: magic, version, tempo, selected track, then (offset, length) per section
+HEADER = struct.Struct("<4sHxxdi4x")
+SECTIONS = ("string_offsets", "string_data", "tracks", "devices", "params", "extra")
+SECTION_TABLE = struct.Struct("<" + "QQ" * len(SECTIONS))
+
+TRACK_DTYPE = np.dtype([("name", "<u4"), ("type", "<u4"), ("first_device", "<u4"), ("device_count", "<u4")])
+DEVICE_DTYPE = np.dtype([("name", "<u4"), ("type", "<u4"), ("first_param", "<u4"), ("param_count", "<u4")])
+PARAM_DTYPE = np.dtype([("name", "<u4"), ("value", "<f8")])
+
+# Keys held in the tables; anything else a state carries goes in the JSON extra section
+STATE_KEYS = ("tempo", "tracks", "selected_track")
+TRACK_KEYS = ("name", "type", "devices")
+DEVICE_KEYS = ("name", "type", "parameters")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _numeric(value):
+    # Booleans would come back as 1 and 0, so they stay out of the value column too
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
+def _plain(value):
+    # Keep whole numbers as ints so states round-trip to the same JSON
+    if not _numeric(value):
+        return value
+    return int(value) if float(value).is_integer() else value
+
+
+def _rows(starts, counts):
+    """Concatenated ranges start..start+count for each pair, without a Python loop"""
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.cumsum(counts)
+    return np.repeat(np.asarray(starts, dtype=np.int64) - (ends - counts), counts) + np.arange(total)
+
+
+class Snapshot:
+    """
+    Columnar snapshot of a project state.
+
+    Names are interned once in a string table; tracks, devices and parameter
+    values are packed tables of ids and offsets. A snapshot serializes with a
+    handful of memcpys, loads zero-copy (including straight from an mmap'd
+    file), and two snapshots diff by comparing columns. Parameter values
+    that aren't numbers, and keys outside the tables such as clips, are kept
+    in a JSON extra section.
+    """
+
+    def __init__(self, tempo, selected_track, strings, tracks, devices, params, extra=None):
+        self.tempo = tempo
+        self.selected_track = selected_track
+        self.strings = strings
+        self.tracks = tracks
+        self.devices = devices
+        self.params = params
+        self.extra = extra or {}
+        self._ids = None
+
+    def __len__(self):
+        return len(self.tracks)
+
+    @classmethod
+    def from_state(cls, state):
+        """Pack a project state dict (as returned by get_project_state)"""
+        ids = {}
+        strings = []
+
+        def intern(value):
+            value = "" if value is None else str(value)
+            string_id = ids.get(value)
+            if string_id is None:
+                string_id = ids[value] = len(strings)
+                strings.append(value)
+            return string_id
+
+        track_rows, device_rows, param_rows = [], [], []
+        extra = {key: value for key, value in state.items() if key not in STATE_KEYS}
+        track_extra = {}
+        for number, track in enumerate(state.get("tracks", [])):
+            devices = track.get("devices", [])
+            track_rows.append((intern(track.get("name")), intern(track.get("type")), len(device_rows), len(devices)))
+            unknown = {key: value for key, value in track.items() if key not in TRACK_KEYS}
+            for position, device in enumerate(devices):
+                parameters = device.get("parameters", {})
+                numeric = [(intern(name), value) for name, value in parameters.items() if _numeric(value)]
+                device_rows.append((intern(device.get("name")), intern(device.get("type")),
+                                    len(param_rows), len(numeric)))
+                param_rows.extend(numeric)
+                device_unknown = {key: value for key, value in device.items() if key not in DEVICE_KEYS}
+                if len(numeric) < len(parameters):
+                    device_unknown["_parameters"] = {name: value for name, value in parameters.items()
+                                                     if not _numeric(value)}
+                if device_unknown:
+                    unknown.setdefault("_devices", {})[str(position)] = device_unknown
+            if unknown:
+                track_extra[str(number)] = unknown
+        if track_extra:
+            extra["_tracks"] = track_extra
+
+        snapshot = cls(
+            float(state.get("tempo") or 0.0),
+            int(state.get("selected_track", -1)),
+            strings,
+            np.array(track_rows, dtype=TRACK_DTYPE),
+            np.array(device_rows, dtype=DEVICE_DTYPE),
+            np.array(param_rows, dtype=PARAM_DTYPE),
+            extra
+        )
+        snapshot._ids = ids
+        return snapshot
+
+    def to_state(self):
+        """Unpack into the nested dict shape the rest of the code uses"""
+        state = {
+            "tempo": _plain(self.tempo),
+            "tracks": [self.track(number) for number in range(len(self))],
+            "selected_track": self.selected_track
+        }
+        state.update({key: value for key, value in self.extra.items() if key != "_tracks"})
+        return state
+
+    def track(self, number):
+        """Unpack a single track"""
+        strings = self.strings
+        name, track_type, first, count = self.tracks[number].tolist()
+        track_extra = self._track_extra(number)
+        devices = []
+        for position, (device_name, device_type, first_param, param_count) in enumerate(
+                self.devices[first:first + count].tolist()):
+            device = {"name": strings[device_name], "type": strings[device_type]}
+            device_extra = track_extra.get("_devices", {}).get(str(position), {})
+            parameters = self._parameters(first_param, param_count)
+            parameters.update(device_extra.get("_parameters", {}))
+            if parameters:
+                device["parameters"] = parameters
+            device.update({key: value for key, value in device_extra.items() if key != "_parameters"})
+            devices.append(device)
+        track = {"name": strings[name], "type": strings[track_type], "devices": devices}
+        track.update({key: value for key, value in track_extra.items() if key != "_devices"})
+        return track
+
+    def device_parameters(self, number, position):
+        """Every parameter of one device, numeric or not"""
+        device = self.devices[int(self.tracks[number]["first_device"]) + position]
+        parameters = self._parameters(int(device["first_param"]), int(device["param_count"]))
+        parameters.update(self._track_extra(number).get("_devices", {}).get(str(position), {}).get("_parameters", {}))
+        return parameters
+
+    def _track_extra(self, number):
+        return self.extra.get("_tracks", {}).get(str(number), {})
+
+    def _parameters(self, first, count):
+        return {self.strings[name]: _plain(value) for name, value in self.params[first:first + count].tolist()}
+
+    def string_ids(self):
+        if self._ids is None:
+            self._ids = {value: i for i, value in enumerate(self.strings)}
+        return self._ids
+
+    def to_bytes(self):
+        encoded = [value.encode("utf-8") for value in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        payloads = [
+            offsets.tobytes(),
+            b"".join(encoded),
+            self.tracks.tobytes(),
+            self.devices.tobytes(),
+            self.params.tobytes(),
+            json.dumps(self.extra).encode("utf-8") if self.extra else b""
+        ]
+
+        # Sections are 8-byte aligned so the tables can be viewed in place
+        position = _align(HEADER.size + SECTION_TABLE.size)
+        table = []
+        for payload in payloads:
+            table.extend((position, len(payload)))
+            position = _align(position + len(payload))
+
+        out = bytearray(position)
+        HEADER.pack_into(out, 0, MAGIC, VERSION, self.tempo, self.selected_track)
+        SECTION_TABLE.pack_into(out, HEADER.size, *table)
+        for i, payload in enumerate(payloads):
+            out[table[2 * i]:table[2 * i] + len(payload)] = payload
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        """Load a snapshot; the tables are views into buffer, not copies"""
+        magic, version, tempo, selected_track = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not an AbletonML snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        table = SECTION_TABLE.unpack_from(buffer, HEADER.size)
+        sections = {name: (table[2 * i], table[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+
+        def view(name, dtype):
+            offset, length = sections[name]
+            return np.frombuffer(buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+        offsets = view("string_offsets", np.dtype("<u4")).tolist()
+        data_offset, data_length = sections["string_data"]
+        data = bytes(buffer[data_offset:data_offset + data_length])
+        strings = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+        extra_offset, extra_length = sections["extra"]
+        extra = json.loads(bytes(buffer[extra_offset:extra_offset + extra_length])) if extra_length else {}
+        return cls(tempo, selected_track, strings, view("tracks", TRACK_DTYPE), view("devices", DEVICE_DTYPE),
+                   view("params", PARAM_DTYPE), extra)
+
+    def save(self, path):
+        """Write atomically, so a crash never leaves a half-written known-good state"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved snapshot; table pages are read on demand"""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_bytes(mapped)
+
+
+def diff(old, new):
+    """
+    List the changes turning snapshot old into snapshot new.
+
+    Tracks are compared by position, as in Live. Each change is a small dict
+    with an "op" of set_tempo, select_track, rename_track, set_track_type,
+    set_devices (the track's device list changed), set_param, remove_param,
+    set_extra / remove_extra (a state key outside the tables, like
+    "playing"), set_track_extra / remove_track_extra (a track key outside
+    the tables, like "clips"), remove_track or add_track.
+    """
+    changes = []
+    if old.tempo != new.tempo:
+        changes.append({"op": "set_tempo", "value": _plain(new.tempo)})
+    if old.selected_track != new.selected_track:
+        changes.append({"op": "select_track", "value": new.selected_track})
+
+    common = min(len(old), len(new))
+    # new's string ids translated to old's, so columns compare as plain ints
+    old_ids = old.string_ids()
+    remap = np.array([old_ids.get(value, -1) for value in new.strings] or [0], dtype=np.int64)
+    old_tracks, new_tracks = old.tracks[:common], new.tracks[:common]
+
+    for number in np.nonzero(remap[new_tracks["name"]] != old_tracks["name"])[0].tolist():
+        changes.append({"op": "rename_track", "track": number,
+                        "value": new.strings[int(new_tracks["name"][number])]})
+    for number in np.nonzero(remap[new_tracks["type"]] != old_tracks["type"])[0].tolist():
+        changes.append({"op": "set_track_type", "track": number,
+                        "value": new.strings[int(new_tracks["type"][number])]})
+
+    # Line up the devices of tracks whose device counts match
+    same_count = old_tracks["device_count"] == new_tracks["device_count"]
+    restructured = set(np.nonzero(~same_count)[0].tolist())
+    counts = old_tracks["device_count"][same_count]
+    device_track = np.repeat(np.nonzero(same_count)[0], counts)
+    old_devices = old.devices[_rows(old_tracks["first_device"][same_count], counts)]
+    new_devices = new.devices[_rows(new_tracks["first_device"][same_count], counts)]
+    different = (remap[new_devices["name"]] != old_devices["name"]) | (remap[new_devices["type"]] != old_devices["type"])
+    restructured.update(device_track[different].tolist())
+
+    # Keys outside the tables are compared as dicts, only where the extras differ
+    extra_changes = _extra_changes(old.extra, new.extra, "")
+    loose_devices = []
+    old_extra, new_extra = old.extra.get("_tracks", {}), new.extra.get("_tracks", {})
+    for key in sorted(set(old_extra) | set(new_extra), key=int):
+        number = int(key)
+        before, after = old_extra.get(key, {}), new_extra.get(key, {})
+        if number >= common or before == after:
+            continue
+        extra_changes.extend(_extra_changes(before, after, "track_", track=number))
+        old_devices_extra, new_devices_extra = before.get("_devices", {}), after.get("_devices", {})
+        for position in set(old_devices_extra) | set(new_devices_extra):
+            device_before = dict(old_devices_extra.get(position, {}))
+            device_after = dict(new_devices_extra.get(position, {}))
+            if device_before.pop("_parameters", {}) != device_after.pop("_parameters", {}):
+                loose_devices.append(int(np.searchsorted(device_track, number)) + int(position))
+            if device_before != device_after:
+                restructured.add(number)
+
+    # Then the parameters of matching devices with the same number of parameters
+    matching = ~np.isin(device_track, list(restructured))
+    same_params = matching & (old_devices["param_count"] == new_devices["param_count"])
+    param_counts = old_devices["param_count"][same_params]
+    param_device = np.repeat(np.nonzero(same_params)[0], param_counts)
+    old_params = old.params[_rows(old_devices["first_param"][same_params], param_counts)]
+    new_params = new.params[_rows(new_devices["first_param"][same_params], param_counts)]
+
+    # Devices that gained, lost or renamed parameters, or hold non-numeric ones, are rare; compare those as dicts
+    loose = matching & ~same_params
+    loose[param_device[remap[new_params["name"]] != old_params["name"]]] = True
+    loose[np.array(loose_devices, dtype=np.int64)] = True
+    loose &= matching
+    changed = ~loose[param_device] & (new_params["value"] != old_params["value"])
+
+    param_changes = [(int(param_device[row]), new.strings[int(new_params["name"][row])], float(new_params["value"][row]))
+                     for row in np.nonzero(changed)[0].tolist()]
+    removed_params = []
+    for index in np.nonzero(loose)[0].tolist():
+        number = int(device_track[index])
+        position = index - int(np.searchsorted(device_track, number))
+        before, after = old.device_parameters(number, position), new.device_parameters(number, position)
+        param_changes.extend((index, name, value) for name, value in after.items()
+                             if name not in before or before[name] != value)
+        removed_params.extend((index, name) for name in before if name not in after)
+
+    for number in sorted(restructured):
+        changes.append({"op": "set_devices", "track": number, "value": new.track(number)["devices"]})
+    def located(op, index, name):
+        number = int(device_track[index])
+        position = index - int(np.searchsorted(device_track, number))
+        effect = new.strings[int(new.devices["name"][int(new_tracks["first_device"][number]) + position])]
+        return {"op": op, "track": number, "device": position, "effect": effect, "parameter": name}
+
+    changes.extend(dict(located("set_param", index, name), value=_plain(value)) for index, name, value in param_changes)
+    changes.extend(located("remove_param", index, name) for index, name in removed_params)
+    changes.extend(extra_changes)
+
+    for number in range(common, len(old)):
+        changes.append({"op": "remove_track", "track": number})
+    for number in range(common, len(new)):
+        changes.append({"op": "add_track", "track": number, "value": new.track(number)})
+    return changes
+
+
+def _extra_changes(before, after, prefix, **location):
+    """set_/remove_ changes for the keys of two extra dicts, leaving out the nested table extras"""
+    changes = []
+    for key in sorted((set(before) | set(after)) - {"_tracks", "_devices"}):
+        if key not in after:
+            changes.append(dict({"op": f"remove_{prefix}extra"}, **location, key=key))
+        elif key not in before or before[key] != after[key]:
+            changes.append(dict({"op": f"set_{prefix}extra"}, **location, key=key, value=after[key]))
+    return changes
+
+
+def restore_actions(changes):
+    """
+    Turn the changes from diff(current, saved) into actions that bring Live
+    back to the saved state. Returns (actions, changes no action can undo).
+
+    Only tempo, parameter values and missing tracks can be put back. Tracks
+    added since the save (remove_track), changed device lists (set_devices),
+    removed parameters, clips and other extra keys have no undoing action and
+    always come back as unsupported, for the caller to report.
+    """
+    actions = []
+    unsupported = []
+    for change in changes:
+        op = change["op"]
+        if op == "set_tempo":
+            actions.append({"action": "set_tempo", "params": {"value": change["value"]}})
+        elif op == "set_param":
+            actions.append({"action": "set_effect_param", "params": {
+                "effect": change["effect"], "parameter": change["parameter"], "value": change["value"]}})
+        elif op == "add_track":
+            track = change["value"]
+            number = change["track"] + 1
+            actions.append({"action": "create_track", "params": {"type": track["type"] or "midi",
+                                                                 "name": track["name"]}})
+            for device in track["devices"]:
+                if device.get("type") == "instrument":
+                    actions.append({"action": "add_instrument", "params": {"instrument": device["name"],
+                                                                           "track": number}})
+                else:
+                    actions.append({"action": "add_effect", "params": {"effect_type": device["name"],
+                                                                       "track": number}})
+                for name, value in device.get("parameters", {}).items():
+                    actions.append({"action": "set_effect_param", "params": {
+                        "effect": device["name"], "parameter": name, "value": value}})
+        else:
+            unsupported.append(change)
+    return actions, unsupported
+
+
+def generate_state(tracks=500, devices_per_track=4, seed=0):
+    """A large synthetic project state, for benchmarks and tests"""
+    rng = np.random.default_rng(seed)
+    effects = ["reverb", "delay", "compressor", "eq eight", "saturator", "auto filter"]
+    state = {"tempo": 124, "tracks": [], "selected_track": 0}
+    for number in range(tracks):
+        devices = [{"name": "operator" if number % 2 else "simpler", "type": "instrument"}]
+        for effect in rng.choice(effects, devices_per_track - 1).tolist():
+            devices.append({"name": effect, "type": "effect",
+                            "parameters": {"dry/wet": int(rng.integers(0, 100)), "amount": float(rng.random())}})
+        state["tracks"].append({"name": f"{number + 1}-Track {number + 1}", "type": "midi", "devices": devices})
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark snapshots against JSON")
+    parser.add_argument("--tracks", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    state = generate_state(args.tracks)
+    changed = json.loads(json.dumps(state))
+    changed["tracks"][7]["devices"][1]["parameters"]["dry/wet"] = 101
+    changed["tracks"][42]["name"] = "Lead Vocal"
+
+    def timed(function):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = function()
+        return (time.perf_counter() - start) / args.repeat * 1000, result
+
+    json_dump_ms, text = timed(lambda: json.dumps(state))
+    json_load_ms, _ = timed(lambda: json.loads(text))
+    pack_ms, snapshot = timed(lambda: Snapshot.from_state(state))
+    encode_ms, data = timed(snapshot.to_bytes)
+    decode_ms, loaded = timed(lambda: Snapshot.from_bytes(data))
+    unpack_ms, _ = timed(loaded.to_state)
+    other = Snapshot.from_state(changed)
+    diff_ms, changes = timed(lambda: diff(snapshot, other))
+
+    print(f"{args.tracks} tracks: JSON {len(text) / 1024:.0f} kB, snapshot {len(data) / 1024:.0f} kB")
+    print(f"  json.dumps {json_dump_ms:.2f} ms, json.loads {json_load_ms:.2f} ms")
+    print(f"  from_state {pack_ms:.2f} ms, to_bytes {encode_ms:.3f} ms, "
+          f"from_bytes {decode_ms:.3f} ms, to_state {unpack_ms:.2f} ms")
+    print(f"  diff {diff_ms:.3f} ms -> {changes}")
+
+
+if __name__ == "__main__":
+    main()
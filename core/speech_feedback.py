@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import queue
+import shutil
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict
+
+from core.grammar import default_cache_dir, get_grammar
+
+logger = logging.getLogger(__name__)
+
+# Spoken confirmations, keyed by template; slots come from the action params
+TEMPLATES = {
+    "create_track": "{type} track created",
+    "add_instrument": "{instrument} added",
+    "add_effect": "{effect_type} added to track {track}",
+    "add_effect_selected": "{effect_type} added",
+    "set_tempo": "tempo set to {value}",
+    "set_effect_param": "{effect} {parameter} set to {value}",
+    "add_pattern": "{pattern} pattern added",
+    "import_midi": "MIDI file loaded",
+    "ramp": "ramping {target} to {to}",
+    "batch": "{macro} done",
+    "failed": "command failed",
+    "not_understood": "sorry, I didn't understand",
+    "unavailable": "Live is not responding",
+}
+
+# Tempos people actually ask for, rendered ahead of time
+COMMON_TEMPOS = sorted(set(range(60, 181, 10)) | {85, 95, 105, 115, 125, 128, 135, 140, 145, 150, 160, 170, 174})
+
+
+def _spoken(value):
+    """Slot value as it should be read out: 120.0 -> "120", "dry/wet" -> "dry wet\""""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, float):
+        value = round(value, 2)
+    return str(value).replace("/", " ").replace("-", " ")
+
+
+def phrase_for(action):
+    """Return (template key, slots) confirming an action, or None if it has no phrase"""
+    name = action.get("action")
+    params = action.get("params", {})
+    if name == "add_effect" and "track" not in params:
+        name = "add_effect_selected"
+    if name == "ramp":
+        params = {"target": "tempo" if params.get("target") == "tempo" else params.get("parameter"),
+                  "to": params.get("to")}
+    if name not in TEMPLATES:
+        return None
+    return name, {slot: _spoken(value) for slot, value in params.items()
+                  if "{" + slot + "}" in TEMPLATES[name]}
+
+
+def render_text(key, slots):
+    return TEMPLATES[key].format(**slots)
+
+
+def common_phrases(grammar=None):
+    """The confirmations worth pre-rendering at startup: (key, slots) pairs"""
+    grammar = grammar or get_grammar()
+    phrases = [(key, {}) for key in ("import_midi", "failed", "not_understood", "unavailable")]
+    phrases += [("set_tempo", {"value": str(tempo)}) for tempo in COMMON_TEMPOS]
+    phrases += [("create_track", {"type": track_type}) for track_type in grammar.values("track_type")]
+    phrases += [("add_instrument", {"instrument": instrument}) for instrument in grammar.values("instrument")]
+    for effect in grammar.values("effect"):
+        phrases.append(("add_effect_selected", {"effect_type": effect}))
+        phrases += [("add_effect", {"effect_type": effect, "track": str(track)}) for track in range(1, 9)]
+    phrases += [("add_pattern", {"pattern": _spoken(pattern)}) for pattern in grammar.values("pattern")]
+    return phrases
+
+
+class EspeakEngine:
+    """Offline synthesis with espeak-ng (or espeak), as WAV"""
+
+    suffix = ".wav"
+
+    def __init__(self, voice="en", speed=175):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        self.voice = voice
+        self.speed = speed
+        self.name = f"espeak:{voice}:{speed}"
+
+    @property
+    def available(self):
+        return self.binary is not None
+
+    def synthesize(self, text):
+        return subprocess.run([self.binary, "-v", self.voice, "-s", str(self.speed), "--stdout", text],
+                              check=True, capture_output=True).stdout
+
+
+class SayEngine:
+    """Offline synthesis with the macOS `say` command, as AIFF"""
+
+    suffix = ".aiff"
+
+    def __init__(self, voice=None, rate=200):
+        self.binary = shutil.which("say")
+        self.voice = voice
+        self.rate = rate
+        self.name = f"say:{voice or 'default'}:{rate}"
+
+    @property
+    def available(self):
+        return self.binary is not None and sys.platform == "darwin"
+
+    def synthesize(self, text):
+        fd, path = tempfile.mkstemp(suffix=self.suffix)
+        os.close(fd)
+        try:
+            command = [self.binary, "-r", str(self.rate), "-o", path]
+            if self.voice:
+                command += ["-v", self.voice]
+            subprocess.run(command + [text], check=True, capture_output=True)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(path)
+
+
+class Pyttsx3Engine:
+    """Offline synthesis through pyttsx3 (SAPI5, NSSpeechSynthesizer or espeak), as WAV"""
+
+    suffix = ".wav"
+
+    def __init__(self, rate=175):
+        self.rate = rate
+        self.name = f"pyttsx3:{rate}"
+        self._engine = None
+
+    @property
+    def available(self):
+        try:
+            import pyttsx3  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def synthesize(self, text):
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", self.rate)
+        fd, path = tempfile.mkstemp(suffix=self.suffix)
+        os.close(fd)
+        try:
+            self._engine.save_to_file(text, path)
+            self._engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(path)
+
+
+def default_engine():
+    """First offline engine available on this machine, or None"""
+    for engine in (SayEngine(), EspeakEngine(), Pyttsx3Engine()):
+        if engine.available:
+            return engine
+    return None
+
+
+def default_player():
+    """Return play(audio, suffix) for this platform, or None if nothing can play audio"""
+    if sys.platform == "win32":
+        import winsound
+
+        def play(audio, suffix):
+            winsound.PlaySound(audio, winsound.SND_MEMORY)
+        return play
+
+    command = next((c for c in (["afplay"], ["paplay"], ["aplay", "-q"]) if shutil.which(c[0])), None)
+    if command is None:
+        return None
+
+    def play(audio, suffix):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            subprocess.run(command + [path], check=False, capture_output=True)
+        finally:
+            os.unlink(path)
+    return play
+
+
+class AudioCache:
+    """
+    Rendered audio keyed by template and slot values, in a byte-bounded LRU
+    in memory backed by a byte-bounded directory on disk. Disk entries are
+    evicted least recently used first (hits refresh the file's mtime).
+    """
+
+    def __init__(self, directory=None, memory_bytes=8 * 1024 * 1024, disk_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk = OrderedDict()
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            entries = []
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.endswith(".audio") and os.path.isfile(path):
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+            for _, digest, size in sorted(entries):
+                self._disk[digest] = size
+                self._disk_size += size
+
+    @staticmethod
+    def key(voice, template, slots):
+        text = "\x1f".join([voice, template] + [f"{slot}={slots[slot]}" for slot in sorted(slots)])
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest + ".audio")
+
+    def __contains__(self, digest):
+        with self._lock:
+            return digest in self._memory or digest in self._disk
+
+    def get(self, digest):
+        with self._lock:
+            audio = self._memory.get(digest)
+            if audio is not None:
+                self._memory.move_to_end(digest)
+                self.memory_hits += 1
+                return audio
+            on_disk = digest in self._disk
+        if on_disk:
+            try:
+                with open(self._path(digest), "rb") as f:
+                    audio = f.read()
+                os.utime(self._path(digest))
+            except OSError:
+                audio = None
+            with self._lock:
+                if audio is None:
+                    self._disk_size -= self._disk.pop(digest, 0)
+                else:
+                    self._disk.move_to_end(digest)
+                    self.disk_hits += 1
+                    self._remember(digest, audio)
+                    return audio
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def in_memory(self, digest):
+        with self._lock:
+            return digest in self._memory
+
+    def put(self, digest, audio):
+        with self._lock:
+            self._remember(digest, audio)
+        if not self.directory or len(audio) > self.disk_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, self._path(digest))
+        evicted = []
+        with self._lock:
+            self._disk_size += len(audio) - self._disk.pop(digest, 0)
+            self._disk[digest] = len(audio)
+            while self._disk_size > self.disk_bytes:
+                old, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.unlink(self._path(old))
+            except OSError:
+                pass
+
+    def _remember(self, digest, audio):
+        if len(audio) > self.memory_bytes:
+            return
+        self._memory_size += len(audio) - len(self._memory.pop(digest, b""))
+        self._memory[digest] = audio
+        while self._memory_size > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_size -= len(old)
+
+    def status(self):
+        with self._lock:
+            return {
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_items": len(self._disk),
+                "disk_bytes": self._disk_size,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+
+
+class SpokenFeedback:
+    """
+    Speaks short confirmations for the eyes-free path.
+
+    say() never blocks: cached audio goes straight to the playback thread,
+    anything else is synthesized on the render thread first. Requests from
+    commands are rendered before any pre-rendering still in progress, and
+    playback keeps at most `max_queued` phrases so feedback never lags far
+    behind the commands it confirms.
+    """
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+    def __init__(self, engine, play, cache=None, max_queued=2):
+        self.engine = engine
+        self.play = play
+        self.cache = cache or AudioCache()
+        self.max_queued = max_queued
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.dropped = 0
+        self._sequence = 0
+        self._sequence_lock = threading.Lock()
+        self._render_queue = queue.PriorityQueue()
+        self._playback = queue.Queue()
+        self._renderer = threading.Thread(target=self._render_loop, name="speech-render", daemon=True)
+        self._player = threading.Thread(target=self._play_loop, name="speech-play", daemon=True)
+        self._renderer.start()
+        self._player.start()
+
+    def _submit(self, priority, key, slots, speak):
+        with self._sequence_lock:
+            self._sequence += 1
+            sequence = self._sequence
+        self._render_queue.put((priority, sequence, key, slots, speak))
+
+    def prerender(self, phrases=None):
+        """Render common confirmations in the background (skipping cached ones)"""
+        phrases = common_phrases() if phrases is None else phrases
+        for key, slots in phrases:
+            # Disk entries are loaded into memory by the worker, so they play instantly too
+            if self.cache.in_memory(AudioCache.key(self.engine.name, key, slots)):
+                continue
+            self._submit(self.BACKGROUND, key, slots, False)
+
+    def say(self, key, **slots):
+        """Queue a confirmation for playback; returns without waiting"""
+        slots = {slot: _spoken(value) for slot, value in slots.items()}
+        digest = AudioCache.key(self.engine.name, key, slots)
+        # Only a memory hit is free; a disk read still goes through the worker
+        audio = self.cache.get(digest) if self.cache.in_memory(digest) else None
+        if audio is not None:
+            self._enqueue_playback(audio)
+        else:
+            self._submit(self.INTERACTIVE, key, slots, True)
+
+    def confirm(self, actions):
+        """Speak a confirmation for each action that has one"""
+        for action in actions:
+            phrase = phrase_for(action)
+            if phrase:
+                self.say(phrase[0], **phrase[1])
+
+    def _render(self, key, slots):
+        digest = AudioCache.key(self.engine.name, key, slots)
+        audio = self.cache.get(digest)
+        if audio is None:
+            start = time.perf_counter()
+            audio = self.engine.synthesize(render_text(key, slots))
+            self.render_seconds += time.perf_counter() - start
+            self.renders += 1
+            self.cache.put(digest, audio)
+        return audio
+
+    def _render_loop(self):
+        while True:
+            item = self._render_queue.get()
+            if item[2] is None:
+                break
+            _, _, key, slots, speak = item
+            try:
+                audio = self._render(key, slots)
+            except Exception as e:
+                logger.warning(f"Could not synthesize {key!r}: {e}")
+                continue
+            if speak:
+                self._enqueue_playback(audio)
+
+    def _enqueue_playback(self, audio):
+        self._playback.put(audio)
+        # Drop the oldest waiting phrases rather than fall behind the user
+        while self._playback.qsize() > self.max_queued:
+            try:
+                self._playback.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                break
+
+    def _play_loop(self):
+        while True:
+            audio = self._playback.get()
+            if audio is None:
+                break
+            try:
+                self.play(audio, self.engine.suffix)
+            except Exception as e:
+                logger.warning(f"Could not play feedback: {e}")
+
+    def status(self):
+        return {
+            "engine": self.engine.name,
+            "renders": self.renders,
+            "render_ms_avg": self.render_seconds * 1000 / self.renders if self.renders else None,
+            "pending_renders": self._render_queue.qsize(),
+            "queued_playback": self._playback.qsize(),
+            "dropped": self.dropped,
+            "cache": self.cache.status()
+        }
+
+    def close(self):
+        # Sorts after every real request, so pending renders finish first
+        self._render_queue.put((self.BACKGROUND + 1, 0, None, None, False))
+        self._playback.put(None)
+
+
+def create_feedback(cache_dir=None):
+    """SpokenFeedback with the machine's engine and player, or None if either is missing"""
+    engine = default_engine()
+    play = default_player()
+    if engine is None or play is None:
+        logger.warning("Spoken feedback disabled: no offline speech engine or audio player found")
+        return None
+    cache = AudioCache(cache_dir or os.path.join(default_cache_dir(), "speech"))
+    return SpokenFeedback(engine, play, cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render and benchmark spoken feedback")
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--say", default=None, help="speak one phrase, e.g. \"tempo set to 120\"")
+    args = parser.parse_args()
+
+    engine = default_engine()
+    if engine is None:
+        print("No offline speech engine found (install espeak-ng or pyttsx3; macOS has `say`)")
+        return
+    cache = AudioCache(args.cache_dir or os.path.join(default_cache_dir(), "speech"))
+    feedback = SpokenFeedback(engine, default_player() or (lambda audio, suffix: None), cache)
+
+    phrases = common_phrases()
+    start = time.perf_counter()
+    feedback.prerender(phrases)
+    while feedback.status()["pending_renders"]:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    status = feedback.status()
+    print(f"{len(phrases)} common phrases ready in {elapsed:.2f}s with {engine.name} "
+          f"({status['renders']} rendered, avg {status['render_ms_avg'] or 0:.1f} ms each)")
+
+    digest = AudioCache.key(engine.name, "set_tempo", {"value": "120"})
+    start = time.perf_counter()
+    cache.get(digest)
+    print(f"Cached 'tempo set to 120' lookup: {(time.perf_counter() - start) * 1e6:.0f} us")
+    if args.say:
+        feedback.play(engine.synthesize(args.say), engine.suffix)
+    feedback.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+import time
+import queue
+import logging
+import argparse
+import threading
+
+from core.snapshot import Snapshot, diff
+
+logger = logging.getLogger(__name__)
+
+
+def apply_changes(state, changes):
+    """Apply the changes from snapshot.diff(old, new) to old's state dict in place"""
+    tracks = state.setdefault("tracks", [])
+    removed = []
+    for change in changes:
+        op = change["op"]
+        if op == "set_tempo":
+            state["tempo"] = change["value"]
+        elif op == "select_track":
+            state["selected_track"] = change["value"]
+        elif op == "rename_track":
+            tracks[change["track"]]["name"] = change["value"]
+        elif op == "set_track_type":
+            tracks[change["track"]]["type"] = change["value"]
+        elif op == "set_devices":
+            tracks[change["track"]]["devices"] = change["value"]
+        elif op == "set_param":
+            device = tracks[change["track"]]["devices"][change["device"]]
+            device.setdefault("parameters", {})[change["parameter"]] = change["value"]
+        elif op == "remove_param":
+            device = tracks[change["track"]]["devices"][change["device"]]
+            device.get("parameters", {}).pop(change["parameter"], None)
+            if not device.get("parameters", True):
+                del device["parameters"]
+        elif op == "set_extra":
+            state[change["key"]] = change["value"]
+        elif op == "remove_extra":
+            state.pop(change["key"], None)
+        elif op == "set_track_extra":
+            tracks[change["track"]][change["key"]] = change["value"]
+        elif op == "remove_track_extra":
+            tracks[change["track"]].pop(change["key"], None)
+        elif op == "remove_track":
+            removed.append(change["track"])
+        elif op == "add_track":
+            tracks.append(change["value"])
+    if removed:
+        # Removals are always the tail of the track list
+        del tracks[min(removed):min(removed) + len(removed)]
+    return state
+
+
+class StateFeed:
+    """
+    Turns controller state changes into a queue of deltas for a UI loop.
+
+    Controllers that can push (add_state_listener returns True) call back
+    with each new state after it changes, so nothing is fetched while the
+    project is idle. Others, like the Max bridge, which can't report changes
+    made in Live, are polled every `interval` seconds on the feed's thread.
+    Either way, each state is diffed against the last one off the UI thread
+    and only real changes are queued, as {"version", "changes", "state"}
+    where "changes" is None for the first, full state.
+    """
+
+    def __init__(self, controller, interval=1.0):
+        self.controller = controller
+        self.interval = interval
+        self.updates = queue.Queue()
+        self.version = 0
+        self.fetches = 0
+        self.unchanged = 0
+        self.pushed = False
+        self._last = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        listen = getattr(self.controller, "add_state_listener", None)
+        self.pushed = bool(listen and listen(self.push))
+        self._thread = threading.Thread(target=self._run, name="state-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def push(self, state):
+        """Offer a new state; queues the delta from the previous one, if any"""
+        if not state:
+            return False
+        try:
+            return self._queue_changes(state)
+        except Exception as e:
+            # Called on the controller's thread: skip a state we can't read rather than fail its action
+            logger.warning(f"State feed couldn't diff a state: {e}")
+            return False
+
+    def _queue_changes(self, state):
+        snapshot = Snapshot.from_state(state)
+        with self._lock:
+            if self._last is None:
+                changes = None
+            else:
+                changes = diff(self._last, snapshot)
+                if not changes:
+                    self.unchanged += 1
+                    return False
+            self._last = snapshot
+            self.version += 1
+            self.updates.put({"version": self.version, "changes": changes, "state": state})
+        return True
+
+    def refresh(self):
+        """Fetch now instead of at the next poll; a no-op for controllers that push"""
+        if not self.pushed or self._last is None:
+            self._wake.set()
+
+    def _fetch(self):
+        try:
+            self.fetches += 1
+            self.push(self.controller.get_project_state())
+        except Exception as e:
+            logger.debug(f"State feed fetch failed: {e}")
+
+    def _run(self):
+        # One fetch for the initial state; pushing controllers only need that
+        self._fetch()
+        while not self._stop.is_set():
+            self._wake.wait(None if self.pushed else self.interval)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self._fetch()
+
+    def drain(self):
+        """Take every queued update without blocking"""
+        items = []
+        while True:
+            try:
+                items.append(self.updates.get_nowait())
+            except queue.Empty:
+                return items
+
+    def status(self):
+        return {
+            "mode": "push" if self.pushed else "poll",
+            "version": self.version,
+            "fetches": self.fetches,
+            "unchanged": self.unchanged,
+            "queued": self.updates.qsize()
+        }
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare polling the project state with a pushed state feed")
+    parser.add_argument("--tracks", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--frame", type=float, default=1 / 60)
+    args = parser.parse_args()
+
+    from core.simulated_controller import SimulatedController
+    controller = SimulatedController()
+    for number in range(args.tracks):
+        controller.execute_action({"action": "create_track", "params": {"type": "midi"}})
+        controller.execute_action({"action": "add_effect", "params": {"effect_type": "reverb", "track": number + 1}})
+
+    # Polling every frame: a full fetch each time whether or not anything changed
+    fetches = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds / 2:
+        controller.get_project_state()
+        fetches += 1
+        time.sleep(args.frame)
+    print(f"Polling each frame: {fetches} full fetches in {args.seconds / 2:.1f}s with nothing changing")
+
+    feed = StateFeed(controller).start()
+    tempo = 120
+    latencies = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds / 2:
+        tempo += 1
+        changed = time.perf_counter()
+        controller.execute_action({"action": "set_tempo", "params": {"value": tempo}})
+        # A UI loop draining once per frame
+        while True:
+            updates = feed.drain()
+            if updates and updates[-1]["state"]["tempo"] == tempo:
+                latencies.append(time.perf_counter() - changed)
+                break
+            time.sleep(args.frame / 10)
+        time.sleep(args.frame * 5)
+    feed.close()
+    latencies.sort()
+    print(f"Pushed feed ({feed.status()['mode']}): {feed.status()['fetches']} fetch(es), {len(latencies)} updates, "
+          f"median {latencies[len(latencies) // 2] * 1000:.2f} ms from change to queue")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import re
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+FILLER_WORDS = {"the", "a", "an", "my", "track", "channel"}
+
+
+def normalize_track_name(name):
+    """Lowercase, drop punctuation and filler words: "1-MIDI" -> "1 midi", "the Drums" -> "drums" """
+    return " ".join(w for w in WORD_PATTERN.findall(name.lower()) if w not in FILLER_WORDS)
+
+
+def _singular(token):
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+class TrackNameIndex:
+    """
+    Name -> track number resolver kept in sync with the project state.
+
+    Tracks are keyed by a stable id so exact-name, prefix and token maps only
+    change for the track that was created, renamed or deleted. Resolution is
+    a few dict lookups regardless of how many tracks the set has. Track
+    numbers are 1-based, as in "add reverb to track 2".
+    """
+
+    def __init__(self, tracks=()):
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._order = []        # position -> track id
+        self._positions = {}    # track id -> position
+        self._names = {}        # track id -> normalized name
+        self._exact = {}        # normalized name -> {track ids}
+        self._prefixes = {}     # name prefix -> {track ids}
+        self._tokens = {}       # token (and singular form) -> {track ids}
+
+        for position, name in enumerate(tracks):
+            self.track_created(position, name)
+
+    def __len__(self):
+        return len(self._order)
+
+    def _keys(self, name):
+        prefixes = {name[:i] for i in range(1, len(name) + 1)}
+        tokens = set()
+        for token in name.split():
+            tokens.add(token)
+            tokens.add(_singular(token))
+        return prefixes, tokens
+
+    def _add_keys(self, track_id, name):
+        self._names[track_id] = name
+        self._exact.setdefault(name, set()).add(track_id)
+        prefixes, tokens = self._keys(name)
+        for prefix in prefixes:
+            self._prefixes.setdefault(prefix, set()).add(track_id)
+        for token in tokens:
+            self._tokens.setdefault(token, set()).add(track_id)
+
+    def _remove_keys(self, track_id):
+        name = self._names.pop(track_id)
+        prefixes, tokens = self._keys(name)
+        for mapping, keys in ((self._exact, (name,)), (self._prefixes, prefixes), (self._tokens, tokens)):
+            for key in keys:
+                ids = mapping.get(key)
+                if ids is not None:
+                    ids.discard(track_id)
+                    if not ids:
+                        del mapping[key]
+
+    def _reposition(self, start):
+        for position in range(start, len(self._order)):
+            self._positions[self._order[position]] = position
+
+    def track_created(self, position, name):
+        """Register a track inserted at a 0-based position"""
+        with self._lock:
+            self._create(position, name)
+
+    def track_renamed(self, position, name):
+        with self._lock:
+            self._rename(position, name)
+
+    def track_deleted(self, position):
+        with self._lock:
+            self._delete(position)
+
+    def _create(self, position, name):
+        track_id = self._next_id
+        self._next_id += 1
+        position = min(max(position, 0), len(self._order))
+        self._order.insert(position, track_id)
+        self._reposition(position)
+        self._add_keys(track_id, normalize_track_name(name))
+
+    def _rename(self, position, name):
+        track_id = self._order[position]
+        normalized = normalize_track_name(name)
+        if self._names[track_id] != normalized:
+            self._remove_keys(track_id)
+            self._add_keys(track_id, normalized)
+
+    def _delete(self, position):
+        track_id = self._order.pop(position)
+        del self._positions[track_id]
+        self._remove_keys(track_id)
+        self._reposition(position)
+
+    def update_from_state(self, state):
+        """
+        Bring the index in line with a project state, touching only the
+        tracks whose name changed or that were added or removed at the end.
+        Runs under one lock: rig state fetches and the batch route may call
+        it concurrently, and interleaved updates would leave names and
+        positions out of step.
+        """
+        names = [track.get("name", "") for track in state.get("tracks", [])]
+        with self._lock:
+            while len(self._order) > len(names):
+                self._delete(len(self._order) - 1)
+            for position, name in enumerate(names):
+                if position < len(self._order):
+                    self._rename(position, name)
+                else:
+                    self._create(position, name)
+
+    def _first(self, ids):
+        return min(self._positions[i] for i in ids) + 1
+
+    def resolve(self, phrase):
+        """
+        Return the 1-based track number for a spoken track name, or None
+        """
+        query = normalize_track_name(phrase)
+        if not query:
+            return None
+
+        with self._lock:
+            # Exact name, lowest track number wins among duplicates
+            ids = self._exact.get(query)
+            if ids:
+                return self._first(ids)
+
+            # "bass 2" -> second track called "bass"
+            head, _, last = query.rpartition(" ")
+            if head and last.isdigit():
+                ids = self._exact.get(head) or self._prefixes.get(head)
+                if ids and 0 < int(last) <= len(ids):
+                    return sorted(self._positions[i] for i in ids)[int(last) - 1] + 1
+
+            # Start of a name: "dru" -> "drums", lowest track number if several match
+            ids = self._prefixes.get(query)
+            if ids:
+                return self._first(ids)
+
+            # Every spoken word appears in the name: "lead" -> "synth lead"
+            token_sets = [self._tokens.get(_singular(token)) for token in query.split()]
+            if all(token_sets):
+                ids = set.intersection(*token_sets)
+                if ids:
+                    return self._first(ids)
+
+        return None
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import tracemalloc
+
+from core.grammar import get_grammar
+
+logger = logging.getLogger(__name__)
+
+# Hesitations speech-to-text keeps in the transcript
+FILLERS = frozenset(["um", "uh", "uhm", "erm", "er", "hmm", "mm", "ah"])
+
+# Words that join two commands: "create a midi track and then add reverb"
+JOINERS = frozenset(["and", "then", "also", "next", "after", "that"])
+
+SENTENCE_END = re.compile(r"[.!?;]+$")
+
+
+def read_chunks(source, size=4096):
+    """
+    Yield text from a file-like object (read in `size` pieces), or pass
+    through an iterable of strings such as the voice layer's transcripts
+    """
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(size)
+            if not chunk:
+                return
+            yield chunk.decode("utf-8", errors="replace") if isinstance(chunk, bytes) else chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+def iter_words(chunks):
+    """Split streamed text into words, holding back a word cut off at a chunk boundary"""
+    partial = ""
+    for chunk in chunks:
+        text = partial + chunk
+        if not text:
+            continue
+        words = text.split()
+        # The last word may continue in the next chunk unless whitespace ends this one
+        if words and not text[-1].isspace():
+            partial = words.pop()
+        else:
+            partial = ""
+        for word in words:
+            yield word
+    if partial:
+        yield partial
+
+
+class CommandSegmenter:
+    """
+    Cuts a stream of words into command candidates.
+
+    A candidate starts at a command verb ("add", "set", "fade", ...) and ends
+    at sentence punctuation, at the next verb, or after `max_words` words.
+    Words before the first verb of a sentence and hesitations are dropped,
+    so each parser sees the verb first. Only the current candidate is held,
+    so memory stays bounded however long the transcript runs.
+    """
+
+    def __init__(self, grammar=None, max_words=32):
+        self.grammar = grammar or get_grammar()
+        self.verbs = frozenset(self.grammar.verb_intents)
+        self.max_words = max_words
+        self.dropped_words = 0
+
+    def _is_verb(self, word):
+        return self.grammar.normalize(word) in self.verbs
+
+    def segment(self, words):
+        """Yield command candidate strings from an iterable of words"""
+        current = []
+        for raw in words:
+            sentence_end = bool(SENTENCE_END.search(raw)) and not raw.lower().endswith((".mid", ".midi"))
+            word = raw.rstrip(".,!?;:\"')").lstrip("\"'(")
+            lowered = word.lower()
+
+            if lowered and lowered not in FILLERS:
+                if self._is_verb(lowered):
+                    if current:
+                        yield self._finish(current)
+                    current = [word]
+                elif current:
+                    current.append(word)
+                else:
+                    self.dropped_words += 1
+
+            if current and (sentence_end or len(current) >= self.max_words):
+                yield self._finish(current)
+                current = []
+        if current:
+            yield self._finish(current)
+
+    def _finish(self, words):
+        # "add reverb and then" - joiners belong to the next command, not this one
+        while len(words) > 1 and words[-1].lower() in JOINERS:
+            words.pop()
+        return " ".join(words)
+
+
+def stream_plans(source, nlp, mapper, segmenter=None, chunk_size=4096):
+    """
+    Parse a transcript as it streams in, yielding one plan per command
+    candidate as soon as the candidate is complete:
+        {"index", "text", "parsed", "actions"}
+    Candidates the parser can't map still yield a plan with no actions.
+    """
+    segmenter = segmenter or CommandSegmenter(grammar=getattr(mapper, "grammar", None))
+    for index, text in enumerate(segmenter.segment(iter_words(read_chunks(source, chunk_size)))):
+        parsed = nlp.parse_command(text)
+        actions = mapper.map_to_actions(parsed) if parsed.get("intent") else []
+        yield {"index": index, "text": text, "parsed": parsed, "actions": actions or []}
+
+
+def generate_transcript(commands=1000, seed=0):
+    """A long run-on dictation: commands mixed with filler, sparse punctuation"""
+    import random
+    rng = random.Random(seed)
+    commands_pool = ["create a midi track with piano", "add reverb to track {n}", "set tempo to {t}",
+                     "set reverb wet to {w}", "add delay to track {n}", "fade reverb wet to {w} over 4 bars"]
+    filler = ["um", "okay so", "let me think", "uh right", "and then", "so yeah", "hmm what else"]
+    parts = []
+    for _ in range(commands):
+        parts.append(rng.choice(filler))
+        command = rng.choice(commands_pool).format(n=rng.randint(1, 4), t=rng.randint(80, 160), w=rng.randint(0, 100))
+        parts.append(command + rng.choice(["", "", ".", ","]))
+    return " ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse a dictation transcript into action plans as it streams in")
+    parser.add_argument("transcript", nargs="?", help="transcript file, or - for stdin (default: generated benchmark)")
+    parser.add_argument("--commands", type=int, default=5000, help="commands in the generated transcript")
+    args = parser.parse_args()
+
+    from core.simple_nlp import SimpleNLPModule
+    from core.action_mapper import ActionMapper
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+
+    if args.transcript:
+        source = sys.stdin if args.transcript == "-" else open(args.transcript, encoding="utf-8")
+        try:
+            for plan in stream_plans(source, nlp, mapper):
+                print(json.dumps({"text": plan["text"], "actions": plan["actions"]}), flush=True)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        return
+
+    import io
+    transcript = generate_transcript(args.commands)
+    print(f"Transcript: {len(transcript.split())} words, {len(transcript) / 1024:.0f} kB")
+
+    # Feed it the way a slow producer would: small pieces, one at a time
+    source = io.StringIO(transcript)
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    plans = 0
+    planned = 0
+    for plan in stream_plans(source, nlp, mapper, chunk_size=256):
+        if first is None and plan["actions"]:
+            first = time.perf_counter() - start
+        plans += 1
+        planned += bool(plan["actions"])
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Streaming: first action after {first * 1000:.2f} ms, {planned}/{plans} candidates mapped "
+          f"in {elapsed:.2f}s, peak {peak / 1024:.0f} kB above the transcript")
+
+
+if __name__ == "__main__":
+    main()
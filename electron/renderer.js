@@ -26,6 +26,9 @@ socket.on('connect', () => {
   
   // Request Max for Live status
   socket.emit('get_max_status');
+  
+  // Receive state changes made by any client, coalesced while we render
+  socket.emit('subscribe_state', { ack: true });
 });
 
 socket.on('disconnect', () => {
@@ -34,8 +37,12 @@ socket.on('disconnect', () => {
 
 
 
-socket.on('project_state', (state) => {
+socket.on('project_state', (state, update) => {
   updateProjectState(state);
+  // Pushed states carry their rig and version; acknowledge to get the next one
+  if (update) {
+    socket.emit('state_ack', update);
+  }
 });
 
 socket.on('max_status', (data) => {
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.automation import CURVES, Ramp, RampScheduler, RampingController
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+from core.simulated_controller import SimulatedController
+
+
+class RecordingController(SimulatedController):
+    """Simulated controller that timestamps every set action it receives"""
+
+    def __init__(self):
+        super().__init__()
+        self.sets = []
+        self.sets_lock = threading.Lock()
+
+    def execute_action(self, action):
+        if action["action"] in ("set_tempo", "set_effect_param"):
+            with self.sets_lock:
+                self.sets.append((time.monotonic(), action["action"], action["params"]["value"]))
+        return super().execute_action(action)
+
+
+def test_ramp_interpolation():
+    """Test that ramps are interpolated up front and thinned to the value resolution"""
+
+    print("Testing Ramp Interpolation")
+    print("=" * 50)
+
+    ramp = Ramp("tempo", None, 120, 140, duration=2.0, rate=30, resolution=1.0, started_at=0.0)
+    assert ramp.values[0] == 120 and ramp.values[-1] == 140
+    assert len(ramp.values) == 21  # one update per whole BPM, not 61
+    assert ramp.due_index(1.0) == 10 and ramp.due_index(5.0) == 20
+    print(f"  ✅ 120 -> 140 BPM over 2s: {len(ramp.values)} updates")
+
+    for curve in CURVES:
+        ramp = Ramp("x", None, 0, 80, duration=1.0, curve=curve, started_at=0.0)
+        assert abs(ramp.values[0]) < 1e-9 and abs(ramp.values[-1] - 80) < 1e-9
+        assert all(b >= a for a, b in zip(ramp.values, ramp.values[1:]))
+    print(f"  ✅ Curves {sorted(CURVES)} are monotonic from start to end")
+
+
+def test_ramp_commands():
+    """Test fades from commands, replacement of overlapping ramps and direct sets"""
+
+    print("\nTesting Ramp Commands")
+    print("=" * 50)
+
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+    simulated = RecordingController()
+    simulated.execute_action({"action": "create_track", "params": {"type": "audio"}})
+    simulated.execute_action({"action": "add_effect", "params": {"effect_type": "reverb", "track": 1}})
+    controller = RampingController(simulated)
+
+    try:
+        # At 240 BPM one bar lasts a second
+        controller.execute_action({"action": "set_tempo", "params": {"value": 240}})
+        actions = mapper.map_to_actions(nlp.parse_command("fade reverb wet from 0 to 80 over 0.5 bars"))
+        print(f"  'fade reverb wet from 0 to 80 over 0.5 bars' -> {actions}")
+        assert controller.execute_action(actions[0])
+        time.sleep(0.8)
+        reverb = controller.get_project_state()["tracks"][0]["devices"][0]
+        assert reverb["parameters"]["wet"] == 80
+        wet = [value for _, action, value in simulated.sets if action == "set_effect_param"]
+        assert wet[0] == 0 and wet == sorted(wet) and 5 < len(wet) <= 20
+        print(f"  ✅ Reverb wet faded 0 -> 80 in {len(wet)} updates")
+
+        # A second tempo ramp takes over from wherever the first one got to
+        controller.execute_action({"action": "ramp", "params": {"target": "tempo", "to": 300, "duration": 1.0,
+                                                                "unit": "seconds"}})
+        time.sleep(0.3)
+        controller.execute_action({"action": "ramp", "params": {"target": "tempo", "to": 100, "duration": 0.3,
+                                                                "unit": "seconds"}})
+        time.sleep(0.6)
+        tempos = [value for _, action, value in simulated.sets if action == "set_tempo"][1:]
+        peak = max(tempos)
+        assert 240 < peak < 300 and tempos[-1] == 100
+        assert controller.scheduler.active == {}
+        print(f"  ✅ Overlapping tempo ramp replaced at {peak:.0f} BPM and finished at {tempos[-1]:.0f}")
+
+        # Setting the value directly cancels a running ramp
+        controller.execute_action({"action": "ramp", "params": {"target": "tempo", "to": 200, "duration": 5,
+                                                                "unit": "seconds"}})
+        time.sleep(0.2)
+        controller.execute_action({"action": "set_tempo", "params": {"value": 90}})
+        time.sleep(0.3)
+        assert controller.get_project_state()["tempo"] == 90
+        print("  ✅ Direct set_tempo cancelled the ramp")
+    finally:
+        controller.close()
+
+
+def test_scheduler_rate_cap():
+    """Test that many concurrent ramps share one thread without exceeding the send rate"""
+
+    print("\nTesting Concurrent Ramps")
+    print("=" * 50)
+
+    sends = []
+    scheduler = RampScheduler(max_rate=100)
+    try:
+        for i in range(50):
+            ramp = Ramp(("test", i), lambda value: value, 0, 100, duration=0.5, rate=60)
+            scheduler.start(ramp, sends.append)
+        time.sleep(1.5)
+        status = scheduler.status()
+        print(f"  50 ramps over 0.5s: {status}")
+        assert status["active"] == 0
+        # 50 ramps x 31 steps would be 1550 sends; the cap allows ~100/s
+        assert status["sent_updates"] <= 160
+        assert sends.count(100.0) == 50
+        print("  ✅ Send rate capped, every ramp still reached its end value")
+    finally:
+        scheduler.close()
+
+
+def test_hung_rig_isolated():
+    """Test that a rig stuck on its sends doesn't hold up another rig's ramps"""
+
+    print("\nTesting Hung Rig Isolation")
+    print("=" * 50)
+
+    fast, slow = [], []
+    concurrent = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def hung_send(value):
+        with lock:
+            concurrent["now"] += 1
+            concurrent["max"] = max(concurrent["max"], concurrent["now"])
+        time.sleep(0.25)
+        with lock:
+            concurrent["now"] -= 1
+        slow.append(value)
+
+    scheduler = RampScheduler(max_rate=200)
+    try:
+        for i in range(3):
+            scheduler.start(Ramp(("slow", i), lambda value: value, 0, 100, duration=0.5), hung_send, lane="slow")
+        start = time.monotonic()
+        scheduler.start(Ramp(("fast", 0), lambda value: value, 0, 100, duration=0.5), fast.append, lane="fast")
+        while 100.0 not in fast and time.monotonic() - start < 2:
+            time.sleep(0.01)
+        elapsed = time.monotonic() - start
+        print(f"  Fast rig: {len(fast)} updates in {elapsed:.2f}s; hung rig: {len(slow)} so far")
+        assert fast[-1] == 100.0 and elapsed < 0.7 and len(fast) > 10
+        assert concurrent["max"] == 1
+        print("  ✅ Fast rig's fade finished on time; the hung rig had one send in flight at a time")
+
+        while slow.count(100.0) < 3 and time.monotonic() - start < 4:
+            time.sleep(0.05)
+        assert slow.count(100.0) == 3 and scheduler.status()["active"] == 0
+        print(f"  ✅ Hung rig's ramps skipped ahead and still ended at 100 ({len(slow)} sends)")
+    finally:
+        scheduler.close()
+
+
+if __name__ == "__main__":
+    test_ramp_interpolation()
+    test_ramp_commands()
+    test_scheduler_rate_cap()
+    test_hung_rig_isolated()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+from core.simulated_controller import SimulatedController
+from core.batch_runner import BatchRunner
+
+
+def test_batch_commands():
+    """Test running a mixed batch and getting one state snapshot at the end"""
+
+    controller = SimulatedController()
+    runner = BatchRunner(SimpleNLPModule(), ActionMapper(), controller)
+
+    items = ["create midi track", "add piano"]
+    items += [{"action": "create_track", "params": {"type": "audio"}} for _ in range(28)]
+    items += [{"command": "set tempo to 96"}, "do a backflip", {"bogus": True}]
+
+    print("Testing Batch Commands")
+    print("=" * 50)
+
+    lines = [json.loads(json.dumps(line)) for line in runner.run(items)]
+    # Results stream as items complete; each carries its index
+    results = sorted((line for line in lines if line["type"] == "result"), key=lambda r: r["index"])
+    states = [line for line in lines if line["type"] == "state"]
+
+    assert len(results) == len(items)
+    assert len(states) == 1 and lines[-1]["type"] == "state"
+    assert [r["success"] for r in results[-3:]] == [True, False, False]
+
+    summary = states[0]["summary"]
+    print(f"  ✅ {summary}")
+    assert summary["succeeded"] == len(items) - 2
+    assert states[0]["state"]["tempo"] == 96
+    assert len(states[0]["state"]["tracks"]) == 30
+
+    # stop_on_error skips everything after the first failure
+    lines = list(runner.run(["set tempo to 100", "nonsense", "set tempo to 110"], stop_on_error=True))
+    assert lines[-1]["summary"]["skipped"] == 1
+    assert lines[-1]["state"]["tempo"] == 100
+
+    # ...including one that fails on the controller
+    lines = list(runner.run(["set tempo to 100", {"action": "no_such_action"}, "set tempo to 120"],
+                            stop_on_error=True))
+    assert [line["success"] for line in lines[:-1]] == [True, False]
+    assert lines[-1]["summary"]["skipped"] == 1 and lines[-1]["state"]["tempo"] == 100
+
+
+def test_batch_shares_pipeline():
+    """Test that independent items overlap in one pipeline instead of running one by one"""
+
+    latency = 0.05
+    controller = SimulatedController(latency=latency)
+    runner = BatchRunner(SimpleNLPModule(), ActionMapper(), controller)
+    for _ in range(6):
+        controller.execute_action({"action": "create_track", "params": {"type": "midi"}})
+    items = [f"set tempo to {tempo}" for tempo in (90, 100)]
+    items += [{"action": "add_effect", "params": {"effect_type": "reverb", "track": track}} for track in range(1, 7)]
+
+    start = time.perf_counter()
+    lines = list(runner.run(items))
+    elapsed = time.perf_counter() - start
+    results = [line for line in lines if line["type"] == "result"]
+    assert all(result["success"] for result in results)
+    # The two tempo changes still land in order
+    assert lines[-1]["state"]["tempo"] == 100
+    assert all(len(track["devices"]) == 1 for track in lines[-1]["state"]["tracks"])
+    # One item at a time would be 8 round trips plus the state fetch
+    print(f"  ✅ {len(items)} items in {elapsed * 1000:.0f} ms (one by one: {(len(items) + 1) * latency * 1000:.0f} ms)")
+    assert elapsed < (len(items) + 1) * latency * 0.75
+
+
+if __name__ == "__main__":
+    test_batch_commands()
+    test_batch_shares_pipeline()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.beat_sync import BeatScheduler, LatencyEstimate, ScheduledController, SimulatedLive, SongClock
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+from core.simulated_controller import SimulatedController
+
+
+def test_launch_commands():
+    """Test that launch and transport commands carry their timing to the actions"""
+
+    print("Testing Launch Commands")
+    print("=" * 50)
+
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+    cases = {
+        "launch scene 3 on the next bar": [{"action": "launch_scene", "params": {
+            "scene": 3, "quantize": 1, "unit": "bars", "wait": 1}}],
+        "fire clip 2 on track 1 in 2 beats": [{"action": "launch_clip", "params": {
+            "track": 1, "clip": 2, "quantize": 1, "unit": "beats", "wait": 2}}],
+        "stop on the next bar": [{"action": "stop_playing", "params": {"quantize": 1, "unit": "bars", "wait": 1}}],
+        "launch scene 1 now": [{"action": "launch_scene", "params": {"scene": 1}}],
+        "start playback": [{"action": "start_playing", "params": {}}],
+        "launch scene 2 in 500 bars": [],
+    }
+    for command, expected in cases.items():
+        actions = mapper.map_to_actions(nlp.parse_command(command))
+        assert actions == expected, (command, actions)
+        print(f"  ✅ '{command}' -> {actions}")
+
+
+def test_clock_with_jitter():
+    """Test that the song clock recovers tempo, drift and phase from jittery beat messages"""
+
+    print("\nTesting Song Clock")
+    print("=" * 50)
+
+    rng = np.random.default_rng(7)
+    tempo, drift_ppm, latency, jitter = 128.0, 300.0, 0.004, 0.010
+    beats_per_second = tempo / 60 * (1 + drift_ppm * 1e-6)
+    offset = 12.5
+    estimate = LatencyEstimate()
+    for _ in range(32):
+        estimate.observe_rtt(2 * latency + rng.uniform(0, jitter) + rng.uniform(0, jitter))
+    clock = SongClock(estimate, window=64, time_source=lambda: offset)
+    clock.observe_tempo(tempo)
+    assert not clock.synced
+    for beat in range(64):
+        clock.observe(beat, offset + beat / beats_per_second + latency + rng.uniform(0, jitter))
+
+    assert clock.synced
+    status = clock.status()
+    phase_error = (clock.beat_at(offset + 70 / beats_per_second) - 70) / beats_per_second
+    assert abs(phase_error) < 0.003, phase_error
+    assert abs(status["drift_ppm"] - drift_ppm) < 400, status
+    assert abs(clock.time_of(clock.beat_at(20.0)) - 20.0) < 1e-9
+    print(f"  ✅ Phase within {abs(phase_error) * 1000:.2f} ms, drift {status['drift_ppm']:.0f} ppm "
+          f"(true {drift_ppm:.0f}), jitter {status['jitter_ms']:.2f} ms")
+
+    clock.observe_tempo(140.0)
+    assert not clock.synced and clock.status()["observations"] == 1
+    print("  ✅ Tempo change restarts the fit")
+
+
+def test_scheduled_launches():
+    """Test that scheduled launches land on the beat over a simulated jittery link"""
+
+    print("\nTesting Beat-Aligned Launches")
+    print("=" * 50)
+
+    clock = SongClock()
+    live = SimulatedLive(clock, tempo=240.0, drift_ppm=150.0, latency=0.004, jitter=0.006, seed=3).start()
+    scheduler = BeatScheduler(clock, live.send)
+    controller = ScheduledController(SimulatedController(), scheduler)
+    try:
+        # Before sync, timed actions go out at once with the timing stripped
+        action = {"action": "launch_scene", "params": {"scene": 2, "quantize": 1, "unit": "beats", "wait": 1}}
+        assert controller.execute_action(action)
+        assert controller.get_project_state()["launched_scene"] == 2 and not live.arrivals
+
+        deadline = time.monotonic() + 5
+        while clock.status()["observations"] < 6 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert clock.synced
+
+        for wait in (1, 2, 1, 1, 2):
+            launch = scheduler.schedule({"action": "launch_scene", "params": {"scene": 1}}, 1, "beats", wait)
+            assert launch["beat"] > clock.beat_at()
+            while launch["id"] in scheduler.pending:
+                time.sleep(0.002)
+        errors = [(beat - round(beat)) / live.beats_per_second * 1000 for _, beat in live.arrivals]
+        assert len(errors) == 5
+        assert max(abs(error) for error in errors) < 10, errors
+        print(f"  ✅ 5 launches landed {np.mean(np.abs(errors)):.2f} ms (worst {max(map(abs, errors)):.2f} ms) "
+              f"from the beat at 240 BPM with 6 ms jitter")
+
+        # Cancelled launches never go out
+        launch = scheduler.schedule({"action": "launch_scene", "params": {"scene": 4}}, 1, "bars", 2)
+        assert scheduler.cancel(launch["id"])
+        time.sleep(2.2 * 4 / live.beats_per_second)
+        assert len(live.arrivals) == 5 and scheduler.status()["launched"] == 5
+        print("  ✅ Cancelled launch not sent")
+    finally:
+        live.close()
+        controller.close()
+
+
+def test_tempo_change_while_pending():
+    """Test that a launch due while a tempo change has unsynced the clock still goes out"""
+
+    print("\nTesting Tempo Change With a Pending Launch")
+    print("=" * 50)
+
+    clock = SongClock()
+    live = SimulatedLive(clock, tempo=240.0, drift_ppm=0.0, latency=0.002, jitter=0.002, seed=5).start()
+    scheduler = BeatScheduler(clock, live.send)
+    try:
+        deadline = time.monotonic() + 5
+        while clock.status()["observations"] < 6 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert clock.synced
+
+        # Due in a beat or two, well before three new beats can resync the clock
+        launch = scheduler.schedule({"action": "launch_scene", "params": {"scene": 1}}, 1, "beats", 1)
+        clock.observe_tempo(250.0)
+        assert not clock.synced
+        assert scheduler.schedule({"action": "launch_scene", "params": {"scene": 2}}, 1, "beats", 1) is None
+        deadline = time.monotonic() + 3
+        while launch["id"] in scheduler.pending and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert launch["id"] not in scheduler.pending and len(live.arrivals) == 1
+        assert scheduler._thread.is_alive()
+        print(f"  ✅ Launch for beat {launch['beat']:.0f} waited for the clock to resync and went out at beat "
+              f"{live.arrivals[0][1]:.2f}")
+
+        # The scheduler thread survived and keeps launching
+        launch = scheduler.schedule({"action": "launch_scene", "params": {"scene": 3}}, 1, "beats", 1)
+        while launch["id"] in scheduler.pending:
+            time.sleep(0.002)
+        assert len(live.arrivals) == 2 and abs(live.arrivals[1][1] - launch["beat"]) < 0.05
+        print("  ✅ Later launches still land on the beat")
+    finally:
+        live.close()
+        scheduler.close()
+
+    # A clock that never resyncs (transport stopped) gives up waiting and sends at once
+    sent = []
+    clock = SongClock()
+    clock.observe_tempo(120.0)
+    now = time.monotonic()
+    for beat in range(4):
+        clock.observe(beat, now - (3 - beat) * 0.5)
+    scheduler = BeatScheduler(clock, sent.append, resync_timeout=0.2)
+    try:
+        launch = scheduler.schedule({"action": "launch_scene", "params": {"scene": 4}}, 1, "beats", 1)
+        clock.observe_tempo(90.0)
+        time.sleep(1.0)
+        assert sent == [{"action": "launch_scene", "params": {"scene": 4}}] and not scheduler.pending
+        assert scheduler._thread.is_alive()
+        print(f"  ✅ Without beats for {scheduler.resync_timeout}s the launch was sent at once")
+    finally:
+        scheduler.close()
+
+
+if __name__ == "__main__":
+    test_launch_commands()
+    test_clock_with_jitter()
+    test_scheduled_launches()
+    test_tempo_change_while_pending()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import time
+import random
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.browser_catalog import BrowserCatalog, build_index
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+
+
+def make_browser_dump(path, n_presets=20000):
+    """Write a nested browser dump with real device names and generated presets"""
+    rng = random.Random(0)
+    words = ["warm", "bright", "dark", "vintage", "lush", "deep", "analog", "glass", "dusty", "wide"]
+    presets = [{"name": f"{' '.join(rng.sample(words, 2)).title()} {rng.randint(1, 999)}.adv"}
+               for _ in range(n_presets)]
+    tree = [
+        {"name": "Instruments", "children": [
+            {"name": "Grand Piano.adg"}, {"name": "Operator"}, {"name": "Wavetable"},
+            {"name": "Electric Piano.adg"}, {"name": "Presets", "children": presets}
+        ]},
+        {"name": "Audio Effects", "children": [
+            {"name": "Reverb"}, {"name": "Delay"}, {"name": "Echo"}, {"name": "Compressor"},
+            {"name": "Glue Compressor"}, {"name": "EQ Eight"}
+        ]}
+    ]
+    with open(path, "w") as f:
+        json.dump(tree, f)
+
+
+def test_browser_catalog():
+    """Test catalog indexing, ranked lookup and action mapping"""
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_path = os.path.join(tmp, "browser.json")
+        index_dir = os.path.join(tmp, "catalog")
+        make_browser_dump(dump_path)
+        build_index(dump_path, index_dir)
+
+        catalog = BrowserCatalog(index_dir)
+        print(f"Catalog with {len(catalog)} items")
+
+        assert catalog.resolve("grand piano")["name"] == "Grand Piano"
+        assert catalog.resolve("glue compressor", kind="effect")["name"] == "Glue Compressor"
+        assert catalog.resolve("echo", kind="effect")["name"] == "Echo"
+        assert catalog.resolve("compressor", kind="effect")["name"] == "Compressor"
+        assert catalog.search("zzzz") == []
+
+        start = time.perf_counter()
+        for _ in range(200):
+            catalog.search("glue compressor", kind="effect")
+        per_query_ms = (time.perf_counter() - start) / 200 * 1000
+        print(f"  {per_query_ms:.3f} ms per query")
+
+        parsers = [SimpleNLPModule(catalog=catalog)]
+        try:
+            # The server's parser, when spaCy is installed
+            from core.nlp import NLPModule
+            parsers.append(NLPModule(catalog=catalog))
+        except (ImportError, OSError) as e:
+            print(f"  Skipping NLPModule: {e}")
+        mapper = ActionMapper(catalog=catalog)
+
+        test_commands = {
+            "add Grand Piano": ("add_instrument", "Grand Piano"),
+            "add Glue Compressor": ("add_effect", "Glue Compressor"),
+            "add glue compressor to track 2": ("add_effect", "Glue Compressor"),
+            "add reverb to track 1": ("add_effect", "Reverb"),
+        }
+        for nlp in parsers:
+            for command, (action_type, item_name) in test_commands.items():
+                actions = mapper.map_to_actions(nlp.parse_command(command))
+                action = actions[-1]
+                status = "✅" if action["params"]["browser_item"]["name"] == item_name else "❌"
+                print(f"  {status} {type(nlp).__name__} '{command}' -> {action}")
+                assert action["action"] == action_type
+                assert action["params"]["browser_item"]["name"] == item_name
+
+
+if __name__ == "__main__":
+    test_browser_catalog()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.circuit_breaker import GuardedController, LiveUnavailableError, CLOSED, OPEN
+from core.simulated_controller import SimulatedController
+
+
+def test_circuit_breaker():
+    """Calls to a hung Live fail within the deadline, then fail fast, then recover"""
+
+    live = SimulatedController()
+    controller = GuardedController(live, call_timeout=0.05, failure_threshold=2, probe_interval=0.05)
+    action = {"action": "set_tempo", "params": {"value": 125}}
+
+    print("Testing Circuit Breaker")
+    print("=" * 50)
+
+    assert controller.execute_action(action) is True
+
+    # Live hangs: each call is cut off at the deadline
+    live.latency = 1.0
+    for _ in range(2):
+        start = time.perf_counter()
+        try:
+            controller.execute_action(action)
+            assert False, "expected LiveUnavailableError"
+        except LiveUnavailableError:
+            pass
+        assert time.perf_counter() - start < 0.5
+    assert controller.circuit_state == OPEN
+    print(f"  ✅ circuit opened: {controller.status()}")
+
+    # While open, calls fail immediately
+    start = time.perf_counter()
+    try:
+        controller.get_project_state()
+        assert False, "expected LiveUnavailableError"
+    except LiveUnavailableError:
+        pass
+    assert time.perf_counter() - start < 0.01
+    assert not controller.available
+
+    # Live comes back: the background probe closes the circuit
+    live.latency = 0.0
+    deadline = time.time() + 2
+    while controller.circuit_state != CLOSED and time.time() < deadline:
+        time.sleep(0.02)
+    assert controller.circuit_state == CLOSED
+    assert controller.get_project_state()["tempo"] == 125
+    print("  ✅ circuit closed after Live came back")
+    controller.close()
+
+
+class StuckLive(SimulatedController):
+    """Actions hang until released; project state still answers at once"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def execute_action(self, action):
+        self.release.wait()
+        return super().execute_action(action)
+
+
+def test_stuck_workers():
+    """Calls that outlive their deadline hold workers; once all are held, stay open"""
+
+    print("\nTesting Stuck Call Workers")
+    print("=" * 50)
+
+    live = StuckLive()
+    controller = GuardedController(live, call_timeout=0.05, failure_threshold=3, probe_interval=0.05, workers=2)
+    action = {"action": "set_tempo", "params": {"value": 125}}
+    try:
+        for _ in range(2):
+            try:
+                controller.execute_action(action)
+                assert False, "expected LiveUnavailableError"
+            except LiveUnavailableError:
+                pass
+        # Both workers are held: the next call fails at once instead of queueing
+        start = time.perf_counter()
+        try:
+            controller.execute_action(action)
+            assert False, "expected LiveUnavailableError"
+        except LiveUnavailableError:
+            pass
+        assert time.perf_counter() - start < 0.01
+        assert controller.circuit_state != CLOSED and controller.busy_workers == 2
+        print(f"  ✅ saturated pool fails fast: {controller.status()}")
+
+        # The probe answers, but the circuit stays open while the workers are held
+        time.sleep(0.3)
+        assert controller.circuit_state != CLOSED
+        live.release.set()
+        deadline = time.time() + 2
+        while controller.circuit_state != CLOSED and time.time() < deadline:
+            time.sleep(0.02)
+        assert controller.circuit_state == CLOSED and controller.busy_workers == 0
+        assert controller.execute_action(action) is True
+        print("  ✅ circuit closed once the stuck calls returned")
+    finally:
+        live.release.set()
+        controller.close()
+
+
+if __name__ == "__main__":
+    test_circuit_breaker()
+    test_stuck_workers()
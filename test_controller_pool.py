@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.controller_pool import ControllerPool, parse_endpoints, parse_groups
+from core.simulated_controller import SimulatedController
+
+
+def test_group_fan_out():
+    """A slow rig should not stall the others in a group"""
+
+    pool = ControllerPool(controller_factory=lambda host, port: SimulatedController(host, port))
+    for name, host, port in parse_endpoints("a=10.0.0.1:11000,b=10.0.0.2:11000"):
+        pool.add_endpoint(name, host, port)
+    pool.add_endpoint("slow", controller=SimulatedController(latency=0.2))
+    for name, members in parse_groups("all=a+b+slow;fast=a+b").items():
+        pool.add_group(name, members)
+
+    print("Testing Controller Pool")
+    print("=" * 50)
+
+    actions = [{"action": "set_tempo", "params": {"value": 140}}]
+
+    start = time.perf_counter()
+    results = pool.execute("fast", actions)
+    assert results == {"a": [True], "b": [True]}
+    print(f"  ✅ fast group in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Slow rig times out without holding up the fast ones
+    start = time.perf_counter()
+    results = pool.execute("all", actions, timeout=0.05)
+    elapsed = time.perf_counter() - start
+    assert results["a"] == [True] and results["b"] == [True] and results["slow"] is None
+    assert elapsed < 0.15
+    print(f"  ✅ group with slow rig returned in {elapsed * 1000:.1f} ms")
+
+    # Sessions bind to a target; unbound sessions use the default
+    pool.bind("session-1", "b")
+    assert pool.target_for("session-1") == "b"
+    assert pool.target_for("session-2") == "a"
+    pool.unbind("session-1")
+    assert pool.target_for("session-1") == "a"
+
+    # State mirrors and track indexes are per rig
+    pool.execute("a", [{"action": "create_track", "params": {"type": "midi", "name": "Drums"}}])
+    states = pool.get_project_state("fast")
+    assert len(states["a"]["tracks"]) == 1 and states["b"]["tracks"] == []
+    assert pool.endpoints["a"].track_index.resolve("drums") == 1
+    assert pool.endpoints["b"].track_index.resolve("drums") is None
+
+    status = pool.status()
+    assert [e["name"] for e in status["endpoints"]] == ["a", "b", "slow"]
+    pool.close()
+
+
+if __name__ == "__main__":
+    test_group_fan_out()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import random
+import string
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.simple_nlp import SimpleNLPModule
+from core.fuzzy_vocabulary import FuzzyVocabulary, edit_distance
+
+
+def test_speech_to_text_corrections():
+    """Test that near-miss transcriptions still parse"""
+
+    nlp = SimpleNLPModule()
+
+    test_commands = {
+        "add revurb to track 2": ("add_effect", {"effect": "reverb", "track_number": 2}),
+        "add compresser to track 1": ("add_effect", {"effect": "compressor", "track_number": 1}),
+        "set tempto to 120": ("set", {"tempo": 120}),
+        "set dealy mix to 50": ("set_effect_param", {"effect": "delay", "parameter": "dry/wet", "value": 50.0}),
+        "add a pianno": ("create", {"instrument": "piano"})
+    }
+
+    print("Testing Fuzzy Vocabulary Correction")
+    print("=" * 50)
+
+    for command, (intent, parameters) in test_commands.items():
+        parsed = nlp.parse_command(command)
+        status = "✅" if parsed == {"intent": intent, "parameters": parameters} else "❌"
+        print(f"  {status} '{command}' -> {parsed}")
+        assert parsed["intent"] == intent
+        assert parsed["parameters"] == parameters
+
+
+def test_large_vocabulary_lookup():
+    """Lookup cost should not grow with thousands of device and preset names"""
+
+    rng = random.Random(0)
+    names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+             for _ in range(5000)]
+    vocabulary = FuzzyVocabulary(names + ["compressor", "reverb"])
+
+    assert vocabulary.correct("compresor") == "compressor"
+    assert vocabulary.correct("revreb") == "reverb"
+    assert edit_distance("revreb", "reverb", 2) == 1
+
+    queries = [name[:2] + name[3:] for name in names[:500]]
+    start = time.perf_counter()
+    for query in queries:
+        vocabulary.lookup(query)
+    per_lookup_us = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"  {len(vocabulary)} words, {per_lookup_us:.1f} us per lookup")
+    assert per_lookup_us < 5000
+
+
+if __name__ == "__main__":
+    test_speech_to_text_corrections()
+    test_large_vocabulary_lookup()
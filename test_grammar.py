@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.grammar import DEFAULT_GRAMMAR_PATH, compile_grammar, load_grammar
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+
+
+def test_grammar_compilation_and_cache():
+    """Test that the grammar compiles, validates ranges and is cached by content hash"""
+
+    print("Testing Declarative Grammar")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        grammar = load_grammar(cache_dir=cache_dir)
+        assert "reverb" in grammar.values("effect")
+        assert grammar.verb_intents["add"] == ("create", "add_effect")
+        assert grammar.is_valid("tempo", 120)
+        assert not grammar.is_valid("tempo", 1000)
+        assert not grammar.is_valid("value", 101)
+        print("  ✅ Compiled tables and ranges")
+
+        cached = os.listdir(cache_dir)
+        assert len(cached) == 1 and grammar.source_hash[:16] in cached[0]
+        assert load_grammar(cache_dir=cache_dir).source_hash == grammar.source_hash
+        print(f"  ✅ Cached as {cached[0]}")
+
+        # Adding a new effect is a data change with its own cache entry
+        with open(DEFAULT_GRAMMAR_PATH) as f:
+            spec = json.load(f)
+        spec["slots"]["effect"]["values"].append("chorus")
+        extended = compile_grammar(json.dumps(spec).encode(), cache_dir)
+        assert extended.source_hash != grammar.source_hash
+        assert len(os.listdir(cache_dir)) == 2
+
+        nlp = SimpleNLPModule(grammar=extended)
+        mapper = ActionMapper(grammar=extended)
+        actions = mapper.map_to_actions(nlp.parse_command("add chorus to track 3"))
+        print(f"  'add chorus to track 3' -> {actions}")
+        assert actions == [{"action": "add_effect", "params": {"effect_type": "chorus", "track": 3}}]
+
+
+if __name__ == "__main__":
+    test_grammar_compilation_and_cache()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.grammar import DEFAULT_GRAMMAR_PATH, GrammarWatcher, get_grammar, set_grammar
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+
+
+def _edit(path, change):
+    with open(path) as f:
+        spec = json.load(f)
+    change(spec)
+    _write(path, json.dumps(spec))
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    # Make sure the edit is visible even on filesystems with coarse mtimes
+    _write.seconds += 1
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + _write.seconds * 1_000_000_000))
+
+
+_write.seconds = 0
+
+
+def _add_chorus(spec):
+    spec["slots"]["effect"]["values"].append("chorus")
+    spec["synonyms"]["space"] = "reverb"
+
+
+def test_hot_reload():
+    """Test that a grammar edit reaches the parser and mapper without rebuilding them"""
+
+    print("Testing Grammar Hot Reload")
+    print("=" * 50)
+
+    shared = get_grammar()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "grammar.json")
+        shutil.copy(DEFAULT_GRAMMAR_PATH, path)
+        watcher = GrammarWatcher(path, cache_dir=tmp)
+        nlp = SimpleNLPModule(grammar=watcher.grammar)
+        mapper = ActionMapper(grammar=watcher.grammar)
+        watcher.subscribe(nlp.use_grammar)
+        watcher.subscribe(mapper.use_grammar)
+        try:
+            assert not watcher.check()
+            assert mapper.map_to_actions(nlp.parse_command("add chorus to track 3")) != [
+                {"action": "add_effect", "params": {"effect_type": "chorus", "track": 3}}]
+
+            # A parse that started before the swap keeps the tables it began with
+            before = nlp.tables
+
+            _edit(path, _add_chorus)
+            assert watcher.check() and watcher.reloads == 1
+            assert nlp.tables is not before and "chorus" not in before.grammar.values("effect")
+            actions = mapper.map_to_actions(nlp.parse_command("add chorus to track 3"))
+            assert actions == [{"action": "add_effect", "params": {"effect_type": "chorus", "track": 3}}]
+            actions = mapper.map_to_actions(nlp.parse_command("add space to track 2"))
+            assert actions == [{"action": "add_effect", "params": {"effect_type": "reverb", "track": 2}}]
+            print(f"  ✅ New effect and synonym live after reload: {watcher.status()['version']}")
+
+            # Components created after the reload get the new grammar too
+            assert "chorus" in ActionMapper().grammar.values("effect")
+            print("  ✅ New components pick up the reloaded grammar")
+
+            # A broken edit is reported and the working grammar stays
+            current = nlp.tables
+            _write(path, '{"intents": ')
+            assert not watcher.check()
+            assert watcher.last_error and nlp.tables is current and watcher.reloads == 1
+            assert mapper.map_to_actions(nlp.parse_command("add chorus to track 3"))
+            print(f"  ✅ Broken edit kept the old grammar: {watcher.last_error}")
+        finally:
+            watcher.close()
+            set_grammar(shared)
+
+
+if __name__ == "__main__":
+    test_hot_reload()
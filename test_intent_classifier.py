@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import sys
+import os
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.intent_classifier import (HashingIntentClassifier, generate_corpus, load_default_model, split_templates,
+                                    train_default_model)
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+
+
+def test_intent_classifier():
+    """Test the hashed n-gram classifier on phrasing the rule parsers miss"""
+
+    training, held_out = split_templates()
+    model = train_default_model(templates=training)
+
+    test_commands = {
+        "could you please put some reverb on track 2": "add_effect",
+        "add delay to track 1": "add_effect",
+        "set tempo to 120": "set",
+        "can you change the bpm to 90": "set",
+        "create midi track": "create",
+        "add piano": "create",
+        "set reverb dry/wet to 30%": "set_effect_param",
+        "launch scene 3": "launch",
+        "fade reverb wet to 10 over 4 bars": "ramp",
+        "import groove.mid to track 2": "import_midi",
+        "hello there": None,
+        "remove track 3": None,
+        "xyzzy frobnicate the wombat": None
+    }
+
+    print("Testing Hashing Intent Classifier")
+    print("=" * 50)
+
+    predictions = model.predict_batch(list(test_commands))
+    for (command, expected), predicted in zip(test_commands.items(), predictions):
+        status = "✅" if predicted == expected else "❌"
+        print(f"  {status} '{command}' -> {predicted}")
+        assert predicted == expected
+
+    # Phrasings that were left out of training entirely
+    texts, labels = zip(*generate_corpus(50, seed=7, templates=held_out))
+    predicted = model.predict_batch(list(texts))
+    accuracy = sum(p == l for p, l in zip(predicted, labels)) / len(labels)
+    print(f"  Held-out template accuracy: {accuracy:.1%}")
+    assert accuracy > 0.8
+
+    # Below the confidence cutoff a command is unknown rather than guessed
+    assert model.predict_batch(["set tempo to 120"], min_confidence=1.0) == [None]
+    print("  ✅ Low-confidence predictions map to None")
+
+    # Round trip through disk
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "intent_model.npz")
+        model.save(path)
+        loaded = HashingIntentClassifier.load(path)
+        assert loaded.predict_batch(list(test_commands)) == predictions
+
+
+def test_parser_fallback():
+    """Test that the parser falls back on the classifier when no verb matches"""
+
+    print("\nTesting Classifier Fallback in the Parser")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "intent_model.npz")
+        model = load_default_model(path)
+        assert os.path.exists(path)
+        assert load_default_model(path).predict("set tempo to 120") == "set"
+        print("  ✅ Default model trained once and loaded from its cache")
+
+    command = "could you please put some reverb on track 2"
+    assert SimpleNLPModule().parse_command(command)["intent"] is None
+    nlp = SimpleNLPModule(classifier=model)
+    parsed = nlp.parse_command(command)
+    assert parsed == {"intent": "add_effect", "parameters": {"effect": "reverb", "track_number": 2}}
+    assert ActionMapper().map_to_actions(parsed) == [{"action": "add_effect",
+                                                      "params": {"effect_type": "reverb", "track": 2}}]
+    assert nlp.parse_command("please set the tempo to 128")["parameters"] == {"tempo": 128}
+    assert nlp.parse_command("hello there")["intent"] is None
+    # Known verbs still go through the rules
+    assert nlp.parse_command("set tempo to 90") == SimpleNLPModule().parse_command("set tempo to 90")
+    print(f"  ✅ '{command}' -> {parsed}")
+
+
+if __name__ == "__main__":
+    test_intent_classifier()
+    test_parser_fallback()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import sys
+import os
+import socket
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.clip_writer import ClipWritingController
+from core.link_probe import LinkProber, LinkStats, OscTempoProbe, parse_thresholds, probe_for
+from core.midi_patterns import encode_message
+from core.simulated_controller import SimulatedController
+from core.pacer import AdaptivePacer, PacedController
+from core.circuit_breaker import GuardedController
+
+
+def test_link_stats():
+    """Test percentiles, jitter, loss and alerts over a fixed-size window"""
+
+    print("Testing Link Statistics")
+    print("=" * 50)
+
+    stats = LinkStats("rig", window=100)
+    for _ in range(5000):
+        stats.record(40.0)
+    for i in range(100):
+        stats.record(None if i % 10 == 0 else (2.0 if i % 2 else 4.0))
+    assert len(stats.rtts) == 100 and stats.sent == 5100 and stats.lost == 10
+    figures = stats.recent()
+    assert figures["rtt_max_ms"] == 4.0 and abs(figures["loss_rate"] - 0.1) < 1e-9
+    assert 1.5 < figures["jitter_ms"] <= 2.0
+    assert stats.counts.sum() == 5090 and stats.counts[stats.bounds.searchsorted(40.0)] == 5000
+    print(f"  ✅ Recent window forgets old round trips: {figures}")
+
+    alerts = stats.alerts()
+    assert [alert["metric"] for alert in alerts] == ["loss_rate"]
+    assert LinkStats("new").alerts() == []
+    print(f"  ✅ Alerts: {alerts}")
+
+    assert parse_thresholds("loss_rate=0.01")["loss_rate"] == 0.01
+    try:
+        parse_thresholds("latency=3")
+        assert False
+    except ValueError:
+        print("  ✅ Unknown thresholds rejected")
+
+
+def test_prober():
+    """Test probing real controller stacks, a hung link and alert transitions"""
+
+    print("\nTesting Link Prober")
+    print("=" * 50)
+
+    release = threading.Event()
+    hung = {"calls": 0}
+
+    def hanging_probe():
+        hung["calls"] += 1
+        release.wait()
+        return True
+
+    events = []
+    prober = LinkProber(timeout=0.05, on_alert=lambda name, degraded, alerts: events.append((name, degraded)))
+    try:
+        simulated = SimulatedController(latency=0.002)
+        controller = PacedController(GuardedController(simulated))
+        assert probe_for(controller) == simulated.ping
+        prober.add("studio", probe_for(controller))
+        prober.add("stage", hanging_probe)
+        for _ in range(12):
+            prober.probe_all()
+
+        status = prober.status()
+        studio, stage = status["studio"], status["stage"]
+        assert studio["sent"] == 12 and studio["lost"] == 0 and not studio["degraded"]
+        assert 2.0 <= studio["rtt_p50_ms"] < 50
+        assert stage["lost"] == 12 and hung["calls"] == 1 and stage["degraded"]
+        assert events == [("stage", True)]
+        print(f"  ✅ studio p50 {studio['rtt_p50_ms']:.2f} ms; hung stage probed once, 12 losses, alerted")
+
+        # The link comes back; the loss rate falls under the threshold after a full window
+        release.set()
+        for _ in range(300):
+            prober.probe_all()
+        assert events == [("stage", True), ("stage", False)]
+        print("  ✅ Recovery reported once the recent loss rate dropped")
+
+        metrics = prober.metrics()
+        assert 'abletonml_link_rtt_ms_bucket{endpoint="studio",le="+Inf"} 312' in metrics
+        # The first probe after the release may still find the old one in flight
+        lost = prober.links["stage"].lost
+        assert lost in (12, 13) and f'abletonml_link_probes_lost{{endpoint="stage"}} {lost}' in metrics
+        print(f"  ✅ Metrics exported ({len(metrics.splitlines())} lines)")
+    finally:
+        release.set()
+        prober.close()
+
+
+class BridgeController:
+    """A controller without ping(), like the Max bridge; counts the calls that reach it"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.calls = 0
+
+    def execute_action(self, action):
+        self.calls += 1
+        return True
+
+    def get_project_state(self):
+        self.calls += 1
+        return {"tempo": 120, "tracks": [], "selected_track": -1}
+
+
+def test_osc_tempo_probe():
+    """Test that stacks without ping() are probed with a tempo query below the pacer and guard"""
+
+    print("\nTesting AbletonOSC Tempo Probe")
+    print("=" * 50)
+
+    # Stands in for AbletonOSC: answers tempo queries to the address they came from
+    live = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    live.bind(("127.0.0.1", 0))
+    queries = []
+
+    def answer():
+        while True:
+            try:
+                data, address = live.recvfrom(65536)
+            except OSError:
+                return
+            queries.append(data)
+            live.sendto(encode_message("/live/song/get/tempo", 120.0), address)
+
+    threading.Thread(target=answer, daemon=True).start()
+    # The Max bridge's port is not AbletonOSC's; nothing there answers tempo queries
+    bridge = BridgeController("127.0.0.1", 7400)
+    writer = ClipWritingController(GuardedController(bridge), osc_host="127.0.0.1", osc_port=live.getsockname()[1])
+    # A pacer allowing one call a second would add its token wait to any probe through it
+    controller = PacedController(writer, AdaptivePacer(rate=1, min_rate=1, burst=1))
+    prober = LinkProber(timeout=0.5)
+    try:
+        probe = probe_for(controller)
+        assert isinstance(probe, OscTempoProbe) and probe.port == live.getsockname()[1]
+        prober.add("bridge", probe)
+        for _ in range(20):
+            prober.probe_all()
+        status = prober.status()["bridge"]
+        assert status["lost"] == 0 and status["rtt_p95_ms"] < 50 and bridge.calls == 0
+        assert len(queries) == 20 and queries[0].startswith(b"/live/song/get/tempo\0")
+        print(f"  ✅ 20 tempo queries answered, p95 {status['rtt_p95_ms']:.2f} ms, no controller calls")
+
+        # Nothing listening: probes are lost, and the circuit breaker never hears of them
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(("127.0.0.1", 0))
+        guarded = ClipWritingController(GuardedController(BridgeController("127.0.0.1", 7400)),
+                                        osc_port=silent.getsockname()[1])
+        quiet = probe_for(guarded)
+        quiet.timeout = 0.05
+        prober.add("quiet", quiet)
+        for _ in range(3):
+            prober.probe_all()
+        assert prober.status()["quiet"]["lost"] == 3
+        assert guarded.status()["consecutive_failures"] == 0 and guarded.controller.controller.calls == 0
+        silent.close()
+        print("  ✅ Unanswered probes counted as lost without touching the breaker")
+
+        # No AbletonOSC address down the chain: the configured one, not the bridge's port
+        os.environ.pop("ABLETONML_OSC_HOST", None)
+        os.environ["ABLETONML_OSC_PORT"] = "11010"
+        try:
+            fallback = probe_for(GuardedController(BridgeController("10.0.0.5", 7400)))
+            assert (fallback.host, fallback.port) == ("127.0.0.1", 11010)
+            fallback.close()
+        finally:
+            del os.environ["ABLETONML_OSC_PORT"]
+        print("  ✅ Stacks without ClipWritingController probe ABLETONML_OSC_PORT")
+    finally:
+        prober.close()
+        live.close()
+
+
+if __name__ == "__main__":
+    test_link_stats()
+    test_prober()
+    test_osc_tempo_probe()
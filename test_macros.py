@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+import sys
+import os
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.macros import MacroLibrary, default_macro_path
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+from core.simulated_controller import SimulatedController
+
+VOCAL_CHAIN = ["create audio track", "add compressor to track {track}", "add reverb to track {track}",
+               "set reverb wet to {wet}"]
+
+
+class CountingController(SimulatedController):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def execute_action(self, action):
+        self.calls += 1
+        return super().execute_action(action)
+
+
+class CountingNLP(SimpleNLPModule):
+    def __init__(self):
+        super().__init__()
+        self.parses = 0
+
+    def parse_command(self, command):
+        self.parses += 1
+        return super().parse_command(command)
+
+
+def test_define_and_invoke():
+    """Test that a macro compiles once and runs as a single batch with substituted values"""
+
+    print("Testing Macro Definition and Invocation")
+    print("=" * 50)
+
+    nlp = CountingNLP()
+    mapper = ActionMapper()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "macros.json")
+        library = MacroLibrary(path)
+        macro = library.define("Vocal  Chain", VOCAL_CHAIN, {"track": 1, "wet": 30}, nlp, mapper)
+        assert macro.name == "vocal chain" and nlp.parses == 4
+        assert [(index, key, parameter) for index, key, parameter, _ in macro.bindings] == [
+            (1, "track", "track"), (2, "track", "track"), (3, "value", "wet")]
+        print(f"  ✅ Compiled {len(macro.actions)} actions with {len(macro.bindings)} substitution points")
+
+        # Binding substitutes into copies; fixed steps are shared, the template is untouched
+        batch = macro.bind({"wet": 45})
+        assert batch["params"]["actions"][3]["params"]["value"] == 45
+        assert batch["params"]["actions"][0] is macro.bind()["params"]["actions"][0]
+        assert macro.bind()["params"]["actions"][3]["params"]["value"] == 30
+        print("  ✅ Bound batch carries the substituted values")
+
+        # Stored compiled: reloading never touches the parser
+        reloaded = MacroLibrary(path)
+        invocation = reloaded.match("vocal chain with wet 60 and track 1")
+        assert invocation is not None
+        found, values = invocation
+        assert values == {"wet": 60, "track": 1}
+        controller = CountingController()
+        assert reloaded.invoke(controller, found.name, values)
+        assert controller.calls == 1 and nlp.parses == 4
+        track = controller.get_project_state()["tracks"][0]
+        assert [device["name"] for device in track["devices"]] == ["compressor", "reverb"]
+        assert track["devices"][1]["parameters"]["wet"] == 60
+        print("  ✅ Reloaded macro ran in one controller call, no parsing")
+
+        assert reloaded.match("set tempo to 120") is None
+
+    # User macros are kept with user data, not in the cache
+    os.environ["ABLETONML_DATA_DIR"] = "/data/abletonml"
+    try:
+        assert default_macro_path() == os.path.join("/data/abletonml", "macros.json")
+    finally:
+        del os.environ["ABLETONML_DATA_DIR"]
+
+
+def test_validation():
+    """Test that bad macros are rejected at definition and bad values at invocation"""
+
+    print("\nTesting Macro Validation")
+    print("=" * 50)
+
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+    library = MacroLibrary()
+    macro = library.define("vocal chain", VOCAL_CHAIN, {"track": 1, "wet": 30}, nlp, mapper)
+
+    for values in ({"wet": 150}, {"track": 0}, {"feedback": 3}):
+        try:
+            macro.bind(values)
+            assert False, values
+        except ValueError as e:
+            print(f"  ✅ Rejected {values}: {e}")
+
+    bad_definitions = [
+        (["set reverb wet to {wet}"], {}),
+        (["set reverb wet to {wet}"], {"wet": 30, "mix": 40}),
+        (["set reverb wet to 30"], {"wet": 30}),
+        ([{"action": "ramp", "params": {"target": "tempo", "to": 140}}], {}),
+        (["flibber the jabber"], {}),
+    ]
+    for steps, parameters in bad_definitions:
+        try:
+            library.define("broken", steps, parameters, nlp, mapper)
+            assert False, steps
+        except ValueError as e:
+            print(f"  ✅ Refused to define {steps}: {e}")
+    assert "broken" not in library
+
+
+if __name__ == "__main__":
+    test_define_and_invoke()
+    test_validation()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import struct
+import tempfile
+
+import mido
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.midi_import import MidiFileStream, MidiImporter, generate_midi_file, resolve_midi_path
+from core.clip_writer import ClipWritingController
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+from core.simulated_controller import SimulatedController
+from core.circuit_breaker import GuardedController
+from core.track_index import TrackNameIndex
+
+
+def _mido_notes(path):
+    """Reference (track, pitch, start, duration) tuples computed from a full mido load"""
+    midi = mido.MidiFile(path)
+    notes = []
+    for number, track in enumerate(midi.tracks):
+        tick = 0
+        sounding = {}
+        for message in track:
+            tick += message.time
+            if message.type == "note_on" and message.velocity:
+                sounding.setdefault((message.channel, message.note), []).append(tick)
+            elif message.type in ("note_on", "note_off"):
+                start = sounding[(message.channel, message.note)].pop(0)
+                notes.append((number, message.note, start / midi.ticks_per_beat,
+                              (tick - start) / midi.ticks_per_beat))
+    return sorted(notes)
+
+
+def test_streamed_notes_match_mido():
+    """Test that streamed batches match a full mido parse and stay bounded"""
+
+    print("Testing Streaming MIDI Reader")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "orchestra.mid")
+        generate_midi_file(path, tracks=3, notes_per_track=3000)
+
+        stream = MidiFileStream(path, batch_size=500, block_size=4096)
+        streamed = []
+        for track, notes in stream.batches():
+            assert len(notes) <= 500
+            streamed.extend(zip([track] * len(notes), notes.pitch.tolist(), notes.start.tolist(),
+                                notes.duration.tolist()))
+
+        assert sorted(streamed) == _mido_notes(path)
+        assert stream.notes_read == 9000 and stream.progress == 1.0
+        print(f"  ✅ {stream.notes_read} notes in batches of <= 500, identical to mido.MidiFile")
+
+
+def test_running_status():
+    """Test running status and note-on with velocity 0 as note-off"""
+
+    print("\nTesting Running Status")
+    print("=" * 50)
+
+    events = bytes([
+        0x00, 0x90, 60, 100,   # note on C
+        0x00, 64, 100,         # running status: note on E
+        0x60, 60, 0,           # running status: velocity 0 ends C after 96 ticks
+        0x60, 64, 0,           # E ends after 192 ticks
+        0x00, 0xFF, 0x2F, 0x00
+    ])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "running.mid")
+        with open(path, "wb") as f:
+            f.write(b"MThd" + struct.pack(">IHHH", 6, 0, 1, 96))
+            f.write(b"MTrk" + struct.pack(">I", len(events)) + events)
+
+        batches = list(MidiFileStream(path).batches())
+        notes = batches[0][1]
+        assert notes.pitch.tolist() == [60, 64]
+        assert notes.duration.tolist() == [1.0, 2.0]
+        print("  ✅ Running status decoded")
+
+
+def test_import_and_command():
+    """Test streaming an import to OSC datagrams and the "load ... into track N" command"""
+
+    print("\nTesting MIDI Import Command")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_midi_file(os.path.join(tmp, "Groove.mid"), tracks=2, notes_per_track=2000)
+
+        datagrams = []
+        progress = []
+        summary = MidiImporter(datagrams.append, batch_size=1000).import_file(
+            os.path.join(tmp, "Groove.mid"), track_index=1,
+            progress=lambda fraction, notes: progress.append((fraction, notes)))
+        assert summary["notes"] == 4000 and summary["datagrams"] == len(datagrams)
+        assert datagrams[0].startswith(b"/live/clip_slot/create_clip")
+        assert datagrams[-1].startswith(b"/live/clip/set/end_marker")
+        assert progress[-1] == (1.0, 4000) and len(progress) == 4
+        print(f"  ✅ Imported {summary['notes']} notes in {summary['datagrams']} datagrams, "
+              f"clip length {summary['length']} beats")
+
+        os.environ["ABLETONML_MIDI_DIR"] = tmp
+        try:
+            nlp = SimpleNLPModule()
+            mapper = ActionMapper()
+            controller = SimulatedController()
+            for _ in range(2):
+                controller.execute_action({"action": "create_track", "params": {"type": "midi"}})
+
+            actions = mapper.map_to_actions(nlp.parse_command("load Groove.mid into track 2"))
+            print(f"  'load Groove.mid into track 2' -> {actions}")
+            assert actions == [{"action": "import_midi", "params": {"file": "Groove.mid", "track": 2}}]
+            assert controller.execute_action(actions[0])
+            clip = controller.get_project_state()["tracks"][1]["clips"][0]
+            assert clip["notes"] == 4000
+            assert not controller.execute_action({"action": "import_midi", "params": {"file": "missing.mid"}})
+            print(f"  ✅ {clip['notes']} notes loaded into track 2")
+
+            # On a real rig the wrapper streams the file to AbletonOSC itself
+            datagrams = []
+            writer = ClipWritingController(controller, send=datagrams.append)
+            assert writer.execute_action(actions[0])
+            assert datagrams[0].startswith(b"/live/clip_slot/create_clip")
+            assert datagrams[-1].startswith(b"/live/clip/set/end_marker")
+            # Track 2 already holds the simulated import, so the next slot is used
+            assert struct.unpack(">ii", datagrams[0][-12:-4]) == (1, 1)
+            print(f"  ✅ ClipWritingController sent {len(datagrams)} datagrams to track 2, slot 2")
+
+            # Spoken track names resolve like add_effect's and add_pattern's
+            named = ActionMapper(track_index=TrackNameIndex(["Bass", "Drums"]))
+            actions = named.map_to_actions(nlp.parse_command("load Groove.mid into the drums"))
+            assert actions == [{"action": "import_midi", "params": {"file": "Groove.mid", "track": 2}}]
+            assert named.map_to_actions(nlp.parse_command("load Groove.mid into the vocals")) == []
+            print(f"  ✅ 'load Groove.mid into the drums' -> {actions}")
+
+            # Streaming runs above the guard: slower than its call deadline, still no failure
+            guarded = GuardedController(controller, call_timeout=0.2)
+            slow = ClipWritingController(guarded, send=lambda datagram: time.sleep(0.05))
+            start = time.monotonic()
+            assert slow.execute_action(actions[0])
+            elapsed = time.monotonic() - start
+            assert elapsed > 0.2 and guarded.status()["consecutive_failures"] == 0 and slow.available
+            print(f"  ✅ {elapsed:.2f}s import past a 0.2s call deadline, breaker untouched")
+        finally:
+            del os.environ["ABLETONML_MIDI_DIR"]
+
+
+def test_midi_path_restricted():
+    """Test that spoken file names can't reach outside ABLETONML_MIDI_DIR"""
+
+    print("\nTesting MIDI Path Restriction")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        midi_dir = os.path.join(tmp, "midi")
+        os.mkdir(midi_dir)
+        generate_midi_file(os.path.join(tmp, "secret.mid"), tracks=1, notes_per_track=10)
+        os.symlink(os.path.join(tmp, "secret.mid"), os.path.join(midi_dir, "link.mid"))
+        os.environ["ABLETONML_MIDI_DIR"] = midi_dir
+        try:
+            assert resolve_midi_path("My Groove.mid") == os.path.join(os.path.realpath(midi_dir), "My Groove.mid")
+            for name in ("../secret.mid", os.path.join(tmp, "secret.mid"), "~/secret.mid", ".hidden.mid",
+                         "..", "", "link.mid"):
+                try:
+                    resolve_midi_path(name)
+                    raise AssertionError(f"{name!r} was accepted")
+                except ValueError:
+                    pass
+            controller = SimulatedController()
+            controller.execute_action({"action": "create_track", "params": {"type": "midi"}})
+            assert not controller.execute_action({"action": "import_midi",
+                                                  "params": {"file": "../secret.mid", "track": 1}})
+            print("  ✅ Absolute, ~, .. and symlinked names rejected")
+        finally:
+            del os.environ["ABLETONML_MIDI_DIR"]
+
+
+if __name__ == "__main__":
+    test_streamed_notes_match_mido()
+    test_running_status()
+    test_import_and_command()
+    test_midi_path_restricted()
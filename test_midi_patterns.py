@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import socket
+
+import numpy as np
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.midi_patterns import (MAX_DATAGRAM, NOTE_DTYPE, ClipNoteWriter, arpeggio, four_on_the_floor,
+                                notes_per_datagram, parse_note_name)
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+from core.simulated_controller import SimulatedController
+from core.clip_writer import ClipWritingController
+
+
+def _decode_add_notes(datagram):
+    """Split a /live/clip/add/notes datagram into (address, track, clip, records)"""
+    address_end = datagram.index(b"\0")
+    address = datagram[:address_end].decode()
+    tags_start = (address_end // 4 + 1) * 4
+    tags_end = datagram.index(b"\0", tags_start)
+    tags = datagram[tags_start:tags_end]
+    args_start = (tags_end // 4 + 1) * 4
+    track, clip = np.frombuffer(datagram[args_start:args_start + 8], dtype=">i4")
+    records = np.frombuffer(datagram[args_start + 8:], dtype=NOTE_DTYPE)
+    assert tags == b",ii" + b"ifffi" * len(records)
+    return address, int(track), int(clip), records
+
+
+def test_generated_patterns():
+    """Test note generation for the built-in patterns"""
+
+    print("Testing MIDI Pattern Generation")
+    print("=" * 50)
+
+    assert parse_note_name("c") == 60
+    assert parse_note_name("eb") == 63
+    assert parse_note_name("f#2") == 54
+    assert parse_note_name("the") is None
+
+    kick = four_on_the_floor(bars=8)
+    assert len(kick) == 32 and kick.start[-1] == 31.0 and set(kick.pitch) == {36}
+    print(f"  ✅ four-on-the-floor: {len(kick)} kicks over 8 bars")
+
+    arp = arpeggio("c", "minor", bars=1)
+    assert arp.pitch[:8].tolist() == [60, 63, 67, 72, 75, 79, 84, 79]
+    print(f"  ✅ c minor arpeggio: {arp.pitch[:8].tolist()}...")
+
+
+def test_chunked_clip_writes():
+    """Test that thousands of notes go out in a few datagrams under the size limit"""
+
+    print("\nTesting Chunked Clip Note Writes")
+    print("=" * 50)
+
+    datagrams = []
+    writer = ClipNoteWriter(datagrams.append)
+    notes = arpeggio("a", "minor", bars=500)
+
+    start = time.perf_counter()
+    sent = writer.write(2, 0, notes)
+    elapsed = time.perf_counter() - start
+
+    assert sent == len(datagrams)
+    assert datagrams[0].startswith(b"/live/clip_slot/create_clip\0")
+    assert all(len(d) <= MAX_DATAGRAM for d in datagrams)
+
+    decoded = [_decode_add_notes(d) for d in datagrams[1:]]
+    assert all(address == "/live/clip/add/notes" and track == 2 and clip == 0
+               for address, track, clip, _ in decoded)
+    records = np.concatenate([r for _, _, _, r in decoded])
+    assert len(records) == len(notes) == 8000
+    assert np.array_equal(records["pitch"], notes.pitch)
+    assert np.allclose(records["start"], notes.start)
+    assert len(decoded[0][3]) == notes_per_datagram()
+    print(f"  ✅ {len(notes)} notes in {len(datagrams)} datagrams ({elapsed * 1000:.2f} ms)")
+    assert elapsed < 0.5
+
+
+def test_pattern_commands():
+    """Test pattern commands end to end against the simulated controller"""
+
+    print("\nTesting Pattern Commands")
+    print("=" * 50)
+
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+    controller = SimulatedController()
+    for _ in range(3):
+        controller.execute_action({"action": "create_track", "params": {"type": "midi"}})
+
+    for command, track, expected_notes in [
+        ("add a four-on-the-floor kick pattern for 8 bars", 2, 32),
+        ("add a C minor arpeggio to track 1", 0, 64)
+    ]:
+        actions = mapper.map_to_actions(nlp.parse_command(command))
+        print(f"  '{command}' -> {actions}")
+        assert len(actions) == 1 and actions[0]["action"] == "add_pattern"
+        assert controller.execute_action(actions[0])
+        clip = controller.get_project_state()["tracks"][track]["clips"][-1]
+        assert clip["notes"] == expected_notes
+        print(f"  ✅ {clip['notes']} notes on track {track + 1}")
+
+    # Spoken forms: no hyphens, and "a" as the article rather than the root
+    for command, expected in [
+        ("add a four on the floor kick pattern", {"pattern": "four-on-the-floor", "bars": 4}),
+        ("add a minor arpeggio", {"pattern": "arpeggio", "bars": 4, "root": "c", "scale": "minor"}),
+        ("add an a minor arpeggio", {"pattern": "arpeggio", "bars": 4, "root": "a", "scale": "minor"})
+    ]:
+        actions = mapper.map_to_actions(nlp.parse_command(command))
+        assert actions == [{"action": "add_pattern", "params": expected}], actions
+        print(f"  ✅ '{command}' -> {expected}")
+
+
+def test_clip_writing_controller():
+    """Test that add_pattern is written to AbletonOSC's port, not the wrapped controller's bridge port"""
+
+    print("\nTesting Clip Writing Controller")
+    print("=" * 50)
+
+    # Local sockets standing in for the Max bridge and for AbletonOSC
+    bridge = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    bridge.bind(("127.0.0.1", 0))
+    bridge.settimeout(0.2)
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    sink.settimeout(1.0)
+    inner = SimulatedController(*bridge.getsockname())
+    for _ in range(3):
+        inner.execute_action({"action": "create_track", "params": {"type": "midi"}})
+    controller = ClipWritingController(inner, osc_host="127.0.0.1", osc_port=sink.getsockname()[1])
+
+    actions = ActionMapper().map_to_actions(SimpleNLPModule().parse_command("add a C minor arpeggio to track 2"))
+    assert controller.execute_action(actions[0])
+    datagrams = [sink.recv(65536)]
+    while True:
+        try:
+            sink.settimeout(0.2)
+            datagrams.append(sink.recv(65536))
+        except socket.timeout:
+            break
+    sink.close()
+    try:
+        bridge.recv(65536)
+        assert False, "clip notes reached the bridge port"
+    except socket.timeout:
+        pass
+    bridge.close()
+
+    assert datagrams[0].startswith(b"/live/clip_slot/create_clip\0")
+    decoded = [_decode_add_notes(d) for d in datagrams[1:]]
+    assert all(track == 1 and clip == 0 for _, track, clip, _ in decoded)
+    assert sum(len(records) for _, _, _, records in decoded) == 64
+    print(f"  ✅ 64 notes sent to track 2 in {len(datagrams)} datagrams")
+
+    # Other actions still reach the wrapped controller
+    assert controller.execute_action({"action": "set_tempo", "params": {"value": 100}})
+    assert controller.get_project_state()["tempo"] == 100
+    # No such track: nothing is sent
+    assert not controller.execute_action({"action": "add_pattern", "params": {"pattern": "four-on-the-floor", "track": 9}})
+
+    # Without an address, AbletonOSC's defaults rather than the bridge's port
+    os.environ.pop("ABLETONML_OSC_HOST", None)
+    os.environ.pop("ABLETONML_OSC_PORT", None)
+    assert (ClipWritingController(inner).osc_host, ClipWritingController(inner).osc_port) == ("127.0.0.1", 11000)
+    os.environ["ABLETONML_OSC_PORT"] = "11010"
+    try:
+        assert ClipWritingController(inner).osc_port == 11010
+    finally:
+        del os.environ["ABLETONML_OSC_PORT"]
+    print("  ✅ Defaults to ABLETONML_OSC_PORT or 11000, never the bridge port")
+
+
+if __name__ == "__main__":
+    test_generated_patterns()
+    test_chunked_clip_writes()
+    test_pattern_commands()
+    test_clip_writing_controller()
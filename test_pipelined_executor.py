@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.pipelined_executor import PipelinedExecutor, plan_dependencies
+from core.simulated_controller import SimulatedController
+
+
+def test_dependencies():
+    """Test which actions must wait for which"""
+
+    actions = [
+        {"action": "create_track", "params": {"type": "midi"}},
+        {"action": "add_instrument", "params": {"instrument": "piano"}},
+        {"action": "set_tempo", "params": {"value": 120}},
+        {"action": "add_effect", "params": {"effect_type": "reverb", "track": 1}},
+        {"action": "add_effect", "params": {"effect_type": "delay", "track": 2}},
+        {"action": "set_effect_param", "params": {"effect": "reverb", "parameter": "wet", "value": 30}},
+    ]
+    dependencies = plan_dependencies(actions)
+
+    assert dependencies[1] == {0}              # instrument goes on the new track
+    assert dependencies[2] == set()            # tempo is independent
+    assert 0 in dependencies[3] and 1 in dependencies[3]
+    assert 3 not in dependencies[4]            # different tracks run side by side
+    assert 3 in dependencies[5]                # parameter after its effect exists
+    print(f"  ✅ dependencies: {dependencies}")
+
+
+def test_pipelined_execution():
+    """An independent plan should take about one round trip, not N"""
+
+    latency = 0.05
+    controller = SimulatedController(latency=latency)
+    for _ in range(8):
+        controller.execute_action({"action": "create_track", "params": {"type": "audio"}})
+
+    actions = [{"action": "add_effect", "params": {"effect_type": "reverb", "track": t}} for t in range(1, 9)]
+    executor = PipelinedExecutor(controller, window=8)
+
+    start = time.perf_counter()
+    reports = executor.run(actions)
+    elapsed = time.perf_counter() - start
+    executor.close()
+
+    print(f"  {len(actions)} actions in {elapsed * 1000:.0f} ms (serial would be {len(actions) * latency * 1000:.0f} ms)")
+    assert all(report["success"] for report in reports)
+    assert elapsed < len(actions) * latency / 2
+
+
+def test_failed_dependency_is_skipped():
+    """Actions depending on a failed one are not sent"""
+
+    controller = SimulatedController()
+    actions = [
+        {"action": "add_effect", "params": {"effect_type": "reverb", "track": 5}},
+        {"action": "set_effect_param", "params": {"effect": "reverb", "parameter": "wet", "value": 30}},
+        {"action": "set_tempo", "params": {"value": 99}},
+    ]
+    reports = PipelinedExecutor(controller).run(actions)
+
+    assert reports[0]["success"] is False
+    assert reports[1].get("skipped") is True
+    assert reports[2]["success"] is True
+    assert controller.get_project_state()["tempo"] == 99
+
+
+if __name__ == "__main__":
+    test_dependencies()
+    test_pipelined_execution()
+    test_failed_dependency_is_skipped()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.profiler import AdminGate, SamplingProfiler, profile_call
+
+
+def spin_in_hot_function(stop):
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+    return total
+
+
+def test_sampling_profiler():
+    """Test that sampling finds a busy thread's hot function and stops on its own"""
+
+    print("Testing Sampling Profiler")
+    print("=" * 50)
+
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_in_hot_function, args=(stop,), name="worker-hot")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.002, max_duration=0.3)
+    try:
+        status = profiler.start(duration=30)
+        assert status["running"] and status["duration"] == 0.3
+        try:
+            profiler.start()
+            assert False, "a second run must be refused"
+        except RuntimeError:
+            pass
+        assert profiler.wait(timeout=5)
+    finally:
+        stop.set()
+        worker.join()
+
+    result = profiler.result()
+    assert not result["running"] and result["samples"] > 10
+    lines = result["collapsed"].splitlines()
+    hot = [line for line in lines if line.startswith("worker-hot;")]
+    assert hot and all("spin_in_hot_function" in line for line in hot)
+    assert not any("profiler-sampler" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0 and stack.split(";")[0]
+    print(f"  ✅ {result['samples']} samples in {result['elapsed']:.2f}s (capped), "
+          f"{result['overhead_ms']:.1f} ms spent sampling")
+    print(f"  ✅ Hot stack: {hot[0][-80:]}")
+
+    # Thread filter and early stop
+    stop = threading.Event()
+    worker = threading.Thread(target=spin_in_hot_function, args=(stop,), name="worker-hot")
+    worker.start()
+    try:
+        profiler.start(duration=0.3, threads="nothing-")
+        time.sleep(0.05)
+        result = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+    assert not result["running"] and result["collapsed"] == ""
+    print("  ✅ Thread filter and early stop")
+
+
+def test_profile_call():
+    """Test deterministic profiling of a single call"""
+
+    print("\nTesting Deterministic Profiling")
+    print("=" * 50)
+
+    stop = threading.Event()
+    timer = threading.Timer(0.05, stop.set)
+    timer.start()
+    result, report = profile_call(spin_in_hot_function, (stop,), limit=5)
+    assert result > 0 and "spin_in_hot_function" in report and "function calls" in report
+    print("  ✅ cProfile report names the profiled function")
+
+    try:
+        profile_call(int, ("not a number",))
+        assert False
+    except ValueError:
+        print("  ✅ Exceptions from the profiled call propagate")
+
+    # A second run while one is going is refused instead of failing inside cProfile
+    stop = threading.Event()
+    first = threading.Thread(target=profile_call, args=(spin_in_hot_function, (stop,)))
+    first.start()
+    time.sleep(0.05)
+    calls = []
+    try:
+        profile_call(calls.append, (1,))
+        assert False
+    except RuntimeError as e:
+        assert calls == []
+        print(f"  ✅ Overlapping run refused: {e}")
+    finally:
+        stop.set()
+        first.join()
+    assert profile_call(len, ("abc",))[0] == 3
+
+
+def test_admin_gate():
+    """Test that profiling needs the flag and the admin token"""
+
+    print("\nTesting Admin Gate")
+    print("=" * 50)
+
+    assert AdminGate(False, "secret").check("secret") == ("Not enabled on this server", 404)
+    assert AdminGate(True, None).check("") == ("Not enabled on this server", 404)
+    gate = AdminGate(True, "secret")
+    assert gate.check("secret") is None
+    for token in (None, "", "wrong", 123):
+        assert gate.check(token) == ("Admin token required", 403)
+
+    os.environ["ABLETONML_ADMIN_TOKEN"] = "secret"
+    try:
+        assert AdminGate.from_environment("ABLETONML_TEST_FLAG").check("secret")[1] == 404
+        os.environ["ABLETONML_TEST_FLAG"] = "1"
+        assert AdminGate.from_environment("ABLETONML_TEST_FLAG").check("secret") is None
+    finally:
+        os.environ.pop("ABLETONML_TEST_FLAG", None)
+        del os.environ["ABLETONML_ADMIN_TOKEN"]
+    print("  ✅ Off without the flag or a token, 403 without the right token")
+
+
+if __name__ == "__main__":
+    test_sampling_profiler()
+    test_profile_call()
+    test_admin_gate()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import time
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.snapshot import Snapshot, diff, generate_state, restore_actions
+from core.simulated_controller import SimulatedController
+
+
+def test_round_trip():
+    """Test that snapshots round-trip a large state through bytes and an mmap'd file"""
+
+    print("Testing Snapshot Round Trip")
+    print("=" * 50)
+
+    state = generate_state(500)
+    # Keys outside the columnar schema survive too
+    state["tracks"][3]["clips"] = [{"pattern": "arpeggio", "notes": 64, "length": 16}]
+    state["tracks"][3]["devices"][0]["preset"] = "Init"
+    state["song_time"] = 12.5
+
+    start = time.perf_counter()
+    data = Snapshot.from_state(state).to_bytes()
+    restored = Snapshot.from_bytes(data).to_state()
+    elapsed = time.perf_counter() - start
+    assert restored == state
+    print(f"  ✅ 500 tracks round-trip in {elapsed * 1000:.1f} ms "
+          f"({len(data) / 1024:.0f} kB vs {len(json.dumps(state)) / 1024:.0f} kB of JSON)")
+    assert elapsed < 0.1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "known-good.amls")
+        Snapshot.from_state(state).save(path)
+        loaded = Snapshot.load(path)
+        assert len(loaded) == 500 and loaded.track(3) == state["tracks"][3]
+        assert loaded.to_state() == state
+        print("  ✅ Saved and memory-mapped back")
+
+
+def test_diff():
+    """Test structural diffs between snapshots"""
+
+    print("\nTesting Snapshot Diff")
+    print("=" * 50)
+
+    old_state = generate_state(50)
+    new_state = json.loads(json.dumps(old_state))
+    new_state["tempo"] = 128
+    new_state["tracks"][2]["name"] = "Drums"
+    new_state["tracks"][5]["devices"].append({"name": "limiter", "type": "effect"})
+    new_state["tracks"][9]["devices"][1]["parameters"]["dry/wet"] = 7
+    new_state["tracks"][11]["devices"][2]["parameters"]["feedback"] = 0.5
+    new_state["tracks"].pop()
+    new_state["tracks"].append({"name": "New", "type": "audio", "devices": []})
+    new_state["tracks"].append({"name": "Newer", "type": "midi", "devices": []})
+
+    old, new = Snapshot.from_state(old_state), Snapshot.from_state(new_state)
+    start = time.perf_counter()
+    changes = diff(old, new)
+    elapsed = time.perf_counter() - start
+    for change in changes:
+        print(f"    {change}")
+
+    ops = [(change["op"], change.get("track")) for change in changes]
+    assert ops == [("set_tempo", None), ("rename_track", 2), ("rename_track", 49), ("set_track_type", 49),
+                   ("set_devices", 5), ("set_devices", 49), ("set_param", 9), ("set_param", 11), ("add_track", 50)]
+    param = changes[6]
+    assert param["device"] == 1 and param["parameter"] == "dry/wet" and param["value"] == 7
+    assert param["effect"] == new_state["tracks"][9]["devices"][1]["name"]
+    assert changes[7]["parameter"] == "feedback"
+    assert diff(old, Snapshot.from_bytes(old.to_bytes())) == []
+    print(f"  ✅ {len(changes)} changes found in {elapsed * 1000:.2f} ms")
+
+
+def test_values_outside_tables():
+    """Test non-numeric parameters, removed parameters and clips in snapshots and diffs"""
+
+    print("\nTesting Values Outside the Tables")
+    print("=" * 50)
+
+    old_state = generate_state(10)
+    old_state["tracks"][1]["devices"][1]["parameters"]["mode"] = "high"
+    old_state["tracks"][1]["devices"][1]["parameters"]["frozen"] = True
+    old = Snapshot.from_state(old_state)
+    assert old.to_state() == old_state
+    assert Snapshot.from_bytes(old.to_bytes()).to_state() == old_state
+    print("  ✅ String and boolean parameter values round-trip")
+
+    new_state = json.loads(json.dumps(old_state))
+    new_state["playing"] = True
+    new_state["tracks"][1]["devices"][1]["parameters"]["mode"] = "low"
+    new_state["tracks"][2]["devices"][1]["parameters"].pop("amount")
+    parameters = new_state["tracks"][3]["devices"][1]["parameters"]
+    parameters["drive"] = parameters.pop("amount")
+    new_state["tracks"][4]["clips"] = [{"pattern": "arpeggio", "notes": 64, "length": 16}]
+    changes = diff(old, Snapshot.from_state(new_state))
+    for change in changes:
+        print(f"    {change}")
+
+    ops = [(change["op"], change.get("track"), change.get("parameter") or change.get("key")) for change in changes]
+    assert sorted(ops, key=str) == sorted([
+        ("set_param", 1, "mode"), ("set_param", 3, "drive"),
+        ("remove_param", 2, "amount"), ("remove_param", 3, "amount"),
+        ("set_extra", None, "playing"), ("set_track_extra", 4, "clips")], key=str)
+    assert changes[0]["value"] == "low" and changes[0]["effect"] == new_state["tracks"][1]["devices"][1]["name"]
+    print("  ✅ Changed, renamed and removed parameters, clips and state keys all show up")
+
+    back = diff(Snapshot.from_state(new_state), old)
+    assert ("remove_extra", "playing") in [(change["op"], change.get("key")) for change in back]
+    assert ("remove_track_extra", 4) in [(change["op"], change.get("track")) for change in back]
+
+    # What restore can't undo is reported, not dropped
+    actions, unsupported = restore_actions(back)
+    assert {"action": "set_effect_param", "params": {"effect": changes[0]["effect"], "parameter": "mode",
+                                                     "value": "high"}} in actions
+    assert sorted(change["op"] for change in unsupported) == ["remove_extra", "remove_param", "remove_track_extra"]
+    current = generate_state(3)
+    current["tracks"][0]["devices"].pop()
+    _, unsupported = restore_actions(diff(Snapshot.from_state(current), Snapshot.from_state(generate_state(2))))
+    assert [change["op"] for change in unsupported] == ["set_devices", "remove_track"]
+    print("  ✅ Removed tracks, device lists, parameters and extras are reported as unsupported by restore")
+
+
+def test_restore():
+    """Test restoring a saved state on a simulated Live"""
+
+    print("\nTesting Snapshot Restore")
+    print("=" * 50)
+
+    controller = SimulatedController()
+    controller.execute_action({"action": "create_track", "params": {"type": "audio"}})
+    controller.execute_action({"action": "add_effect", "params": {"effect_type": "reverb", "track": 1}})
+    controller.execute_action({"action": "set_effect_param", "params": {"effect": "reverb", "parameter": "wet",
+                                                                        "value": 30}})
+    saved = Snapshot.from_state(controller.get_project_state())
+
+    controller.execute_action({"action": "set_tempo", "params": {"value": 90}})
+    controller.execute_action({"action": "set_effect_param", "params": {"effect": "reverb", "parameter": "wet",
+                                                                        "value": 100}})
+
+    actions, unsupported = restore_actions(diff(Snapshot.from_state(controller.get_project_state()), saved))
+    print(f"  Restore plan: {actions}")
+    for action in actions:
+        assert controller.execute_action(action)
+    assert Snapshot.from_state(controller.get_project_state()).to_state() == saved.to_state()
+    assert unsupported == []
+    print("  ✅ Live state matches the saved snapshot again")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_diff()
+    test_values_outside_tables()
+    test_restore()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import tempfile
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.speech_feedback import AudioCache, SpokenFeedback, common_phrases, phrase_for, render_text
+
+
+class SlowEngine:
+    """Stand-in synthesizer taking a fixed time per phrase; the audio is the text"""
+
+    name = "test-voice"
+    suffix = ".wav"
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.spoken = []
+
+    def synthesize(self, text):
+        time.sleep(self.delay)
+        self.spoken.append(text)
+        return text.encode("utf-8") * 100
+
+
+class Recorder:
+    def __init__(self):
+        self.played = []
+        self.event = threading.Event()
+
+    def __call__(self, audio, suffix):
+        self.played.append((time.perf_counter(), audio[:len(audio) // 100].decode("utf-8")))
+        self.event.set()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.002)
+    return condition()
+
+
+def test_phrases():
+    """Test that actions map onto the same template keys and slots that get pre-rendered"""
+
+    print("Testing Feedback Phrases")
+    print("=" * 50)
+
+    key, slots = phrase_for({"action": "set_tempo", "params": {"value": 120.0}})
+    assert render_text(key, slots) == "tempo set to 120"
+    key, slots = phrase_for({"action": "add_effect", "params": {"effect_type": "reverb", "track": 2}})
+    assert render_text(key, slots) == "reverb added to track 2"
+    key, slots = phrase_for({"action": "set_effect_param", "params": {"effect": "reverb", "parameter": "dry/wet",
+                                                                       "value": 30}})
+    assert render_text(key, slots) == "reverb dry wet set to 30"
+    assert phrase_for({"action": "select_track", "params": {"track": 1}}) is None
+
+    phrases = common_phrases()
+    assert ("set_tempo", {"value": "120"}) in phrases
+    assert ("add_effect", {"effect_type": "reverb", "track": "2"}) in phrases
+    print(f"  ✅ {len(phrases)} common confirmations, keyed like the live ones")
+
+
+def test_prerendered_feedback():
+    """Test that pre-rendered confirmations play without synthesis and others render off the caller"""
+
+    print("\nTesting Spoken Feedback")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = SlowEngine()
+        player = Recorder()
+        feedback = SpokenFeedback(engine, player, AudioCache(tmp))
+        try:
+            feedback.prerender([("set_tempo", {"value": "120"}),
+                                ("add_effect", {"effect_type": "reverb", "track": "2"})])
+            assert _wait_for(lambda: feedback.renders == 2)
+
+            start = time.perf_counter()
+            feedback.confirm([{"action": "set_tempo", "params": {"value": 120}}])
+            assert _wait_for(lambda: player.played)
+            latency = player.played[0][0] - start
+            assert player.played[0][1] == "tempo set to 120" and feedback.renders == 2
+            print(f"  ✅ Pre-rendered 'tempo set to 120' started playing after {latency * 1000:.2f} ms")
+
+            start = time.perf_counter()
+            feedback.say("set_tempo", value=97)
+            returned = time.perf_counter() - start
+            assert returned < engine.delay
+            assert _wait_for(lambda: len(player.played) == 2)
+            assert player.played[1][1] == "tempo set to 97" and feedback.renders == 3
+            print(f"  ✅ Uncached phrase rendered on the worker; say() returned in {returned * 1000:.2f} ms")
+        finally:
+            feedback.close()
+
+        # A new session finds the audio on disk and renders nothing
+        engine = SlowEngine()
+        player = Recorder()
+        feedback = SpokenFeedback(engine, player, AudioCache(tmp))
+        try:
+            feedback.prerender([("set_tempo", {"value": "120"}), ("set_tempo", {"value": "97"})])
+            assert _wait_for(lambda: feedback.cache.status()["memory_items"] == 2)
+            feedback.say("set_tempo", value=97)
+            assert _wait_for(lambda: player.played)
+            assert engine.spoken == [] and feedback.cache.status()["disk_hits"] == 2
+            print("  ✅ Rendered audio reloaded from the disk cache")
+        finally:
+            feedback.close()
+
+
+def test_cache_bounds():
+    """Test that both cache tiers stay within their byte budgets, evicting least recently used"""
+
+    print("\nTesting Audio Cache Bounds")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(tmp, memory_bytes=3000, disk_bytes=5000)
+        digests = [AudioCache.key("voice", "set_tempo", {"value": str(tempo)}) for tempo in range(10)]
+        for digest in digests[:4]:
+            cache.put(digest, b"x" * 1000)
+        cache.get(digests[0])
+        for digest in digests[4:]:
+            cache.put(digest, b"x" * 1000)
+
+        status = cache.status()
+        assert status["memory_bytes"] <= 3000 and status["disk_bytes"] <= 5000
+        assert len(os.listdir(tmp)) == status["disk_items"] == 5
+        assert cache.get(digests[1]) is None and cache.get(digests[-1]) is not None
+        print(f"  ✅ Within budget after 10 phrases: {status}")
+
+        reopened = AudioCache(tmp, memory_bytes=3000, disk_bytes=5000)
+        assert reopened.status()["disk_items"] == 5 and reopened.get(digests[-1]) == b"x" * 1000
+        print("  ✅ Disk index rebuilt on startup")
+
+
+if __name__ == "__main__":
+    test_phrases()
+    test_prerendered_feedback()
+    test_cache_bounds()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import sys
+import os
+import json
+import time
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.state_fanout import EncodedJSON, PacketJSON, StateFanout
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_serialize_once_and_coalesce():
+    """Test that one encode serves every observer and a slow one only gets the latest state"""
+
+    print("Testing State Fan-out")
+    print("=" * 50)
+
+    encodes = []
+
+    def serialize(target, state, version):
+        encodes.append(version)
+        return json.dumps({"target": target, "version": version, "state": state})
+
+    fanout = StateFanout(serialize=serialize)
+    received = {}
+    received_lock = threading.Lock()
+
+    def receiver(sid, delay=0.0):
+        def send(payload):
+            if delay:
+                time.sleep(delay)
+            with received_lock:
+                received.setdefault(sid, []).append(json.loads(payload)["version"])
+        return send
+
+    try:
+        for sid in range(200):
+            fanout.subscribe("studio_a", sid, receiver(sid))
+        fanout.subscribe("studio_a", "slow", receiver("slow", delay=0.05))
+        fanout.subscribe("studio_b", "other", receiver("other"))
+
+        for tempo in range(50):
+            fanout.publish("studio_a", {"tempo": 100 + tempo, "tracks": []})
+        assert encodes == list(range(1, 51))
+        print(f"  ✅ 50 updates to 201 observers took {len(encodes)} encodes")
+
+        assert _wait_for(lambda: all(s.last_version == 50 for s in fanout.subscribers("studio_a")))
+        slow = received["slow"]
+        assert slow[-1] == 50 and slow == sorted(slow) and len(slow) < 10
+        assert all(versions == sorted(versions) for versions in received.values())
+        assert "other" not in received
+        print(f"  ✅ Slow observer got {len(slow)} of 50 updates, ending with the latest")
+
+        # Late joiners get the latest state straight away
+        fanout.subscribe("studio_a", "late", receiver("late"))
+        assert _wait_for(lambda: received.get("late") == [50])
+        fanout.unsubscribe("late")
+        fanout.publish("studio_a", {"tempo": 90, "tracks": []})
+        assert _wait_for(lambda: received[0][-1] == 51)
+        assert received["late"] == [50]
+        print("  ✅ Late joiner caught up; unsubscribed observer left the room")
+    finally:
+        fanout.close()
+
+
+def test_acknowledged_delivery():
+    """Test that acking observers get one update at a time, coalesced in between"""
+
+    print("\nTesting Acknowledged State Delivery")
+    print("=" * 50)
+
+    fanout = StateFanout()
+    sent = []
+    try:
+        fanout.subscribe("default", "ui", lambda payload: sent.append(json.loads(payload)["version"]), acks=True)
+        for tempo in range(10):
+            fanout.publish("default", {"tempo": tempo})
+        assert _wait_for(lambda: sent == [1])
+        time.sleep(0.05)
+        assert sent == [1]
+
+        fanout.ack("default", "ui", 1)
+        assert _wait_for(lambda: sent == [1, 10])
+        fanout.ack("default", "ui", 10)
+        fanout.publish("default", {"tempo": 11})
+        assert _wait_for(lambda: sent == [1, 10, 11])
+        status = fanout.status()["rooms"]["default"]["subscribers"][0]
+        assert status["coalesced"] == 8 and status["awaiting_ack"] == 11
+        print(f"  ✅ Waited for acks and skipped 8 intermediate states: {sent}")
+    finally:
+        fanout.close()
+
+
+def test_unacknowledged_holds():
+    """Test that observers that don't ack are rate-limited and one that never acks isn't stuck"""
+
+    print("\nTesting Coalescing Without Acks")
+    print("=" * 50)
+
+    fanout = StateFanout(min_interval=0.2, ack_timeout=0.6)
+    plain, silent = [], []
+    try:
+        fanout.subscribe("default", "dashboard", lambda payload: plain.append(json.loads(payload)["version"]))
+        fanout.subscribe("default", "ui", lambda payload: silent.append(json.loads(payload)["version"]), acks=True)
+        fanout.publish("default", {"tempo": 0})
+        assert _wait_for(lambda: plain == [1] and silent == [1])
+        for tempo in range(1, 50):
+            fanout.publish("default", {"tempo": tempo})
+        assert _wait_for(lambda: plain == [1, 50])
+        assert silent == [1]
+        print(f"  ✅ Observer without acks got {plain} for 50 rapid updates")
+
+        assert _wait_for(lambda: silent == [1, 50])
+        fanout.ack("default", "ui", 1)
+        fanout.publish("default", {"tempo": 90})
+        time.sleep(0.1)
+        assert silent == [1, 50]
+        assert _wait_for(lambda: silent == [1, 50, 51])
+        status = {s["sid"]: s for s in fanout.status()["rooms"]["default"]["subscribers"]}
+        assert status["ui"]["timeouts"] >= 2 and status["dashboard"]["timeouts"] == 0
+        assert status["dashboard"]["awaiting_ack"] is None
+        print(f"  ✅ Observer that never acked moved on after each timeout: {silent}")
+    finally:
+        fanout.close()
+
+
+def test_preencoded_packets():
+    """Test that pre-encoded state is spliced into packets unchanged"""
+
+    print("\nTesting Pre-encoded Packets")
+    print("=" * 50)
+
+    state = EncodedJSON(json.dumps({"tempo": 120, "tracks": [{"name": "Bass"}]}))
+    packet = PacketJSON.dumps(["project_state", state, {"target": "default", "version": 3}], separators=(",", ":"))
+    assert PacketJSON.loads(packet) == ["project_state", json.loads(state), {"target": "default", "version": 3}]
+    assert PacketJSON.dumps({"sid": "abc"}) == json.dumps({"sid": "abc"})
+    print(f"  ✅ {packet}")
+
+
+if __name__ == "__main__":
+    test_serialize_once_and_coalesce()
+    test_acknowledged_delivery()
+    test_unacknowledged_holds()
+    test_preencoded_packets()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import sys
+import os
+import copy
+import time
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.state_feed import StateFeed, apply_changes
+from core.snapshot import Snapshot, diff, generate_state
+from core.simulated_controller import SimulatedController
+from core.pacer import PacedController
+from core.automation import RampingController
+
+
+class PollOnlyController:
+    """A controller that can't push, like the Max bridge; changes happen 'in Live'"""
+
+    def __init__(self, state):
+        self.state = state
+        self.fetches = 0
+
+    def get_project_state(self):
+        self.fetches += 1
+        return copy.deepcopy(self.state)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.002)
+    return condition()
+
+
+def test_apply_changes():
+    """Test that applying a diff to the old state reproduces the new one"""
+
+    print("Testing State Deltas")
+    print("=" * 50)
+
+    old = generate_state(tracks=6)
+    new = copy.deepcopy(old)
+    new["tempo"] = 98
+    new["selected_track"] = 3
+    new["tracks"][1]["name"] = "Vocals"
+    new["tracks"][2]["devices"].append({"name": "chorus", "type": "effect"})
+    new["tracks"][3]["devices"][1]["parameters"]["dry/wet"] = 12
+    new["tracks"][3]["devices"][2]["parameters"].pop("amount")
+    new["tracks"][0]["clips"] = [{"pattern": "hi-hats", "notes": 32, "length": 16}]
+    new["playing"] = True
+    del new["tracks"][4:]
+    changes = diff(Snapshot.from_state(old), Snapshot.from_state(new))
+    assert apply_changes(copy.deepcopy(old), changes) == Snapshot.from_state(new).to_state()
+
+    grown = copy.deepcopy(old)
+    grown["tracks"].append({"name": "7-Bass", "type": "midi", "devices": []})
+    changes = diff(Snapshot.from_state(old), Snapshot.from_state(grown))
+    assert apply_changes(copy.deepcopy(old), changes) == Snapshot.from_state(grown).to_state()
+    print("  ✅ Deltas rebuild the new state")
+
+
+def test_pushed_feed():
+    """Test that a pushing controller queues one delta per change and is never polled"""
+
+    print("\nTesting Pushed State Feed")
+    print("=" * 50)
+
+    simulated = SimulatedController()
+    controller = RampingController(PacedController(simulated))
+    feed = StateFeed(controller, interval=0.01).start()
+    try:
+        assert feed.pushed
+        assert _wait_for(lambda: feed.updates.qsize() == 1)
+        first = feed.drain()[0]
+        assert first["changes"] is None and first["state"]["tempo"] == 120
+        state = first["state"]
+
+        start = time.perf_counter()
+        controller.execute_action({"action": "set_tempo", "params": {"value": 90}})
+        controller.execute_action({"action": "create_track", "params": {"type": "audio"}})
+        assert _wait_for(lambda: feed.updates.qsize() == 2)
+        latency = time.perf_counter() - start
+        for update in feed.drain():
+            apply_changes(state, update["changes"])
+        assert state["tempo"] == 90 and [track["type"] for track in state["tracks"]] == ["audio"]
+        print(f"  ✅ Two changes queued as deltas within {latency * 1000:.2f} ms")
+
+        controller.execute_action({"action": "set_tempo", "params": {"value": 90}})
+        controller.execute_action({"action": "add_effect", "params": {"effect_type": "reverb", "track": 9}})
+        feed.refresh()
+        time.sleep(0.05)
+        assert feed.drain() == [] and feed.fetches == 1 and feed.unchanged == 1
+        print(f"  ✅ Idle and no-op changes queue nothing and fetch nothing: {feed.status()}")
+
+        # Non-numeric values and new clips come through as deltas too
+        controller.execute_action({"action": "add_effect", "params": {"effect_type": "eq eight", "track": 1}})
+        assert controller.execute_action({"action": "set_effect_param", "params": {
+            "effect": "eq eight", "parameter": "mode", "value": "high"}})
+        assert controller.execute_action({"action": "add_pattern", "params": {"pattern": "hi-hats", "track": 1}})
+        assert _wait_for(lambda: feed.updates.qsize() == 3)
+        updates = feed.drain()
+        for update in updates:
+            apply_changes(state, update["changes"])
+        assert [change["op"] for change in updates[2]["changes"]] == ["set_track_extra"]
+        assert state == simulated.get_project_state()
+        print("  ✅ A string parameter value and a new clip were pushed as deltas")
+    finally:
+        feed.close()
+
+
+def test_failing_listener():
+    """Test that a listener that raises doesn't fail the action that changed the state"""
+
+    print("\nTesting Failing Listener")
+    print("=" * 50)
+
+    simulated = SimulatedController()
+    heard = []
+
+    def broken(state):
+        raise ValueError("listener bug")
+
+    simulated.add_state_listener(broken)
+    simulated.add_state_listener(heard.append)
+    assert simulated.execute_action({"action": "set_tempo", "params": {"value": 100}})
+    assert simulated.get_project_state()["tempo"] == 100 and heard[-1]["tempo"] == 100
+
+    feed = StateFeed(simulated)
+    assert feed.push({"tempo": 100, "tracks": [{"name": 1, "devices": None}]}) is False
+    assert feed.push(simulated.get_project_state()) and feed.version == 1
+    print("  ✅ Action succeeded and later listeners still ran; an unreadable state was skipped")
+
+
+def test_polled_feed():
+    """Test that a controller which can't push is polled off the UI thread, queuing only changes"""
+
+    print("\nTesting Polled State Feed")
+    print("=" * 50)
+
+    live = PollOnlyController({"tempo": 120, "tracks": [], "selected_track": -1})
+    assert not PacedController(live).add_state_listener(lambda state: None)
+    feed = StateFeed(PacedController(live), interval=0.01).start()
+    try:
+        assert not feed.pushed
+        assert _wait_for(lambda: live.fetches > 5)
+        assert len(feed.drain()) == 1
+        live.state["tempo"] = 140
+        assert _wait_for(lambda: feed.updates.qsize() == 1)
+        update = feed.drain()[0]
+        assert update["changes"] == [{"op": "set_tempo", "value": 140}]
+        assert feed.unchanged >= 4
+        print(f"  ✅ Change made in Live found by the poll: {feed.status()}")
+    finally:
+        feed.close()
+
+
+if __name__ == "__main__":
+    test_apply_changes()
+    test_pushed_feed()
+    test_failing_listener()
+    test_polled_feed()
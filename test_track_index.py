@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import threading
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.track_index import TrackNameIndex
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+
+
+def test_track_name_resolution():
+    """Test resolving spoken track names to track numbers"""
+
+    index = TrackNameIndex()
+    index.update_from_state({"tracks": [
+        {"name": "1-MIDI"}, {"name": "Drums"}, {"name": "Bass"}, {"name": "Bass"}, {"name": "Synth Lead"}
+    ]})
+
+    test_phrases = {
+        "the drums": 2,
+        "drum": 2,
+        "bass": 3,
+        "bass 2": 4,
+        "lead": 5,
+        "synth": 5,
+        "1 midi": 1,
+        "vocals": None
+    }
+
+    print("Testing Track Name Index")
+    print("=" * 50)
+
+    for phrase, expected in test_phrases.items():
+        resolved = index.resolve(phrase)
+        status = "✅" if resolved == expected else "❌"
+        print(f"  {status} '{phrase}' -> {resolved}")
+        assert resolved == expected
+
+    # Incremental updates: rename, delete and insert
+    index.track_renamed(1, "Vocals")
+    assert index.resolve("vocals") == 2
+    assert index.resolve("drums") is None
+    index.track_deleted(0)
+    assert index.resolve("vocals") == 1
+    index.track_created(0, "Pads")
+    assert index.resolve("pads") == 1
+    assert index.resolve("lead") == 5
+
+
+def test_mapper_uses_track_names():
+    """Test that 'add reverb to the drums' maps to the right track"""
+
+    index = TrackNameIndex(["Keys", "Drums"])
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper(track_index=index)
+
+    actions = mapper.map_to_actions(nlp.parse_command("add reverb to the drums"))
+    print(f"  'add reverb to the drums' -> {actions}")
+    assert actions == [{"action": "add_effect", "params": {"effect_type": "reverb", "track": 2}}]
+
+    actions = mapper.map_to_actions(nlp.parse_command("add reverb to track 1"))
+    assert actions[0]["params"]["track"] == 1
+
+
+def test_large_set_resolution():
+    """Resolution should stay fast on sets with hundreds of tracks"""
+
+    index = TrackNameIndex([f"Track Group {i} Layer" for i in range(500)])
+    start = time.perf_counter()
+    for i in range(500):
+        assert index.resolve(f"track group {i} layer") == i + 1
+    per_lookup_us = (time.perf_counter() - start) / 500 * 1e6
+    print(f"  {per_lookup_us:.1f} us per lookup on 500 tracks")
+
+
+def test_concurrent_updates():
+    """Concurrent state updates should leave every name at its own position"""
+
+    print("\nTesting Concurrent Index Updates")
+    print("=" * 50)
+
+    index = TrackNameIndex()
+    states = [{"tracks": [{"name": f"Take {n} Track {i}"} for i in range(n)]} for n in range(1, 40)]
+    errors = []
+
+    def apply(batch):
+        try:
+            for state in batch:
+                index.update_from_state(state)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=apply, args=(states[i::-1] + states,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    index.update_from_state(states[-1])
+    assert len(index) == 39
+    assert all(index.resolve(f"take 39 track {i}") == i + 1 for i in range(39))
+    print(f"  ✅ 8 threads applied {len(states) * 2} states each without errors; names match positions")
+
+
+if __name__ == "__main__":
+    test_track_name_resolution()
+    test_mapper_uses_track_names()
+    test_large_set_resolution()
+    test_concurrent_updates()
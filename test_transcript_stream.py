@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import sys
+import os
+import tracemalloc
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.transcript_stream import CommandSegmenter, iter_words, stream_plans
+from core.simple_nlp import SimpleNLPModule
+from core.action_mapper import ActionMapper
+
+DICTATION = ("okay so um first create a midi track with piano. Then uh add reverb to track 1 and then "
+             "set the tempo to 128, fade reverb wet from 0 to 80 over 4 bars and load groove.mid into "
+             "track 2. I think that's it for now")
+
+
+def test_segmentation():
+    """Test that run-on dictation splits into verb-first command candidates across chunk boundaries"""
+
+    print("Testing Transcript Segmentation")
+    print("=" * 50)
+
+    expected = ["create a midi track with piano", "add reverb to track 1", "set the tempo to 128",
+                "fade reverb wet from 0 to 80 over 4 bars", "load groove.mid into track 2"]
+    segmenter = CommandSegmenter()
+    for size in (1, 7, 4096):
+        chunks = [DICTATION[i:i + size] for i in range(0, len(DICTATION), size)]
+        assert list(segmenter.segment(iter_words(chunks))) == expected, size
+    print(f"  ✅ {len(expected)} commands found in the same places for any chunk size")
+
+    segmenter = CommandSegmenter(max_words=5)
+    candidates = list(segmenter.segment("add reverb reverb reverb reverb reverb reverb reverb".split()))
+    assert candidates == ["add reverb reverb reverb reverb"]
+    print("  ✅ Candidates without an end are cut at max_words")
+
+
+def test_streaming_plans():
+    """Test that plans come out while the transcript is still arriving, in bounded memory"""
+
+    print("\nTesting Streaming Plans")
+    print("=" * 50)
+
+    nlp = SimpleNLPModule()
+    mapper = ActionMapper()
+    consumed = [0]
+
+    def dictation():
+        for i in range(20000):
+            consumed[0] += 1
+            yield f"um so set tempo to {80 + i % 80} and uh add delay to track {1 + i % 4}. "
+
+    plans = stream_plans(dictation(), nlp, mapper)
+    first = next(plans)
+    assert first["actions"] == [{"action": "set_tempo", "params": {"value": 80}}]
+    assert consumed[0] <= 2
+    print(f"  ✅ First plan ready after {consumed[0]} of 20000 transcript pieces")
+
+    tracemalloc.start()
+    count = 1
+    mapped = 1
+    for plan in plans:
+        count += 1
+        mapped += bool(plan["actions"])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == mapped == 40000
+    assert peak < 256 * 1024
+    print(f"  ✅ {count} plans from ~{20000 * 10} words with a {peak / 1024:.0f} kB peak")
+
+
+if __name__ == "__main__":
+    test_segmentation()
+    test_streaming_plans()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+import signal
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.simple_nlp import SimpleNLPModule
+from backend.worker_pool import PreforkNLPPool
+
+
+def test_prefork_pool():
+    """Test that forked workers parse like the parent and keep session order"""
+
+    nlp = SimpleNLPModule()
+    commands = ["set tempo to 100", "create midi track", "add reverb to track 2", "set delay mix to 50"]
+
+    print("Testing Pre-forked NLP Workers")
+    print("=" * 50)
+
+    pool = PreforkNLPPool(nlp, workers=2)
+    try:
+        futures = [(session, command, pool.submit(session, command))
+                   for session in ("alice", "bob", "carol") for command in commands]
+        for session, command, future in futures:
+            assert future.result(timeout=10) == nlp.parse_command(command)
+        print(f"  ✅ {len(futures)} commands parsed in workers")
+
+        stats = pool.stats()
+        assert len(stats["workers"]) == 2
+        assert stats["total_completed"] == len(futures)
+        assert all(worker["alive"] for worker in stats["workers"])
+        for worker in stats["workers"]:
+            print(f"  worker {worker['worker']}: {worker['completed']} commands, RSS {worker['rss_kb']} kB")
+
+        # One session's commands complete in the order they were sent
+        completed = []
+        futures = []
+        for tempo in range(60, 160):
+            future = pool.submit("alice", f"set tempo to {tempo}")
+            future.add_done_callback(lambda f: completed.append(f.result()["parameters"]["tempo"]))
+            futures.append(future)
+        for future in futures:
+            future.result(timeout=10)
+        assert completed == list(range(60, 160))
+        print("  ✅ Session order kept across 100 commands")
+    finally:
+        pool.close()
+
+
+def test_dead_worker():
+    """Test that a killed worker is replaced and its commands are parsed anyway"""
+
+    nlp = SimpleNLPModule()
+    pool = PreforkNLPPool(nlp, workers=1, timeout=5.0, check_interval=0.05)
+    try:
+        assert pool.parse("alice", "set tempo to 90")["parameters"]["tempo"] == 90
+        dead = pool.stats()["workers"][0]["pid"]
+        os.kill(dead, signal.SIGKILL)
+
+        # Waits no longer than it takes the watchdog to notice, then parses in process
+        start = time.perf_counter()
+        assert pool.parse("alice", "set tempo to 100")["parameters"]["tempo"] == 100
+        assert time.perf_counter() - start < 2.0
+
+        deadline = time.time() + 5
+        while pool.restarts == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        worker = pool.stats()["workers"][0]
+        assert pool.restarts == 1 and worker["alive"] and worker["pid"] != dead
+        assert pool.parse("alice", "set tempo to 110")["parameters"]["tempo"] == 110
+        print(f"  ✅ Worker {dead} replaced by {worker['pid']}, {pool.fallbacks} command(s) parsed in process")
+
+        # A hung worker costs one timeout, not a hang
+        pool.timeout = 0.2
+        os.kill(worker["pid"], signal.SIGSTOP)
+        try:
+            start = time.perf_counter()
+            assert pool.parse("alice", "set tempo to 120")["parameters"]["tempo"] == 120
+            assert time.perf_counter() - start < 2.0
+        finally:
+            try:
+                os.kill(worker["pid"], signal.SIGCONT)
+            except ProcessLookupError:
+                pass
+
+        # ...and is replaced, so the next command is parsed by a worker again
+        replacement = pool.stats()["workers"][0]
+        assert pool.restarts == 2 and replacement["alive"] and replacement["pid"] != worker["pid"]
+        fallbacks = pool.fallbacks
+        pool.timeout = 5.0
+        assert pool.parse("alice", "set tempo to 130")["parameters"]["tempo"] == 130
+        assert pool.fallbacks == fallbacks
+        print(f"  ✅ Hung worker {worker['pid']} killed and replaced by {replacement['pid']}")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    test_prefork_pool()
+    test_dead_worker()